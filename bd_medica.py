@@ -1,536 +1,1049 @@
-import sqlite3
-import hashlib
-from datetime import datetime, timedelta
-
-DB_NAME = "citas_medicas.db"
-
-def conectar_bd():
-    """
-    Conecta a la base de datos SQLite y activa la verificación de claves foráneas.
-    Devuelve la conexión.
-    """
-    conexion = sqlite3.connect(DB_NAME)
-    conexion.execute("PRAGMA foreign_keys = ON;")
-    return conexion
-
-def crear_base_de_datos():
-    """Crea la base de datos con todas sus tablas necesarias e inserta las 5 especialidades fijas."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    # Tabla Usuarios (actualizada para incluir seguridad y fotografía)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tipo_usuario TEXT CHECK(tipo_usuario IN ('Paciente', 'Administrador')) NOT NULL,
-            nombres TEXT NOT NULL,
-            apellidos TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            telefono TEXT CHECK(LENGTH(telefono) = 10) NOT NULL,
-            cedula TEXT UNIQUE CHECK(LENGTH(cedula) = 10) NOT NULL,
-            password TEXT NOT NULL,
-            security_q1 TEXT,
-            security_a1 TEXT,
-            security_q2 TEXT,
-            security_a2 TEXT,
-            security_q3 TEXT,
-            security_a3 TEXT,
-            photo TEXT
-        );
-    """)
-    # Tabla Especialidades
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Especialidades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT UNIQUE NOT NULL
-        );
-    """)
-    # Tabla Medicos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Medicos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombres TEXT NOT NULL,
-            apellidos TEXT NOT NULL,
-            especialidad_id INTEGER NOT NULL,
-            telefono TEXT CHECK(LENGTH(telefono) = 10),
-            email TEXT UNIQUE NOT NULL,
-            usuario_id INTEGER,
-            FOREIGN KEY (especialidad_id) REFERENCES Especialidades(id) ON DELETE CASCADE
-        );
-    """)
-    # Tabla Horarios
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Horarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            medico_id INTEGER NOT NULL,
-            fecha DATE NOT NULL,
-            hora TIME NOT NULL,
-            estado TEXT CHECK(estado IN ('Disponible', 'Reservado')) DEFAULT 'Disponible',
-            FOREIGN KEY (medico_id) REFERENCES Medicos(id) ON DELETE CASCADE,
-            UNIQUE (medico_id, fecha, hora)
-        );
-    """)
-    # Tabla Citas
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Citas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            paciente_id INTEGER NOT NULL,
-            medico_id INTEGER NOT NULL,
-            fecha DATE NOT NULL,
-            hora TIME NOT NULL,
-            estado TEXT CHECK(estado IN ('Pendiente', 'Presente', 'Ausente', 'Cancelada')) DEFAULT 'Pendiente',
-            FOREIGN KEY (paciente_id) REFERENCES Usuarios(id) ON DELETE CASCADE,
-            FOREIGN KEY (medico_id) REFERENCES Medicos(id) ON DELETE CASCADE,
-            UNIQUE (paciente_id, fecha, hora)
-        );
-    """)
-    # Insertar las 5 especialidades fijas si no existen
-    especialidades_fijas = [
-        "Medicina General",
-        "Medicina Familiar",
-        "Odontología",
-        "Obstetricia",
-        "Ginecología"
-    ]
-    for esp in especialidades_fijas:
-        cursor.execute("INSERT OR IGNORE INTO Especialidades (nombre) VALUES (?)", (esp,))
-    conexion.commit()
-    conexion.close()
-    print("✅ Base de datos creada e inicializada exitosamente.")
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def verificar_credenciales(email, password):
-    """Verifica si el usuario existe y la contraseña es correcta."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("SELECT id, tipo_usuario, password FROM Usuarios WHERE email = ?", (email,))
-    usuario = cursor.fetchone()
-    conexion.close()
-    if usuario:
-        user_id, tipo_usuario, hashed_pass = usuario
-        if hashed_pass == hash_password(password):
-            return True, tipo_usuario, user_id
-    return False, None, None
-
-def registrar_usuario_en_bd(tipo_usuario, nombres, apellidos, email, telefono, cedula, password, especialidad=None,
-                            security_q1=None, security_a1=None, security_q2=None, security_a2=None, security_q3=None, security_a3=None,
-                            photo=None):
-    """
-    Inserta un nuevo usuario en la tabla Usuarios, incluyendo las preguntas de seguridad y la fotografía.
-    Si el usuario es Administrador, también se registra en la tabla Medicos con la especialidad dada.
-    Retorna (exito: bool, mensaje: str, user_id: int|None).
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO Usuarios (tipo_usuario, nombres, apellidos, email, telefono, cedula, password,
-                                  security_q1, security_a1, security_q2, security_a2, security_q3, security_a3, photo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (tipo_usuario, nombres, apellidos, email, telefono, cedula, hash_password(password),
-              security_q1, security_a1, security_q2, security_a2, security_q3, security_a3, photo))
-        user_id = cursor.lastrowid
-        if tipo_usuario == "Administrador" and especialidad and especialidad != "Seleccionar":
-            cursor.execute("SELECT id FROM Especialidades WHERE nombre = ?", (especialidad,))
-            esp_id = cursor.fetchone()
-            if esp_id is not None:
-                esp_id = esp_id[0]
-            else:
-                return False, "❌ La especialidad seleccionada no existe.", None
-            cursor.execute("""
-                INSERT INTO Medicos (nombres, apellidos, especialidad_id, telefono, email, usuario_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (nombres, apellidos, esp_id, telefono, email, user_id))
-        conexion.commit()
-        return True, "✅ Usuario registrado correctamente.", user_id
-    except sqlite3.IntegrityError as e:
-        error_msg = str(e)
-        if "Usuarios.email" in error_msg:
-            return False, "❌ El correo ya está registrado.", None
-        elif "Usuarios.cedula" in error_msg:
-            return False, "❌ La cédula ya está registrada.", None
-        elif "Medicos.email" in error_msg:
-            return False, "❌ Ya existe un médico con este correo.", None
-        else:
-            return False, f"❌ Error de integridad: {error_msg}", None
-    finally:
-        conexion.close()
-
-def obtener_usuario(user_id):
-    """Retorna (nombres, apellidos, email, telefono, cedula, tipo_usuario, photo) del usuario."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("""
-        SELECT nombres, apellidos, email, telefono, cedula, tipo_usuario, photo
-        FROM Usuarios
-        WHERE id = ?
-    """, (user_id,))
-    usuario = cursor.fetchone()
-    conexion.close()
-    return usuario
-
-def actualizar_datos_usuario(user_id, nombres, apellidos, email, telefono):
-    """Actualiza en la tabla Usuarios los datos básicos."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("""
-            UPDATE Usuarios 
-            SET nombres = ?, apellidos = ?, email = ?, telefono = ?
-            WHERE id = ?
-        """, (nombres, apellidos, email, telefono, user_id))
-        conexion.commit()
-        return True, "Datos actualizados correctamente."
-    except sqlite3.IntegrityError as e:
-        msg = str(e)
-        if "Usuarios.email" in msg:
-            return False, "Ese correo ya está registrado por otro usuario."
-        return False, f"Error al actualizar datos: {msg}"
-    finally:
-        conexion.close()
-
-def cambiar_contrasena(user_id, old_password, new_password):
-    """Verifica la contraseña actual y actualiza con la nueva (ya validada en la lógica de la interfaz)."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("SELECT password FROM Usuarios WHERE id = ?", (user_id,))
-    row = cursor.fetchone()
-    if not row:
-        conexion.close()
-        return False, "Usuario no encontrado."
-    current_hashed = row[0]
-    if current_hashed != hash_password(old_password):
-        conexion.close()
-        return False, "La contraseña actual no es correcta."
-    try:
-        cursor.execute("UPDATE Usuarios SET password = ? WHERE id = ?", (hash_password(new_password), user_id))
-        conexion.commit()
-        return True, "Contraseña actualizada correctamente."
-    except sqlite3.Error as e:
-        return False, f"Error al cambiar la contraseña: {e}"
-    finally:
-        conexion.close()
-
-def obtener_especialidades():
-    """Obtiene la lista de especialidades existentes."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("SELECT id, nombre FROM Especialidades")
-    especialidades = cursor.fetchall()
-    conexion.close()
-    return especialidades
-
-def obtener_medicos(especialidad_id=None, usuario_id=None):
-    """
-    Obtiene los médicos.
-    Si se pasa un `especialidad_id`, filtra por esa especialidad.
-    Si se pasa un `usuario_id`, retorna solo el médico cuyo usuario_id coincide (para panel de administrador).
-    Si ninguno se pasa, retorna todos los médicos.
-    Retorna [(id, "nombres apellidos"), ...].
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    if usuario_id is not None:
-        cursor.execute("""
-            SELECT id, (nombres || ' ' || apellidos) as nombre_completo
-            FROM Medicos
-            WHERE usuario_id = ?
-        """, (usuario_id,))
-    elif especialidad_id is not None:
-        cursor.execute("""
-            SELECT id, (nombres || ' ' || apellidos) as nombre_completo
-            FROM Medicos
-            WHERE especialidad_id = ?
-        """, (especialidad_id,))
-    else:
-        cursor.execute("""
-            SELECT id, (nombres || ' ' || apellidos) as nombre_completo
-            FROM Medicos
-        """)
-    medicos = cursor.fetchall()
-    conexion.close()
-    return medicos
-
-def obtener_pacientes_de_medico(medico_id):
-    """
-    Retorna la lista de pacientes (Usuarios) que han tenido (o tienen)
-    al menos una cita con el médico dado.
-    Formato: [(paciente_id, "Nombres Apellidos"), ...].
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("""
-        SELECT DISTINCT U.id, (U.nombres || ' ' || U.apellidos) AS nombre_completo
-        FROM Citas C
-        JOIN Usuarios U ON C.paciente_id = U.id
-        WHERE C.medico_id = ?
-        ORDER BY U.apellidos, U.nombres
-    """, (medico_id,))
-    data = cursor.fetchall()
-    conexion.close()
-    return data
-
-def obtener_horarios_disponibles(medico_id, fecha):
-    """Obtiene los horarios disponibles para el médico en la fecha indicada."""
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("""
-        SELECT id, hora FROM Horarios 
-        WHERE medico_id = ? AND fecha = ? AND estado = 'Disponible'
-    """, (medico_id, fecha))
-    horarios = cursor.fetchall()
-    conexion.close()
-    return horarios
-
-def registrar_cita(paciente_id, medico_id, fecha, hora):
-    """
-    Registra la cita del paciente y actualiza el estado del horario a 'Reservado'.
-    Devuelve una tupla (resultado, mensaje).
-    """
-    try:
-        cita_dt = datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M")
-    except Exception:
-        return False, "Formato de fecha u hora inválido."
-    if cita_dt < datetime.now():
-        return False, "No se puede agendar una cita en el pasado."
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO Citas (paciente_id, medico_id, fecha, hora, estado)
-            VALUES (?, ?, ?, ?, 'Pendiente')
-        """, (paciente_id, medico_id, fecha, hora))
-        cursor.execute("""
-            UPDATE Horarios SET estado = 'Reservado'
-            WHERE medico_id = ? AND fecha = ? AND hora = ?
-        """, (medico_id, fecha, hora))
-        conexion.commit()
-        return True, "✅ Cita agendada con éxito."
-    except sqlite3.Error as e:
-        return False, f"❌ Error al registrar la cita: {e}"
-    finally:
-        conexion.close()
-
-def obtener_citas_paciente(user_id):
-    """
-    Retorna una lista de citas para el paciente con id user_id.
-    Cada cita es una tupla: (cita_id, fecha, especialidad, medico, hora, medico_id)
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("""
-        SELECT Citas.id, Citas.fecha, Especialidades.nombre, 
-               Medicos.nombres || ' ' || Medicos.apellidos AS medico, 
-               Citas.hora,
-               Medicos.id as medico_id
-        FROM Citas
-        JOIN Medicos ON Citas.medico_id = Medicos.id
-        JOIN Especialidades ON Medicos.especialidad_id = Especialidades.id
-        WHERE Citas.paciente_id = ?
-    """, (user_id,))
-    citas = cursor.fetchall()
-    conexion.close()
-    return citas
-
-def cancelar_cita(paciente_id, medico_id, fecha, hora):
-    """
-    Cancela la cita del paciente y libera el horario (cambia a 'Disponible').
-    Devuelve (resultado, mensaje).
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("SELECT estado FROM Citas WHERE paciente_id = ? AND medico_id = ? AND fecha = ? AND hora = ?", 
-                       (paciente_id, medico_id, fecha, hora))
-        estado = cursor.fetchone()
-        if estado and estado[0] in ('Presente', 'Ausente'):
-            return False, "No se puede cancelar una cita ya atendida."
-        cursor.execute("""
-            DELETE FROM Citas
-            WHERE paciente_id = ? AND medico_id = ? AND fecha = ? AND hora = ?
-        """, (paciente_id, medico_id, fecha, hora))
-        cursor.execute("""
-            UPDATE Horarios SET estado = 'Disponible'
-            WHERE medico_id = ? AND fecha = ? AND hora = ?
-        """, (medico_id, fecha, hora))
-        conexion.commit()
-        return True, "✅ Cita cancelada exitosamente."
-    except sqlite3.Error as e:
-        return False, f"❌ Error al cancelar la cita: {e}"
-    finally:
-        conexion.close()
-
-def cancelar_cita_por_id(cita_id):
-    """
-    Cancela una cita según su ID (tabla Citas.id).
-    Actualiza el estado a 'Cancelada' y libera el horario (estado = 'Disponible').
-    Devuelve (resultado, mensaje).
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("SELECT paciente_id, medico_id, fecha, hora FROM Citas WHERE id = ?", (cita_id,))
-        row = cursor.fetchone()
-        if not row:
-            conexion.close()
-            return False, "❌ Cita no encontrada."
-        paciente_id, medico_id, fecha, hora = row
-        cursor.execute("UPDATE Citas SET estado = 'Cancelada' WHERE id = ?", (cita_id,))
-        cursor.execute("""
-            UPDATE Horarios 
-            SET estado = 'Disponible'
-            WHERE medico_id = ? AND fecha = ? AND hora = ?
-        """, (medico_id, fecha, hora))
-        conexion.commit()
-        return True, "✅ Cita cancelada exitosamente."
-    except sqlite3.Error as e:
-        return False, f"❌ Error al cancelar la cita: {e}"
-    finally:
-        conexion.close()
-
-def generar_horarios_disponibles(medico_id, fecha):
-    """
-    Genera horarios disponibles (cada 30 minutos) para el médico en la fecha indicada,
-    únicamente si aún no existen registros para esa fecha.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("SELECT COUNT(*) FROM Horarios WHERE medico_id = ? AND fecha = ?", (medico_id, fecha))
-    if cursor.fetchone()[0] > 0:
-        conexion.close()
-        return
-    hora_actual = datetime.strptime("08:00", "%H:%M")
-    hora_fin = datetime.strptime("17:00", "%H:%M")
-    while hora_actual <= hora_fin:
-        cursor.execute("""
-            INSERT INTO Horarios (medico_id, fecha, hora, estado)
-            VALUES (?, ?, ?, 'Disponible')
-        """, (medico_id, fecha, hora_actual.strftime("%H:%M")))
-        hora_actual += timedelta(minutes=30)
-    conexion.commit()
-    conexion.close()
-
-def obtener_todas_citas(fecha=None, medico_id=None):
-    """
-    Retorna todas las citas. Filtra opcionalmente por fecha y/o médico.
-    Devuelve una lista de tuplas: (cita_id, fecha, hora, paciente, medico, estado).
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    query = """
-        SELECT C.id, C.fecha, C.hora,
-               (U.nombres || ' ' || U.apellidos) AS paciente,
-               (M.nombres || ' ' || M.apellidos) AS medico,
-               C.estado
-        FROM Citas C
-        JOIN Usuarios U ON C.paciente_id = U.id
-        JOIN Medicos M ON C.medico_id = M.id
-        WHERE 1=1
-    """
-    params = []
-    if fecha:
-        query += " AND C.fecha = ?"
-        params.append(fecha)
-    if medico_id:
-        query += " AND C.medico_id = ?"
-        params.append(medico_id)
-    query += " ORDER BY C.fecha, C.hora"
-    cursor.execute(query, params)
-    citas = cursor.fetchall()
-    conexion.close()
-    return citas
-
-def editar_cita(cita_id, nueva_fecha, nueva_hora):
-    """
-    Cambia la fecha y hora de la cita, validando que la nueva fecha/hora no sean pasadas.
-    Maneja la liberación del horario anterior y la reserva del nuevo.
-    """
-    try:
-        new_dt = datetime.strptime(f"{nueva_fecha} {nueva_hora}", "%Y-%m-%d %H:%M")
-    except Exception:
-        return False, "Formato de fecha u hora inválido."
-    if new_dt < datetime.now():
-        return False, "No se puede agendar una cita en el pasado."
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("SELECT medico_id, fecha, hora, estado FROM Citas WHERE id = ?", (cita_id,))
-        cita_row = cursor.fetchone()
-        if not cita_row:
-            conexion.close()
-            return False, "Cita no encontrada."
-        med_id, old_fecha, old_hora, estado = cita_row
-        if estado != 'Pendiente':
-            return False, "Solo se pueden editar citas pendientes."
-        cursor.execute("""
-            UPDATE Horarios 
-            SET estado = 'Disponible'
-            WHERE medico_id = ? AND fecha = ? AND hora = ?
-        """, (med_id, old_fecha, old_hora))
-        cursor.execute("""
-            UPDATE Citas 
-            SET fecha = ?, hora = ?
-            WHERE id = ?
-        """, (nueva_fecha, nueva_hora, cita_id))
-        cursor.execute("""
-            UPDATE Horarios
-            SET estado = 'Reservado'
-            WHERE medico_id = ? AND fecha = ? AND hora = ?
-        """, (med_id, nueva_fecha, nueva_hora))
-        conexion.commit()
-        return True, "Cita reagendada correctamente."
-    except sqlite3.IntegrityError as e:
-        return False, f"Error de integridad al editar la cita: {e}"
-    finally:
-        conexion.close()
-
-def atender_cita(cita_id, asistencia):
-    """
-    Marca la cita con la asistencia indicada.
-    La variable 'asistencia' debe ser 'Presente' o 'Ausente'.
-    Solo se pueden atender citas en estado 'Pendiente'.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    try:
-        cursor.execute("SELECT estado FROM Citas WHERE id = ?", (cita_id,))
-        row = cursor.fetchone()
-        if not row:
-            conexion.close()
-            return False, "Cita no encontrada."
-        if row[0] != 'Pendiente':
-            conexion.close()
-            return False, "Solo se pueden atender citas pendientes."
-        cursor.execute("UPDATE Citas SET estado = ? WHERE id = ?", (asistencia, cita_id))
-        conexion.commit()
-        return True, "Cita atendida correctamente."
-    except sqlite3.Error as e:
-        return False, f"Error al atender la cita: {e}"
-    finally:
-        conexion.close()
-
-def registrar_cita_admin(paciente_id, medico_id, fecha, hora):
-    """
-    Agenda una cita a nombre de un paciente (como administrador).
-    Es un alias de registrar_cita.
-    """
-    return registrar_cita(paciente_id, medico_id, fecha, hora)
-
-def obtener_medico_id_por_usuario_id(user_id):
-    """
-    Dado un user_id (Usuarios.id), retorna el id del médico (Medicos.id)
-    donde Medicos.usuario_id = user_id, o None si no existe.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("SELECT id FROM Medicos WHERE usuario_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conexion.close()
-    if row:
-        return row[0]
-    return None
-
-# Si se ejecuta este módulo de forma independiente, se crea la base de datos.
-if __name__ == "__main__":
-    crear_base_de_datos()
+import os
+import sqlite3
+import hashlib
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import disponibilidad_bitmap
+import fotos
+import migraciones
+from cache_datos import CacheLRU, CacheTTL
+from instrumentacion import ConexionInstrumentada
+from pool_conexiones import PoolConexiones
+from tareas_programadas import TareaPeriodica
+
+DB_NAME = "citas_medicas.db"
+TAMANO_POOL = 5
+
+# Perfiles de almacenamiento: PRAGMAs que se aplican a cada conexión nueva.
+# - "por_defecto": WAL, lectores y un escritor concurrentes sin bloquearse.
+# - "seguro": WAL con sincronización completa (más lento, no pierde transacciones ante un corte de luz).
+# - "compatible": diario clásico, para carpetas de red donde WAL no está soportado.
+PERFILES_ALMACENAMIENTO = {
+    "por_defecto": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # 16 MB
+        "mmap_size": 67108864,      # 64 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "seguro": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+    "compatible": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+}
+# El perfil se puede elegir por instalación con la variable de entorno CITAS_PERFIL_BD.
+PERFIL_BD = os.environ.get("CITAS_PERFIL_BD", "por_defecto")
+# De dónde se leen los turnos libres: "horarios" (tabla Horarios) o "bitmap" (DisponibilidadDia, ver
+# disponibilidad_bitmap). Las reservas, cancelaciones y generación de días actualizan siempre las dos.
+BACKENDS_DISPONIBILIDAD = ("horarios", "bitmap")
+BACKEND_DISPONIBILIDAD = os.environ.get("CITAS_DISPONIBILIDAD", "horarios")
+INTERVALO_CHECKPOINT = 300  # segundos
+# Segundos que se sirven de memoria las especialidades y el directorio de médicos (ver cache_datos).
+TTL_DATOS_REFERENCIA = 600
+# Memoria máxima (aproximada) de los perfiles de usuario y de sus fotos guardados en el proceso.
+MAX_BYTES_PERFILES = 2 * 1024 * 1024
+MAX_BYTES_FOTOS = 32 * 1024 * 1024
+
+def conectar_bd():
+    """
+    Conecta a la base de datos SQLite, activa la verificación de claves foráneas
+    y aplica los PRAGMAs del perfil de almacenamiento configurado.
+    Devuelve la conexión. Las conexiones pueden pasar de un hilo a otro a través del pool
+    y sus consultas se pueden medir con el módulo instrumentacion.
+    """
+    perfil = PERFILES_ALMACENAMIENTO.get(PERFIL_BD, PERFILES_ALMACENAMIENTO["por_defecto"])
+    conexion = sqlite3.connect(DB_NAME, check_same_thread=False, timeout=perfil["busy_timeout"] / 1000,
+                               factory=ConexionInstrumentada)
+    conexion.execute("PRAGMA foreign_keys = ON;")
+    for pragma, valor in perfil.items():
+        conexion.execute(f"PRAGMA {pragma} = {valor};")
+    return conexion
+
+pool = PoolConexiones(conectar_bd, tamano=TAMANO_POOL)
+
+def obtener_conexion():
+    """
+    Presta una conexión del pool como administrador de contexto:
+        with obtener_conexion() as conexion:
+            ...
+    Al salir del bloque se hace commit (o rollback ante una excepción) y la conexión se reutiliza.
+    """
+    return pool.conexion()
+
+def configurar_pool(db_name=None, tamano=None, perfil=None, disponibilidad=None):
+    """
+    Cambia la base de datos, el tamaño del pool, el perfil de almacenamiento y/o el origen de los
+    turnos libres ('disponibilidad', uno de BACKENDS_DISPONIBILIDAD).
+    Las conexiones del pool se cierran (las prestadas, al devolverse) para que las siguientes se creen
+    con la nueva configuración.
+    """
+    global DB_NAME, PERFIL_BD, BACKEND_DISPONIBILIDAD, _esquema_verificado
+    if db_name is not None:
+        DB_NAME = db_name
+    if tamano is not None:
+        pool.tamano = tamano
+    if perfil is not None:
+        if perfil not in PERFILES_ALMACENAMIENTO:
+            raise ValueError(f"Perfil de almacenamiento desconocido: {perfil}")
+        PERFIL_BD = perfil
+    if disponibilidad is not None:
+        if disponibilidad not in BACKENDS_DISPONIBILIDAD:
+            raise ValueError(f"Origen de disponibilidad desconocido: {disponibilidad}")
+        BACKEND_DISPONIBILIDAD = disponibilidad
+        _esquema_verificado = False
+    if db_name is not None:
+        _esquema_verificado = False
+        invalidar_datos_referencia()
+        _cache_perfiles.invalidar()
+        _cache_fotos.invalidar()
+    pool.cerrar()
+
+def hacer_checkpoint(modo="PASSIVE"):
+    """
+    Traslada las páginas del archivo WAL a la base de datos principal.
+    Retorna (ocupado, paginas_wal, paginas_trasladadas) o None si la base no está en modo WAL.
+    """
+    with obtener_conexion() as conexion:
+        modo_diario = conexion.execute("PRAGMA journal_mode").fetchone()[0]
+        if modo_diario.lower() != "wal":
+            return None
+        return conexion.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+
+_tarea_checkpoint = None
+
+def iniciar_checkpoints(intervalo=INTERVALO_CHECKPOINT):
+    """
+    Inicia (una sola vez por proceso) la tarea en segundo plano que hace checkpoints periódicos
+    del WAL, para que el archivo -wal no crezca sin límite mientras haya lectores abiertos.
+    """
+    global _tarea_checkpoint
+    if _tarea_checkpoint is None:
+        _tarea_checkpoint = TareaPeriodica("checkpoint_wal", intervalo, hacer_checkpoint)
+    return _tarea_checkpoint.iniciar()
+
+def compactar_bd(max_paginas=None):
+    """
+    Devuelve al sistema hasta 'max_paginas' páginas libres (todas si es None) con PRAGMA incremental_vacuum.
+    Solo tiene efecto si la base usa auto_vacuum incremental (las bases creadas por crear_base_de_datos;
+    las anteriores se convierten una vez con activar_vacuum_incremental).
+    Retorna el número de páginas liberadas, o None si la base no usa auto_vacuum incremental.
+    """
+    with obtener_conexion() as conexion:
+        if conexion.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return None
+        libres = conexion.execute("PRAGMA freelist_count").fetchone()[0]
+        # incremental_vacuum libera una página por paso de la sentencia: executescript la ejecuta completa
+        # (execute solo daría el primer paso).
+        argumento = "" if max_paginas is None else f"({int(max_paginas)})"
+        conexion.executescript(f"PRAGMA incremental_vacuum{argumento};")
+        return libres - conexion.execute("PRAGMA freelist_count").fetchone()[0]
+
+def activar_vacuum_incremental():
+    """
+    Convierte una base existente a auto_vacuum incremental con un VACUUM completo. Reescribe todo el
+    archivo y bloquea las escrituras mientras dura: debe ejecutarse en una ventana de mantenimiento.
+    """
+    with obtener_conexion() as conexion:
+        if conexion.in_transaction:
+            conexion.commit()
+        conexion.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conexion.execute("VACUUM")
+        return conexion.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+_esquema_verificado = False
+
+def crear_base_de_datos():
+    """
+    Crea o actualiza el esquema de la base de datos aplicando las migraciones pendientes
+    (tablas, índices y las 5 especialidades fijas). La verificación se hace una sola vez por proceso;
+    las llamadas siguientes (por ejemplo, al volver a la pantalla de inicio de sesión) no tocan la base.
+    """
+    global _esquema_verificado
+    if _esquema_verificado:
+        return
+    with obtener_conexion() as conexion:
+        aplicadas = migraciones.aplicar_migraciones(conexion)
+        if BACKEND_DISPONIBILIDAD == "bitmap":
+            # Días futuros generados antes de usar este origen (o por otra versión de la aplicación).
+            disponibilidad_bitmap.migrar_desde_horarios(conexion.cursor(), datetime.now().strftime("%Y-%m-%d"))
+    _esquema_verificado = True
+    if aplicadas:
+        print(f"✅ Base de datos actualizada a la versión {aplicadas[-1]}.")
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def verificar_credenciales(email, password):
+    """Verifica si el usuario existe y la contraseña es correcta."""
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT id, tipo_usuario, password FROM Usuarios WHERE email = ?", (email,))
+        usuario = cursor.fetchone()
+    if usuario:
+        user_id, tipo_usuario, hashed_pass = usuario
+        if hashed_pass == hash_password(password):
+            return True, tipo_usuario, user_id
+    return False, None, None
+
+def registrar_usuario_en_bd(tipo_usuario, nombres, apellidos, email, telefono, cedula, password, especialidad=None,
+                            security_q1=None, security_a1=None, security_q2=None, security_a2=None, security_q3=None, security_a3=None,
+                            photo=None):
+    """
+    Inserta un nuevo usuario en la tabla Usuarios, incluyendo las preguntas de seguridad y la fotografía.
+    Si el usuario es Administrador, también se registra en la tabla Medicos con la especialidad dada.
+    'photo' puede ser una fotos.FotoPreparada, los bytes de la imagen o su texto base64; se guarda en
+    la tabla Fotos y Usuarios.photo queda con su hash.
+    Retorna (exito: bool, mensaje: str, user_id: int|None).
+    """
+    # Las variantes se generan antes de abrir la transacción, para no retener el bloqueo de escritura.
+    if photo is not None and not isinstance(photo, fotos.FotoPreparada):
+        photo = fotos.preparar_foto(photo)
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        try:
+            referencia_foto = fotos.guardar_foto(cursor, photo) if photo is not None else None
+            cursor.execute("""
+                INSERT INTO Usuarios (tipo_usuario, nombres, apellidos, email, telefono, cedula, password,
+                                      security_q1, security_a1, security_q2, security_a2, security_q3, security_a3, photo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (tipo_usuario, nombres, apellidos, email, telefono, cedula, hash_password(password),
+                  security_q1, security_a1, security_q2, security_a2, security_q3, security_a3, referencia_foto))
+            user_id = cursor.lastrowid
+            medico_nuevo = False
+            if tipo_usuario == "Administrador" and especialidad and especialidad != "Seleccionar":
+                cursor.execute("SELECT id FROM Especialidades WHERE nombre = ?", (especialidad,))
+                esp_id = cursor.fetchone()
+                if esp_id is not None:
+                    esp_id = esp_id[0]
+                else:
+                    conexion.rollback()
+                    return False, "❌ La especialidad seleccionada no existe.", None
+                cursor.execute("""
+                    INSERT INTO Medicos (nombres, apellidos, especialidad_id, telefono, email, usuario_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (nombres, apellidos, esp_id, telefono, email, user_id))
+                # El médico nuevo tiene horarios de inmediato, sin esperar la pregeneración diaria.
+                hoy = datetime.now().date()
+                generar_horarios_rango(hoy, hoy + timedelta(days=DIAS_PREGENERACION), [cursor.lastrowid])
+                medico_nuevo = True
+        except sqlite3.IntegrityError as e:
+            conexion.rollback()
+            error_msg = str(e)
+            if "Usuarios.email" in error_msg:
+                return False, "❌ El correo ya está registrado.", None
+            elif "Usuarios.cedula" in error_msg:
+                return False, "❌ La cédula ya está registrada.", None
+            elif "Medicos.email" in error_msg:
+                return False, "❌ Ya existe un médico con este correo.", None
+            else:
+                return False, f"❌ Error de integridad: {error_msg}", None
+    # Después del commit: el médico nuevo debe aparecer en los dropdowns de inmediato.
+    if medico_nuevo:
+        invalidar_datos_referencia()
+    return True, "✅ Usuario registrado correctamente.", user_id
+
+def _consultar_perfil(user_id):
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT nombres, apellidos, email, telefono, cedula, tipo_usuario
+            FROM Usuarios
+            WHERE id = ?
+        """, (user_id,))
+        return cursor.fetchone()
+
+def _consultar_foto(clave):
+    user_id, variante = clave
+    with obtener_conexion() as conexion:
+        datos = fotos.consultar_foto_usuario(conexion.cursor(), user_id, variante)
+    return fotos.a_base64(datos) if datos else None
+
+# Perfil (datos livianos) y foto van en cachés separadas: abrir un panel no lee la foto, que puede
+# ocupar cientos de KB, y las fotos no desalojan a los perfiles.
+_cache_perfiles = CacheLRU("perfiles", MAX_BYTES_PERFILES, _consultar_perfil)
+_cache_fotos = CacheLRU("fotos", MAX_BYTES_FOTOS, _consultar_foto)
+
+def invalidar_usuario(user_id):
+    """Descarta el perfil y la foto guardados del usuario (tras modificarlo)."""
+    _cache_perfiles.invalidar(user_id)
+    for variante in fotos.VARIANTES:
+        _cache_fotos.invalidar((user_id, variante))
+
+def obtener_perfil_usuario(user_id):
+    """Retorna (nombres, apellidos, email, telefono, cedula, tipo_usuario) del usuario, sin la foto, o None."""
+    return _cache_perfiles.obtener(user_id)
+
+def obtener_foto_usuario(user_id, variante="original"):
+    """
+    Retorna la foto del usuario en base64 o None. Se carga solo cuando se pide.
+    - variante: "original" o "miniatura" (ver fotos.VARIANTES); si no existe se retorna la original.
+    """
+    return _cache_fotos.obtener((user_id, variante))
+
+LOTE_VARIANTES_FOTOS = 20  # fotos que se procesan por transacción al completar variantes
+
+def _guardar_variantes_tx(conexion, preparadas):
+    cursor = conexion.cursor()
+    for foto in preparadas:
+        fotos.guardar_foto(cursor, foto)
+    return sum(len(foto.variantes) for foto in preparadas)
+
+def completar_variantes_fotos(lote=LOTE_VARIANTES_FOTOS):
+    """
+    Genera las variantes que faltan (miniaturas) de las fotos guardadas solo como "original": las que
+    convirtió la migración 14 y las que se subieron sin Pillow. Sin Pillow no hace nada.
+    Las imágenes se procesan fuera de las transacciones; cada lote se guarda con BEGIN IMMEDIATE.
+    Retorna el número de variantes creadas.
+    """
+    if fotos.Image is None:
+        return 0
+    creadas = 0
+    ultimo = ""
+    while True:
+        with obtener_conexion() as conexion:
+            pendientes = fotos.fotos_sin_variantes(conexion.cursor(), ultimo, lote)
+        if not pendientes:
+            break
+        ultimo = pendientes[-1][0]
+        preparadas = [foto for foto in (fotos.preparar_variantes(h, datos) for h, datos in pendientes)
+                      if foto is not None]
+        if preparadas:
+            creadas += _con_reintentos(_guardar_variantes_tx, preparadas)
+    if creadas:
+        # Las cachés guardaban la original en lugar de las variantes que faltaban.
+        _cache_fotos.invalidar()
+    return creadas
+
+_hilo_variantes_fotos = None
+
+def iniciar_variantes_fotos():
+    """Completa en segundo plano (una sola vez por proceso) las variantes de fotos que falten."""
+    global _hilo_variantes_fotos
+    if _hilo_variantes_fotos is None and fotos.Image is not None:
+        _hilo_variantes_fotos = threading.Thread(target=completar_variantes_fotos, name="variantes_fotos", daemon=True)
+        _hilo_variantes_fotos.start()
+    return _hilo_variantes_fotos
+
+def obtener_usuario(user_id):
+    """Retorna (nombres, apellidos, email, telefono, cedula, tipo_usuario, photo) del usuario."""
+    perfil = obtener_perfil_usuario(user_id)
+    if perfil is None:
+        return None
+    return tuple(perfil) + (obtener_foto_usuario(user_id),)
+
+def actualizar_datos_usuario(user_id, nombres, apellidos, email, telefono):
+    """Actualiza en la tabla Usuarios los datos básicos."""
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        try:
+            cursor.execute("""
+                UPDATE Usuarios 
+                SET nombres = ?, apellidos = ?, email = ?, telefono = ?
+                WHERE id = ?
+            """, (nombres, apellidos, email, telefono, user_id))
+        except sqlite3.IntegrityError as e:
+            conexion.rollback()
+            msg = str(e)
+            if "Usuarios.email" in msg:
+                return False, "Ese correo ya está registrado por otro usuario."
+            return False, f"Error al actualizar datos: {msg}"
+    invalidar_usuario(user_id)
+    return True, "Datos actualizados correctamente."
+
+def cambiar_contrasena(user_id, old_password, new_password):
+    """Verifica la contraseña actual y actualiza con la nueva (ya validada en la lógica de la interfaz)."""
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT password FROM Usuarios WHERE id = ?", (user_id,))
+        row = cursor.fetchone()
+        if not row:
+            return False, "Usuario no encontrado."
+        current_hashed = row[0]
+        if current_hashed != hash_password(old_password):
+            return False, "La contraseña actual no es correcta."
+        try:
+            cursor.execute("UPDATE Usuarios SET password = ? WHERE id = ?", (hash_password(new_password), user_id))
+        except sqlite3.Error as e:
+            conexion.rollback()
+            return False, f"Error al cambiar la contraseña: {e}"
+    invalidar_usuario(user_id)
+    return True, "Contraseña actualizada correctamente."
+
+def _consultar_especialidades(_clave):
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT id, nombre FROM Especialidades")
+        return cursor.fetchall()
+
+def _consultar_medicos(clave):
+    filtro, valor = clave
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        if filtro == "usuario":
+            cursor.execute("""
+                SELECT id, (nombres || ' ' || apellidos) as nombre_completo
+                FROM Medicos
+                WHERE usuario_id = ?
+            """, (valor,))
+        elif filtro == "especialidad":
+            cursor.execute("""
+                SELECT id, (nombres || ' ' || apellidos) as nombre_completo
+                FROM Medicos
+                WHERE especialidad_id = ?
+            """, (valor,))
+        else:
+            cursor.execute("""
+                SELECT id, (nombres || ' ' || apellidos) as nombre_completo
+                FROM Medicos
+            """)
+        return cursor.fetchall()
+
+_cache_especialidades = CacheTTL("especialidades", TTL_DATOS_REFERENCIA, _consultar_especialidades)
+_cache_medicos = CacheTTL("medicos", TTL_DATOS_REFERENCIA, _consultar_medicos)
+
+def invalidar_datos_referencia():
+    """Descarta las especialidades y médicos guardados en memoria (tras registrar o cambiar un médico)."""
+    _cache_especialidades.invalidar()
+    _cache_medicos.invalidar()
+
+def obtener_especialidades():
+    """Obtiene la lista de especialidades existentes (desde memoria si se leyó hace menos de TTL_DATOS_REFERENCIA)."""
+    return list(_cache_especialidades.obtener())
+
+def obtener_medicos(especialidad_id=None, usuario_id=None):
+    """
+    Obtiene los médicos.
+    Si se pasa un `especialidad_id`, filtra por esa especialidad.
+    Si se pasa un `usuario_id`, retorna solo el médico cuyo usuario_id coincide (para panel de administrador).
+    Si ninguno se pasa, retorna todos los médicos.
+    Retorna [(id, "nombres apellidos"), ...]. El resultado se sirve desde memoria (ver TTL_DATOS_REFERENCIA).
+    """
+    if usuario_id is not None:
+        clave = ("usuario", usuario_id)
+    elif especialidad_id is not None:
+        clave = ("especialidad", especialidad_id)
+    else:
+        clave = ("todos", None)
+    return list(_cache_medicos.obtener(clave))
+
+def obtener_pacientes_de_medico(medico_id):
+    """
+    Retorna la lista de pacientes (Usuarios) que han tenido (o tienen)
+    al menos una cita con el médico dado.
+    Formato: [(paciente_id, "Nombres Apellidos"), ...].
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT U.id, (U.nombres || ' ' || U.apellidos) AS nombre_completo
+            FROM Usuarios U
+            WHERE U.id IN (SELECT paciente_id FROM Citas WHERE medico_id = ?)
+            ORDER BY U.apellidos, U.nombres
+        """, (medico_id,))
+        return cursor.fetchall()
+
+def consulta_fts(texto):
+    """
+    Convierte el texto escrito por el usuario en una consulta FTS5 de prefijos: cada palabra debe
+    aparecer como inicio de alguna palabra del nombre, apellidos, cédula o email ("jos per" encuentra
+    "José Pérez"). Retorna None si el texto no tiene palabras.
+    """
+    palabras = re.findall(r"\w+", texto or "")
+    if not palabras:
+        return None
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+def buscar_pacientes(texto, medico_id=None, limite=20):
+    """
+    Busca pacientes por prefijo de nombres, apellidos, cédula o email, sin distinguir acentos ni mayúsculas.
+    Con medico_id solo se consideran los pacientes que han tenido alguna cita con ese médico.
+    Retorna hasta 'limite' resultados ordenados por apellidos: [(paciente_id, "Nombres Apellidos"), ...].
+    """
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+    query = """
+        SELECT U.id, (U.nombres || ' ' || U.apellidos) AS nombre_completo, U.apellidos, U.nombres
+        FROM UsuariosFTS F
+        JOIN Usuarios U ON U.id = F.rowid
+        WHERE UsuariosFTS MATCH ? AND U.tipo_usuario = 'Paciente'
+    """
+    params = [consulta]
+    if medico_id:
+        query += " AND EXISTS (SELECT 1 FROM Citas C WHERE C.paciente_id = U.id AND C.medico_id = ?)"
+        params.append(medico_id)
+    # El orden por apellidos se aplica en Python a los resultados ya limitados: con ORDER BY en SQL,
+    # SQLite tendría que leer todas las coincidencias antes de aplicar el LIMIT.
+    query += " LIMIT ?"
+    params.append(limite)
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute(query, params)
+        filas = cursor.fetchall()
+    filas.sort(key=lambda fila: (fila[2], fila[3]))
+    return [(paciente_id, nombre) for paciente_id, nombre, _, _ in filas]
+
+def obtener_horarios_disponibles(medico_id, fecha):
+    """
+    Obtiene los horarios disponibles para el médico en la fecha indicada: [(id, hora), ...].
+    Con el origen "bitmap" el primer elemento es el índice del turno en el día, no Horarios.id.
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        if BACKEND_DISPONIBILIDAD == "bitmap":
+            horarios = disponibilidad_bitmap.obtener_horarios_disponibles(cursor, medico_id, fecha)
+            if horarios is not None:
+                return horarios
+        cursor.execute("""
+            SELECT id, hora FROM Horarios 
+            WHERE medico_id = ? AND fecha = ? AND estado = 'Disponible'
+        """, (medico_id, fecha))
+        return cursor.fetchall()
+
+def buscar_proxima_disponibilidad(especialidad_id, desde=None, hasta=None, limite=10):
+    """
+    Retorna los primeros 'limite' turnos libres de cualquier médico de la especialidad entre 'desde'
+    (por defecto hoy, descartando las horas ya pasadas) y 'hasta' (por defecto DIAS_PREGENERACION días después).
+    Recorre el índice parcial de turnos disponibles en orden de fecha y hora y se detiene al
+    encontrar 'limite' resultados, sin ordenar todos los turnos libres.
+    Formato: [(horario_id, fecha, hora, medico_id, "Nombres Apellidos"), ...]; con el origen "bitmap"
+    el primer elemento es el índice del turno en el día.
+    """
+    ahora = datetime.now()
+    if desde is None:
+        desde = ahora.date()
+    if hasta is None:
+        hasta = desde + timedelta(days=DIAS_PREGENERACION)
+    desde = desde if isinstance(desde, str) else desde.strftime("%Y-%m-%d")
+    hasta = hasta if isinstance(hasta, str) else hasta.strftime("%Y-%m-%d")
+    hoy = ahora.strftime("%Y-%m-%d")
+    desde = max(desde, hoy)
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        if BACKEND_DISPONIBILIDAD == "bitmap":
+            return disponibilidad_bitmap.buscar_proxima_disponibilidad(cursor, especialidad_id, desde, hasta, limite, ahora)
+        # CROSS JOIN obliga a SQLite a recorrer primero Horarios (en el orden del índice) y así cortar con LIMIT.
+        cursor.execute("""
+            SELECT H.id, H.fecha, H.hora, M.id, (M.nombres || ' ' || M.apellidos) AS medico
+            FROM Horarios H
+            CROSS JOIN Medicos M ON M.id = H.medico_id
+            WHERE H.estado = 'Disponible'
+              AND H.fecha BETWEEN ? AND ?
+              AND (H.fecha > ? OR H.hora > ?)
+              AND M.especialidad_id = ?
+            ORDER BY H.fecha, H.hora
+            LIMIT ?
+        """, (desde, hasta, hoy, ahora.strftime("%H:%M"), especialidad_id, limite))
+        return cursor.fetchall()
+
+REINTENTOS_OCUPADO = 5
+ESPERA_BASE_REINTENTO = 0.05  # segundos; se duplica en cada reintento
+
+def _es_bloqueo(error):
+    """True si el error corresponde a SQLITE_BUSY / SQLITE_LOCKED (otra conexión tiene el bloqueo de escritura)."""
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+class _Deshacer(Exception):
+    """La lanza una función de _con_reintentos para deshacer sus cambios y retornar 'resultado'."""
+
+    def __init__(self, resultado):
+        super().__init__(resultado)
+        self.resultado = resultado
+
+def _en_savepoint(conexion, funcion, *args):
+    """Ejecuta funcion(conexion, *args) dentro de la transacción abierta, deshaciendo solo sus propios cambios."""
+    conexion.execute("SAVEPOINT con_reintentos")
+    try:
+        resultado = funcion(conexion, *args)
+    except BaseException as e:
+        conexion.execute("ROLLBACK TO con_reintentos")
+        conexion.execute("RELEASE con_reintentos")
+        if isinstance(e, _Deshacer):
+            return e.resultado
+        raise
+    conexion.execute("RELEASE con_reintentos")
+    return resultado
+
+def _con_reintentos(funcion, *args):
+    """
+    Ejecuta funcion(conexion, *args) dentro de una transacción BEGIN IMMEDIATE (toma el bloqueo de escritura
+    al inicio, antes de leer). Si la base está ocupada por otro escritor se reintenta con espera exponencial.
+    Si ya hay una transacción abierta en el hilo (llamada anidada) se ejecuta dentro de ella, en un
+    SAVEPOINT y sin reintentos. La función no debe llamar a rollback(): para deshacer sus cambios y
+    retornar un resultado lanza _Deshacer(resultado), que solo revierte lo que ella hizo.
+    """
+    for intento in range(REINTENTOS_OCUPADO):
+        with obtener_conexion() as conexion:
+            if conexion.in_transaction:
+                return _en_savepoint(conexion, funcion, *args)
+            try:
+                conexion.execute("BEGIN IMMEDIATE")
+                return funcion(conexion, *args)
+            except _Deshacer as d:
+                conexion.rollback()
+                return d.resultado
+            except sqlite3.OperationalError as e:
+                conexion.rollback()
+                if not _es_bloqueo(e) or intento == REINTENTOS_OCUPADO - 1:
+                    raise
+        time.sleep(ESPERA_BASE_REINTENTO * (2 ** intento) * (0.5 + random.random()))
+
+def _reservar_horario(cursor, medico_id, fecha, hora):
+    """
+    Reserva el horario solo si sigue 'Disponible' (verificando rowcount), de modo que dos reservas
+    simultáneas del mismo turno no puedan ganar ambas. Si el día del médico aún no tiene horarios,
+    se generan antes. Retorna True si el turno quedó reservado por esta transacción.
+    """
+    cursor.execute("""
+        UPDATE Horarios SET estado = 'Reservado'
+        WHERE medico_id = ? AND fecha = ? AND hora = ? AND estado = 'Disponible'
+    """, (medico_id, fecha, hora))
+    if cursor.rowcount != 1:
+        cursor.execute("SELECT 1 FROM Horarios WHERE medico_id = ? AND fecha = ? LIMIT 1", (medico_id, fecha))
+        if cursor.fetchone():
+            return False
+        generar_horarios_rango(fecha, fecha, [medico_id])
+        cursor.execute("""
+            UPDATE Horarios SET estado = 'Reservado'
+            WHERE medico_id = ? AND fecha = ? AND hora = ? AND estado = 'Disponible'
+        """, (medico_id, fecha, hora))
+        if cursor.rowcount != 1:
+            return False
+    disponibilidad_bitmap.marcar_turno(cursor, medico_id, fecha, hora, True)
+    return True
+
+def _liberar_horario(cursor, medico_id, fecha, hora):
+    """Vuelve a dejar 'Disponible' el horario (al cancelar o mover una cita)."""
+    cursor.execute("""
+        UPDATE Horarios SET estado = 'Disponible'
+        WHERE medico_id = ? AND fecha = ? AND hora = ?
+    """, (medico_id, fecha, hora))
+    if cursor.rowcount:
+        disponibilidad_bitmap.marcar_turno(cursor, medico_id, fecha, hora, False)
+
+def _registrar_cita_tx(conexion, paciente_id, medico_id, fecha, hora):
+    cursor = conexion.cursor()
+    try:
+        if not _reservar_horario(cursor, medico_id, fecha, hora):
+            raise _Deshacer((False, "❌ El horario seleccionado ya no está disponible."))
+        cursor.execute("""
+            INSERT INTO Citas (paciente_id, medico_id, fecha, hora, estado)
+            VALUES (?, ?, ?, ?, 'Pendiente')
+        """, (paciente_id, medico_id, fecha, hora))
+        return True, "✅ Cita agendada con éxito."
+    except sqlite3.IntegrityError as e:
+        if "Citas.medico_id" in str(e):
+            raise _Deshacer((False, "❌ El horario seleccionado ya no está disponible."))
+        raise _Deshacer((False, f"❌ Error al registrar la cita: {e}"))
+
+def registrar_cita(paciente_id, medico_id, fecha, hora):
+    """
+    Registra la cita del paciente y reserva el horario en una sola transacción.
+    El horario se reserva solo si seguía 'Disponible'; si otra persona lo tomó antes, no se crea la cita.
+    Devuelve una tupla (resultado, mensaje).
+    """
+    try:
+        cita_dt = datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M")
+    except Exception:
+        return False, "Formato de fecha u hora inválido."
+    if cita_dt < datetime.now():
+        return False, "No se puede agendar una cita en el pasado."
+    try:
+        return _con_reintentos(_registrar_cita_tx, paciente_id, medico_id, fecha, hora)
+    except sqlite3.Error as e:
+        return False, f"❌ Error al registrar la cita: {e}"
+
+def obtener_citas_paciente(user_id):
+    """
+    Retorna una lista de citas para el paciente con id user_id.
+    Cada cita es una tupla: (cita_id, fecha, especialidad, medico, hora, medico_id)
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT Citas.id, Citas.fecha, Especialidades.nombre, 
+                   Medicos.nombres || ' ' || Medicos.apellidos AS medico, 
+                   Citas.hora,
+                   Medicos.id as medico_id
+            FROM Citas
+            JOIN Medicos ON Citas.medico_id = Medicos.id
+            JOIN Especialidades ON Medicos.especialidad_id = Especialidades.id
+            WHERE Citas.paciente_id = ?
+        """, (user_id,))
+        return cursor.fetchall()
+
+def obtener_citas_paciente_mes(user_id, year, month, meses=1):
+    """
+    Igual que obtener_citas_paciente, pero solo las citas pendientes desde el mes indicado y los 'meses'
+    siguientes (por defecto solo ese mes), ordenadas por fecha y hora. Las atendidas o canceladas no se
+    incluyen: el calendario ofrece cancelar cada cita que muestra. Usa idx_citas_paciente_fecha en vez de
+    leer todo el historial del paciente.
+    """
+    desde = f"{year:04d}-{month:02d}-01"
+    year_fin, month_fin = divmod(year * 12 + month - 1 + meses, 12)
+    hasta = f"{year_fin:04d}-{month_fin + 1:02d}-01"
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT Citas.id, Citas.fecha, Especialidades.nombre,
+                   Medicos.nombres || ' ' || Medicos.apellidos AS medico,
+                   Citas.hora,
+                   Medicos.id as medico_id
+            FROM Citas
+            JOIN Medicos ON Citas.medico_id = Medicos.id
+            JOIN Especialidades ON Medicos.especialidad_id = Especialidades.id
+            WHERE Citas.paciente_id = ? AND Citas.fecha >= ? AND Citas.fecha < ?
+              AND Citas.estado = 'Pendiente'
+            ORDER BY Citas.fecha, Citas.hora
+        """, (user_id, desde, hasta))
+        return cursor.fetchall()
+
+def _cancelar_cita_tx(conexion, paciente_id, medico_id, fecha, hora):
+    cursor = conexion.cursor()
+    # Solo una cita pendiente retiene el turno; si ya estaba cancelada, el turno puede ser de otra cita.
+    cursor.execute("""
+        DELETE FROM Citas
+        WHERE paciente_id = ? AND medico_id = ? AND fecha = ? AND hora = ? AND estado = 'Pendiente'
+    """, (paciente_id, medico_id, fecha, hora))
+    if cursor.rowcount != 1:
+        cursor.execute("SELECT estado FROM Citas WHERE paciente_id = ? AND medico_id = ? AND fecha = ? AND hora = ?",
+                       (paciente_id, medico_id, fecha, hora))
+        estados = {fila[0] for fila in cursor.fetchall()}
+        if estados & {'Presente', 'Ausente'}:
+            return False, "No se puede cancelar una cita ya atendida."
+        return False, "❌ La cita ya no está pendiente."
+    _liberar_horario(cursor, medico_id, fecha, hora)
+    return True, "✅ Cita cancelada exitosamente."
+
+def cancelar_cita(paciente_id, medico_id, fecha, hora):
+    """
+    Cancela la cita pendiente del paciente y libera el horario (cambia a 'Disponible'), en una sola
+    transacción. Si la cita ya no estaba pendiente no se libera nada.
+    Devuelve (resultado, mensaje).
+    """
+    try:
+        return _con_reintentos(_cancelar_cita_tx, paciente_id, medico_id, fecha, hora)
+    except sqlite3.Error as e:
+        return False, f"❌ Error al cancelar la cita: {e}"
+
+def _cancelar_cita_por_id_tx(conexion, cita_id):
+    cursor = conexion.cursor()
+    cursor.execute("""
+        UPDATE Citas SET estado = 'Cancelada'
+        WHERE id = ? AND estado = 'Pendiente'
+        RETURNING medico_id, fecha, hora
+    """, (cita_id,))
+    filas = cursor.fetchall()
+    if not filas:
+        cursor.execute("SELECT 1 FROM Citas WHERE id = ?", (cita_id,))
+        if cursor.fetchone() is None:
+            return False, "❌ Cita no encontrada."
+        return False, "❌ La cita ya no está pendiente."
+    _liberar_horario(cursor, *filas[0])
+    return True, "✅ Cita cancelada exitosamente."
+
+def cancelar_cita_por_id(cita_id):
+    """
+    Cancela una cita pendiente según su ID (tabla Citas.id).
+    Actualiza el estado a 'Cancelada' y libera el horario (estado = 'Disponible'), en una sola
+    transacción. Si la cita ya no estaba pendiente no se libera nada.
+    Devuelve (resultado, mensaje).
+    """
+    try:
+        return _con_reintentos(_cancelar_cita_por_id_tx, cita_id)
+    except sqlite3.Error as e:
+        return False, f"❌ Error al cancelar la cita: {e}"
+
+def _horas_jornada(hora_inicio, hora_fin, duracion_minutos):
+    """Lista de horas 'HH:MM' desde hora_inicio hasta hora_fin (inclusive) cada duracion_minutos."""
+    h, m = map(int, hora_inicio.split(":"))
+    inicio = h * 60 + m
+    h, m = map(int, hora_fin.split(":"))
+    fin = h * 60 + m
+    return [f"{minuto // 60:02d}:{minuto % 60:02d}" for minuto in range(inicio, fin + 1, duracion_minutos)]
+
+def configurar_jornada(medico_id, hora_inicio="08:00", hora_fin="17:00", duracion_minutos=30):
+    """
+    Define el horario de trabajo y la duración de cada turno del médico.
+    Solo afecta a los días que aún no tienen horarios generados.
+    """
+    with obtener_conexion() as conexion:
+        conexion.execute("""
+            INSERT INTO Jornadas (medico_id, hora_inicio, hora_fin, duracion_minutos)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(medico_id) DO UPDATE SET
+                hora_inicio = excluded.hora_inicio,
+                hora_fin = excluded.hora_fin,
+                duracion_minutos = excluded.duracion_minutos
+        """, (medico_id, hora_inicio, hora_fin, duracion_minutos))
+
+def generar_horarios_rango(desde, hasta, medico_ids=None):
+    """
+    Genera en una sola transacción los horarios 'Disponible' de varios médicos entre las fechas
+    'desde' y 'hasta' (inclusive, 'YYYY-MM-DD' o date), según la jornada de cada médico
+    (por defecto de 08:00 a 17:00 cada 30 minutos).
+    Los días que ya tienen horarios para un médico no se modifican.
+    Si medico_ids es None se generan para todos los médicos. Retorna el número de horarios creados.
+    """
+    desde = desde if isinstance(desde, str) else desde.strftime("%Y-%m-%d")
+    hasta = hasta if isinstance(hasta, str) else hasta.strftime("%Y-%m-%d")
+    dia_inicio = datetime.strptime(desde, "%Y-%m-%d")
+    num_dias = (datetime.strptime(hasta, "%Y-%m-%d") - dia_inicio).days + 1
+    fechas = [(dia_inicio + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(num_dias)]
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        if medico_ids is None:
+            cursor.execute("""
+                SELECT M.id, J.hora_inicio, J.hora_fin, J.duracion_minutos
+                FROM Medicos M
+                LEFT JOIN Jornadas J ON J.medico_id = M.id
+            """)
+        else:
+            marcadores = ", ".join("?" for _ in medico_ids)
+            cursor.execute(f"""
+                SELECT M.id, J.hora_inicio, J.hora_fin, J.duracion_minutos
+                FROM Medicos M
+                LEFT JOIN Jornadas J ON J.medico_id = M.id
+                WHERE M.id IN ({marcadores})
+            """, list(medico_ids))
+        jornadas = cursor.fetchall()
+        filas = []
+        dias_nuevos = []
+        for medico_id, hora_inicio, hora_fin, duracion in jornadas:
+            cursor.execute("""
+                SELECT DISTINCT fecha FROM Horarios
+                WHERE medico_id = ? AND fecha BETWEEN ? AND ?
+            """, (medico_id, desde, hasta))
+            con_horarios = {fila[0] for fila in cursor.fetchall()}
+            horas = _horas_jornada(hora_inicio or "08:00", hora_fin or "17:00", duracion or 30)
+            for fecha in fechas:
+                if fecha not in con_horarios:
+                    filas.extend((medico_id, fecha, hora) for hora in horas)
+                    dias_nuevos.append((medico_id, fecha, horas))
+        cursor.executemany("""
+            INSERT OR IGNORE INTO Horarios (medico_id, fecha, hora, estado)
+            VALUES (?, ?, ?, 'Disponible')
+        """, filas)
+        disponibilidad_bitmap.generar_dias(cursor, dias_nuevos)
+        return len(filas)
+
+def generar_horarios_disponibles(medico_id, fecha):
+    """
+    Genera horarios disponibles para el médico en la fecha indicada,
+    únicamente si aún no existen registros para esa fecha.
+    """
+    return generar_horarios_rango(fecha, fecha, [medico_id])
+
+DIAS_PREGENERACION = 90
+INTERVALO_PREGENERACION = 24 * 60 * 60  # segundos
+
+def pregenerar_horarios(dias=DIAS_PREGENERACION):
+    """Genera los horarios de todos los médicos desde hoy hasta 'dias' días en el futuro."""
+    hoy = datetime.now().date()
+    return generar_horarios_rango(hoy, hoy + timedelta(days=dias))
+
+_tarea_pregeneracion = None
+
+def iniciar_pregeneracion_horarios(dias=DIAS_PREGENERACION, intervalo=INTERVALO_PREGENERACION):
+    """
+    Inicia (una sola vez por proceso) la tarea diaria que mantiene generados los horarios de los
+    próximos 'dias' días, para que las pantallas solo lean horarios y nunca escriban al consultarlos.
+    La primera generación se hace en segundo plano al iniciar.
+    """
+    global _tarea_pregeneracion
+    if _tarea_pregeneracion is None:
+        _tarea_pregeneracion = TareaPeriodica("pregeneracion_horarios", intervalo, pregenerar_horarios, dias)
+        threading.Thread(target=_tarea_pregeneracion.ejecutar_ahora, daemon=True).start()
+    return _tarea_pregeneracion.iniciar()
+
+def _patron_like(texto):
+    """Patrón LIKE que busca 'texto' literal (escapando % y _) en cualquier posición."""
+    return "%" + texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def _filtros_citas(fecha=None, medico_id=None, estados=None, desde=None, hasta=None, busqueda=None, cita_id=None):
+    """Condiciones WHERE (sobre Citas C y Medicos M) y parámetros de los filtros de obtener_todas_citas."""
+    condiciones = []
+    params = []
+    if cita_id:
+        condiciones.append("C.id = ?")
+        params.append(cita_id)
+    if fecha:
+        condiciones.append("C.fecha = ?")
+        params.append(fecha)
+    if desde:
+        condiciones.append("C.fecha >= ?")
+        params.append(desde)
+    if hasta:
+        condiciones.append("C.fecha <= ?")
+        params.append(hasta)
+    if medico_id:
+        condiciones.append("C.medico_id = ?")
+        params.append(medico_id)
+    if estados is not None:
+        estados = list(estados)
+        condiciones.append(f"C.estado IN ({', '.join('?' * len(estados))})" if estados else "0")
+        params.extend(estados)
+    if busqueda and busqueda.strip():
+        # Pacientes por el índice de texto completo; médicos (pocos) por LIKE sobre el nombre.
+        condiciones.append("""(C.paciente_id IN (SELECT rowid FROM UsuariosFTS WHERE UsuariosFTS MATCH ?)
+                      OR (M.nombres || ' ' || M.apellidos) LIKE ? ESCAPE '\\')""")
+        params.extend([consulta_fts(busqueda) or '""', _patron_like(busqueda.strip())])
+    return condiciones, params
+
+def obtener_todas_citas(fecha=None, medico_id=None, estados=None, desde=None, hasta=None,
+                        busqueda=None, despues_de=None, limite=None, cita_id=None, antes_de=None):
+    """
+    Retorna las citas ordenadas por fecha, hora e id. Todos los filtros son opcionales:
+    - fecha: un día exacto; desde/hasta: rango de fechas (inclusive).
+    - medico_id: citas de un médico; estados: colección de estados aceptados.
+    - busqueda: prefijos del nombre, cédula o email del paciente (ver buscar_pacientes) o texto del nombre del médico.
+    - despues_de: cursor (fecha, hora, id) de la última cita de la página anterior; limite: tamaño de página.
+    - antes_de: cursor (fecha, hora, id) de la primera cita mostrada; con limite retorna las últimas
+      'limite' citas anteriores a ella (en el mismo orden ascendente), para volver hacia atrás.
+    - cita_id: solo esa cita (si además cumple los demás filtros).
+    Devuelve una lista de tuplas: (cita_id, fecha, hora, paciente, medico, estado).
+    La siguiente página se pide con despues_de=(fila[1], fila[2], fila[0]) de la última fila recibida.
+    """
+    condiciones, params = _filtros_citas(fecha, medico_id, estados, desde, hasta, busqueda, cita_id)
+    if despues_de:
+        condiciones.append("(C.fecha, C.hora, C.id) > (?, ?, ?)")
+        params.extend(despues_de)
+    if antes_de:
+        condiciones.append("(C.fecha, C.hora, C.id) < (?, ?, ?)")
+        params.extend(antes_de)
+    query = """
+        SELECT C.id, C.fecha, C.hora,
+               (U.nombres || ' ' || U.apellidos) AS paciente,
+               (M.nombres || ' ' || M.apellidos) AS medico,
+               C.estado
+        FROM Citas C
+        JOIN Usuarios U ON C.paciente_id = U.id
+        JOIN Medicos M ON C.medico_id = M.id
+        WHERE 1=1
+    """ + "".join(f" AND {condicion}" for condicion in condiciones)
+    orden = "DESC" if antes_de else "ASC"
+    query += f" ORDER BY C.fecha {orden}, C.hora {orden}, C.id {orden}"
+    if limite:
+        query += " LIMIT ?"
+        params.append(limite)
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute(query, params)
+        filas = cursor.fetchall()
+    if antes_de:
+        filas.reverse()
+    return filas
+
+def contar_citas(fecha=None, medico_id=None, estados=None, desde=None, hasta=None, busqueda=None):
+    """Número de citas que retornaría obtener_todas_citas con los mismos filtros (sin paginar)."""
+    condiciones, params = _filtros_citas(fecha, medico_id, estados, desde, hasta, busqueda)
+    # Medicos solo hace falta para buscar por el nombre del médico; sin él, el conteo sale del índice.
+    query = "SELECT COUNT(*) FROM Citas C"
+    if busqueda and busqueda.strip():
+        query += " JOIN Medicos M ON C.medico_id = M.id"
+    query += " WHERE 1=1" + "".join(f" AND {condicion}" for condicion in condiciones)
+    with obtener_conexion() as conexion:
+        return conexion.execute(query, params).fetchone()[0]
+
+def _editar_cita_tx(conexion, cita_id, nueva_fecha, nueva_hora):
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT medico_id, fecha, hora, estado FROM Citas WHERE id = ?", (cita_id,))
+        cita_row = cursor.fetchone()
+        if not cita_row:
+            return False, "Cita no encontrada."
+        med_id, old_fecha, old_hora, estado = cita_row
+        if estado != 'Pendiente':
+            return False, "Solo se pueden editar citas pendientes."
+        if (old_fecha, old_hora) == (nueva_fecha, nueva_hora):
+            return True, "Cita reagendada correctamente."
+        if not _reservar_horario(cursor, med_id, nueva_fecha, nueva_hora):
+            raise _Deshacer((False, "El horario seleccionado ya no está disponible."))
+        _liberar_horario(cursor, med_id, old_fecha, old_hora)
+        cursor.execute("""
+            UPDATE Citas 
+            SET fecha = ?, hora = ?
+            WHERE id = ?
+        """, (nueva_fecha, nueva_hora, cita_id))
+        return True, "Cita reagendada correctamente."
+    except sqlite3.IntegrityError as e:
+        raise _Deshacer((False, f"Error de integridad al editar la cita: {e}"))
+
+def editar_cita(cita_id, nueva_fecha, nueva_hora):
+    """
+    Cambia la fecha y hora de la cita, validando que la nueva fecha/hora no sean pasadas.
+    Reserva el nuevo horario solo si sigue disponible y libera el anterior, en una sola transacción.
+    """
+    try:
+        new_dt = datetime.strptime(f"{nueva_fecha} {nueva_hora}", "%Y-%m-%d %H:%M")
+    except Exception:
+        return False, "Formato de fecha u hora inválido."
+    if new_dt < datetime.now():
+        return False, "No se puede agendar una cita en el pasado."
+    try:
+        return _con_reintentos(_editar_cita_tx, cita_id, nueva_fecha, nueva_hora)
+    except sqlite3.Error as e:
+        return False, f"Error al editar la cita: {e}"
+
+def atender_cita(cita_id, asistencia):
+    """
+    Marca la cita con la asistencia indicada.
+    La variable 'asistencia' debe ser 'Presente' o 'Ausente'.
+    Solo se pueden atender citas en estado 'Pendiente'.
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        try:
+            cursor.execute("SELECT estado FROM Citas WHERE id = ?", (cita_id,))
+            row = cursor.fetchone()
+            if not row:
+                return False, "Cita no encontrada."
+            if row[0] != 'Pendiente':
+                return False, "Solo se pueden atender citas pendientes."
+            cursor.execute("UPDATE Citas SET estado = ? WHERE id = ?", (asistencia, cita_id))
+            return True, "Cita atendida correctamente."
+        except sqlite3.Error as e:
+            conexion.rollback()
+            return False, f"Error al atender la cita: {e}"
+
+def registrar_cita_admin(paciente_id, medico_id, fecha, hora):
+    """
+    Agenda una cita a nombre de un paciente (como administrador).
+    Es un alias de registrar_cita.
+    """
+    return registrar_cita(paciente_id, medico_id, fecha, hora)
+
+def obtener_medico_id_por_usuario_id(user_id):
+    """
+    Dado un user_id (Usuarios.id), retorna el id del médico (Medicos.id)
+    donde Medicos.usuario_id = user_id, o None si no existe.
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT id FROM Medicos WHERE usuario_id = ?", (user_id,))
+        row = cursor.fetchone()
+    if row:
+        return row[0]
+    return None
+
+# Si se ejecuta este módulo de forma independiente, se crea la base de datos.
+if __name__ == "__main__":
+    crear_base_de_datos()
\ No newline at end of file
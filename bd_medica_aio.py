@@ -0,0 +1,172 @@
+"""
+Versión asíncrona (asyncio) de las funciones públicas de bd_medica y de las notificaciones.
+Las llamadas no abren un hilo por sesión: se encolan para un grupo pequeño y fijo de hilos dedicados a
+la base (HILOS_BD_AIO), que usan el pool de conexiones de bd_medica, y el resultado vuelve al loop que
+las pidió. Cada loop puede tener como máximo LIMITE_EN_CURSO solicitudes pendientes; las siguientes
+esperan (sin bloquear el loop) a que se libere un lugar.
+
+Uso, desde un manejador async de Flet o un servidor HTTP:
+    import bd_medica_aio
+    horarios = await bd_medica_aio.obtener_horarios_disponibles(medico_id, "2030-01-01")
+    ok, mensaje = await bd_medica_aio.registrar_cita(paciente_id, medico_id, fecha, hora)
+Cualquier otra función se puede ejecutar igual con: await bd_medica_aio.ejecutar(funcion, *args).
+"""
+import asyncio
+import functools
+import os
+import queue
+import threading
+import traceback
+import weakref
+
+import bd_medica
+import notificaciones_paciente
+
+# Hilos dedicados a la base: con WAL las lecturas avanzan en paralelo y las escrituras se serializan
+# en SQLite de todos modos, así que pocos hilos bastan.
+HILOS_BD_AIO = int(os.environ.get("CITAS_HILOS_AIO", "2"))
+# Solicitudes pendientes por loop antes de que ejecutar() empiece a esperar.
+LIMITE_EN_CURSO = int(os.environ.get("CITAS_LIMITE_AIO", "256"))
+
+
+class PuenteBD:
+    """Hilos dedicados que ejecutan funciones bloqueantes y entregan el resultado a futuros de asyncio."""
+
+    def __init__(self, hilos=HILOS_BD_AIO, limite=LIMITE_EN_CURSO):
+        self.hilos = hilos
+        self.limite = limite
+        self._cola = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._trabajadores = []
+        self._semaforos = weakref.WeakKeyDictionary()  # loop -> asyncio.Semaphore
+        self._contadores = {"ejecutadas": 0, "fallidas": 0, "descartadas": 0}
+
+    def _iniciar(self):
+        with self._lock:
+            if self._trabajadores:
+                return
+            for i in range(self.hilos):
+                hilo = threading.Thread(target=self._ciclo, name=f"bd-aio-{i}", daemon=True)
+                hilo.start()
+                self._trabajadores.append(hilo)
+
+    def _ciclo(self):
+        while True:
+            solicitud = self._cola.get()
+            if solicitud is None:
+                return
+            loop, futuro, funcion, args, kwargs = solicitud
+            if futuro.cancelled():
+                # Quien la pidió ya no espera el resultado (por ejemplo, se cerró la sesión).
+                self._contar("descartadas")
+                continue
+            try:
+                resultado = funcion(*args, **kwargs)
+            except BaseException as e:
+                self._contar("fallidas")
+                self._entregar(loop, futuro, None, e)
+            else:
+                self._contar("ejecutadas")
+                self._entregar(loop, futuro, resultado, None)
+
+    def _contar(self, clave):
+        with self._lock:
+            self._contadores[clave] += 1
+
+    @staticmethod
+    def _entregar(loop, futuro, resultado, error):
+        def fijar():
+            if futuro.cancelled():
+                return
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(resultado)
+        try:
+            loop.call_soon_threadsafe(fijar)
+        except RuntimeError:
+            # El loop ya se cerró: no hay a quién entregar el resultado.
+            if error is not None:
+                traceback.print_exception(error)
+
+    def _semaforo(self, loop):
+        with self._lock:
+            semaforo = self._semaforos.get(loop)
+            if semaforo is None:
+                semaforo = self._semaforos[loop] = asyncio.Semaphore(self.limite)
+            return semaforo
+
+    async def ejecutar(self, funcion, *args, **kwargs):
+        """Ejecuta funcion(*args, **kwargs) en un hilo de la base y retorna su resultado."""
+        self._iniciar()
+        loop = asyncio.get_running_loop()
+        async with self._semaforo(loop):
+            futuro = loop.create_future()
+            self._cola.put((loop, futuro, funcion, args, kwargs))
+            return await futuro
+
+    def metricas(self):
+        with self._lock:
+            return dict(self._contadores, hilos=len(self._trabajadores), en_cola=self._cola.qsize())
+
+    def detener(self):
+        """Termina los hilos cuando acaben lo que ya tienen en la cola."""
+        with self._lock:
+            trabajadores, self._trabajadores = self._trabajadores, []
+        for _ in trabajadores:
+            self._cola.put(None)
+        for hilo in trabajadores:
+            hilo.join()
+
+
+puente = PuenteBD()
+
+
+async def ejecutar(funcion, *args, **kwargs):
+    return await puente.ejecutar(funcion, *args, **kwargs)
+
+
+def _asincrona(funcion):
+    """Envoltura async de una función bloqueante, con el mismo nombre y documentación."""
+    @functools.wraps(funcion)
+    async def envoltura(*args, **kwargs):
+        return await puente.ejecutar(funcion, *args, **kwargs)
+    return envoltura
+
+
+# Autenticación y usuarios
+verificar_credenciales = _asincrona(bd_medica.verificar_credenciales)
+obtener_usuario = _asincrona(bd_medica.obtener_usuario)
+obtener_perfil_usuario = _asincrona(bd_medica.obtener_perfil_usuario)
+obtener_foto_usuario = _asincrona(bd_medica.obtener_foto_usuario)
+buscar_pacientes = _asincrona(bd_medica.buscar_pacientes)
+
+# Médicos y disponibilidad
+obtener_especialidades = _asincrona(bd_medica.obtener_especialidades)
+obtener_medicos = _asincrona(bd_medica.obtener_medicos)
+obtener_horarios_disponibles = _asincrona(bd_medica.obtener_horarios_disponibles)
+buscar_proxima_disponibilidad = _asincrona(bd_medica.buscar_proxima_disponibilidad)
+
+# Citas
+registrar_cita = _asincrona(bd_medica.registrar_cita)
+editar_cita = _asincrona(bd_medica.editar_cita)
+cancelar_cita = _asincrona(bd_medica.cancelar_cita)
+cancelar_cita_por_id = _asincrona(bd_medica.cancelar_cita_por_id)
+atender_cita = _asincrona(bd_medica.atender_cita)
+obtener_todas_citas = _asincrona(bd_medica.obtener_todas_citas)
+contar_citas = _asincrona(bd_medica.contar_citas)
+obtener_citas_paciente = _asincrona(bd_medica.obtener_citas_paciente)
+obtener_citas_paciente_mes = _asincrona(bd_medica.obtener_citas_paciente_mes)
+
+# Notificaciones
+generar_notificaciones = _asincrona(notificaciones_paciente.generar_notificaciones)
+contar_no_leidas = _asincrona(notificaciones_paciente.contar_no_leidas)
+obtener_notificaciones = _asincrona(notificaciones_paciente.obtener_notificaciones)
+marcar_notificacion_leida = _asincrona(notificaciones_paciente.marcar_notificacion_leida)
+marcar_todas_leidas = _asincrona(notificaciones_paciente.marcar_todas_leidas)
+eliminar_notificacion = _asincrona(notificaciones_paciente.eliminar_notificacion)
+eliminar_notificaciones = _asincrona(notificaciones_paciente.eliminar_notificaciones)
+
+
+def metricas():
+    return puente.metricas()
@@ -0,0 +1,5 @@
+"""
+Benchmarks de la base de datos de citas médicas.
+Se ejecutan desde la carpeta del proyecto, por ejemplo:
+    python -m benchmarks.contencion_reservas
+"""
@@ -0,0 +1,62 @@
+"""
+Benchmark de la cola de envíos.
+Encola recordatorios para muchas citas en los canales app y sms (el SMS simulado no hace E/S) y mide
+cuánto tarda programar_recordatorios en encolarlos y los trabajadores en entregarlos.
+
+Uso:
+    python -m benchmarks.cola_envios [--escala pequena] [--lote 100]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import bd_medica
+import cola_notificaciones
+import notificaciones_paciente
+from benchmarks import datos_sinteticos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", default="pequena", choices=sorted(datos_sinteticos.ESCALAS))
+    parser.add_argument("--lote", type=int, default=cola_notificaciones.TAMANO_LOTE)
+    args = parser.parse_args(argv)
+
+    ruta = os.path.join(tempfile.mkdtemp(), "cola.db")
+    datos_sinteticos.generar(ruta, **datos_sinteticos.ESCALAS[args.escala])
+    canales = ["app", "sms"]
+    # Una ventana que abarca todos los días futuros: una fila por cita pendiente y canal.
+    ventana = [("recordatorio_benchmark", 0, 24 * 60 * 365, "(benchmark)")]
+
+    inicio = time.perf_counter()
+    creados = notificaciones_paciente.programar_recordatorios(
+        ahora=datetime.now() + timedelta(days=365), ventanas=ventana, canales=canales)
+    encolado = time.perf_counter() - inicio
+
+    trabajadores = {nombre: cola_notificaciones.TrabajadorCola(cola_notificaciones._canales[nombre], args.lote)
+                    for nombre in canales}
+    inicio = time.perf_counter()
+    for trabajador in trabajadores.values():
+        while trabajador.procesar_lote():
+            pass
+    entrega = time.perf_counter() - inicio
+
+    total = sum(t.enviados for t in trabajadores.values())
+    print(json.dumps({
+        "citas": creados["recordatorio_benchmark"],
+        "envios": total,
+        "encolado_ms": round(encolado * 1000, 1),
+        "entrega_s": round(entrega, 3),
+        "envios_por_segundo": round(total / entrega, 1) if entrega else None,
+        "por_canal": {nombre: t.metricas() for nombre, t in trabajadores.items()},
+    }, ensure_ascii=False, indent=2))
+    bd_medica.pool.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
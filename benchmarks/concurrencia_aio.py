@@ -0,0 +1,143 @@
+"""
+Benchmark de concurrencia: ruta síncrona contra bd_medica_aio.
+Simula N sesiones que hacen cada una K consultas típicas de la interfaz (horarios de un médico, página de
+citas, notificaciones) y, opcionalmente, reservas. La ruta síncrona usa un hilo por sesión; la asíncrona,
+una corrutina por sesión sobre un solo loop y los hilos dedicados de bd_medica_aio.
+
+Uso:
+    python -m benchmarks.concurrencia_aio [--escala pequena] [--sesiones 10 100 500] [--consultas 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import bd_medica
+import bd_medica_aio
+import notificaciones_paciente
+from benchmarks import datos_sinteticos
+
+
+def _datos(azar, sesiones, consultas):
+    """Plan de consultas por sesión: lista de (nombre, argumentos) para cada una."""
+    with bd_medica.obtener_conexion() as conexion:
+        medicos = [fila[0] for fila in conexion.execute("SELECT id FROM Medicos")]
+        pacientes = [fila[0] for fila in conexion.execute("SELECT id FROM Usuarios WHERE tipo_usuario = 'Paciente'")]
+    fechas = [date.fromordinal(date.today().toordinal() + d).isoformat() for d in range(1, 15)]
+    planes = []
+    for _ in range(sesiones):
+        paciente = azar.choice(pacientes)
+        plan = []
+        for _ in range(consultas):
+            opcion = azar.random()
+            if opcion < 0.4:
+                plan.append(("obtener_horarios_disponibles", (azar.choice(medicos), azar.choice(fechas)), {}))
+            elif opcion < 0.7:
+                plan.append(("obtener_todas_citas", (), {"medico_id": azar.choice(medicos), "estados": ["Pendiente"], "limite": 50}))
+            elif opcion < 0.9:
+                plan.append(("obtener_notificaciones", (paciente,), {"limit": 30}))
+            else:
+                plan.append(("contar_no_leidas", (paciente,), {}))
+        planes.append(plan)
+    return planes
+
+
+_SINCRONAS = {
+    "obtener_horarios_disponibles": bd_medica.obtener_horarios_disponibles,
+    "obtener_todas_citas": bd_medica.obtener_todas_citas,
+    "obtener_notificaciones": notificaciones_paciente.obtener_notificaciones,
+    "contar_no_leidas": notificaciones_paciente.contar_no_leidas,
+}
+
+
+def _resumen(latencias, total, hilos):
+    latencias.sort()
+
+    def percentil(p):
+        return round(latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))] * 1000, 3)
+
+    return {
+        "consultas": len(latencias),
+        "total_s": round(total, 3),
+        "consultas_por_segundo": round(len(latencias) / total, 1),
+        "p50_ms": percentil(50),
+        "p95_ms": percentil(95),
+        "p99_ms": percentil(99),
+        "hilos_max": hilos,
+    }
+
+
+def ruta_sincrona(planes):
+    """Un hilo por sesión, como hacen hoy los manejadores síncronos de Flet."""
+    latencias = []
+    lock = threading.Lock()
+    hilos_max = [threading.active_count()]
+
+    def sesion(plan):
+        propias = []
+        for nombre, args, kwargs in plan:
+            inicio = time.perf_counter()
+            _SINCRONAS[nombre](*args, **kwargs)
+            propias.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(propias)
+            hilos_max[0] = max(hilos_max[0], threading.active_count())
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(planes)) as pool:
+        list(pool.map(sesion, planes))
+    return _resumen(latencias, time.perf_counter() - inicio, hilos_max[0])
+
+
+def ruta_asincrona(planes):
+    """Una corrutina por sesión sobre un solo loop."""
+    latencias = []
+
+    async def sesion(plan):
+        for nombre, args, kwargs in plan:
+            inicio = time.perf_counter()
+            await getattr(bd_medica_aio, nombre)(*args, **kwargs)
+            latencias.append(time.perf_counter() - inicio)
+
+    async def todas():
+        await asyncio.gather(*(sesion(plan) for plan in planes))
+
+    inicio = time.perf_counter()
+    asyncio.run(todas())
+    return _resumen(latencias, time.perf_counter() - inicio, threading.active_count())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", default="pequena", choices=sorted(datos_sinteticos.ESCALAS))
+    parser.add_argument("--sesiones", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--consultas", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    ruta = os.path.join(tempfile.mkdtemp(), "concurrencia.db")
+    datos_sinteticos.generar(ruta, semilla=args.semilla, **datos_sinteticos.ESCALAS[args.escala])
+    azar = random.Random(args.semilla)
+    resultado = {"hilos_bd_aio": bd_medica_aio.HILOS_BD_AIO, "tamano_pool": bd_medica.pool.tamano, "sesiones": {}}
+    for sesiones in args.sesiones:
+        planes = _datos(azar, sesiones, args.consultas)
+        sincrona = ruta_sincrona(planes)
+        asincrona = ruta_asincrona(planes)
+        resultado["sesiones"][sesiones] = {"sincrona": sincrona, "asincrona": asincrona}
+        print(f"[{sesiones} sesiones] sync {sincrona['consultas_por_segundo']} c/s ({sincrona['hilos_max']} hilos)  "
+              f"async {asincrona['consultas_por_segundo']} c/s ({asincrona['hilos_max']} hilos)")
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    bd_medica_aio.puente.detener()
+    bd_medica.pool.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark de contención de reservas.
+Varios procesos intentan reservar al mismo tiempo los mismos turnos con registrar_cita y al final se
+verifica que ningún turno quedó con dos citas activas y que los horarios reservados coinciden con las citas.
+
+Uso:
+    python -m benchmarks.contencion_reservas [--procesos 8] [--intentos 300] [--medicos 2] [--dias 3]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import bd_medica
+
+
+def preparar_base(ruta, num_medicos, num_dias, num_pacientes):
+    bd_medica.configurar_pool(db_name=ruta)
+    bd_medica.crear_base_de_datos()
+    with bd_medica.obtener_conexion() as conexion:
+        conexion.executemany("""
+            INSERT INTO Medicos (nombres, apellidos, especialidad_id, telefono, email)
+            VALUES (?, ?, 1, '0999999999', ?)
+        """, [("Medico", str(i), f"medico{i}@bench.local") for i in range(num_medicos)])
+        conexion.executemany("""
+            INSERT INTO Usuarios (tipo_usuario, nombres, apellidos, email, telefono, cedula, password)
+            VALUES ('Paciente', 'Paciente', ?, ?, '0999999999', ?, 'x')
+        """, [(str(i), f"paciente{i}@bench.local", f"{i:010d}") for i in range(num_pacientes)])
+    manana = date.today() + timedelta(days=1)
+    bd_medica.generar_horarios_rango(manana, manana + timedelta(days=num_dias - 1))
+    with bd_medica.obtener_conexion() as conexion:
+        medicos = [fila[0] for fila in conexion.execute("SELECT id FROM Medicos")]
+        pacientes = [fila[0] for fila in conexion.execute("SELECT id FROM Usuarios")]
+        turnos = conexion.execute("SELECT medico_id, fecha, hora FROM Horarios").fetchall()
+    return medicos, pacientes, turnos
+
+
+def trabajador(ruta, pacientes, turnos, intentos, semilla, resultados):
+    bd_medica.configurar_pool(db_name=ruta)
+    azar = random.Random(semilla)
+    exitos = rechazos = errores = 0
+    inicio = time.perf_counter()
+    for _ in range(intentos):
+        medico_id, fecha, hora = azar.choice(turnos)
+        ok, mensaje = bd_medica.registrar_cita(azar.choice(pacientes), medico_id, fecha, hora)
+        if ok:
+            exitos += 1
+        elif "no está disponible" in mensaje or "UNIQUE" in mensaje:
+            rechazos += 1
+        else:
+            errores += 1
+    resultados.put({"exitos": exitos, "rechazos": rechazos, "errores": errores,
+                    "segundos": time.perf_counter() - inicio})
+
+
+def verificar(ruta):
+    """Retorna (turnos con más de una cita activa, diferencia entre horarios reservados y citas activas)."""
+    bd_medica.configurar_pool(db_name=ruta)
+    with bd_medica.obtener_conexion() as conexion:
+        dobles = conexion.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM Citas WHERE estado != 'Cancelada'
+                GROUP BY medico_id, fecha, hora HAVING COUNT(*) > 1
+            )
+        """).fetchone()[0]
+        reservados = conexion.execute("SELECT COUNT(*) FROM Horarios WHERE estado = 'Reservado'").fetchone()[0]
+        activas = conexion.execute("SELECT COUNT(*) FROM Citas WHERE estado != 'Cancelada'").fetchone()[0]
+    return dobles, reservados - activas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--procesos", type=int, default=8)
+    parser.add_argument("--intentos", type=int, default=300, help="reservas que intenta cada proceso")
+    parser.add_argument("--medicos", type=int, default=2)
+    parser.add_argument("--dias", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    ruta = os.path.join(tempfile.mkdtemp(), "contencion.db")
+    num_pacientes = args.procesos * args.intentos
+    _, pacientes, turnos = preparar_base(ruta, args.medicos, args.dias, num_pacientes)
+    bd_medica.pool.cerrar()
+
+    resultados = multiprocessing.Queue()
+    procesos = [
+        multiprocessing.Process(target=trabajador, args=(ruta, pacientes, turnos, args.intentos, i, resultados))
+        for i in range(args.procesos)
+    ]
+    inicio = time.perf_counter()
+    for proceso in procesos:
+        proceso.start()
+    parciales = [resultados.get() for _ in procesos]
+    for proceso in procesos:
+        proceso.join()
+    duracion = time.perf_counter() - inicio
+
+    dobles, descuadre = verificar(ruta)
+    total = args.procesos * args.intentos
+    resumen = {
+        "procesos": args.procesos,
+        "intentos": total,
+        "turnos": len(turnos),
+        "exitos": sum(p["exitos"] for p in parciales),
+        "rechazos": sum(p["rechazos"] for p in parciales),
+        "errores": sum(p["errores"] for p in parciales),
+        "reservas_por_segundo": round(total / duracion, 1),
+        "turnos_con_doble_reserva": dobles,
+        "descuadre_horarios_citas": descuadre,
+    }
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    return 0 if dobles == 0 and descuadre == 0 and resumen["errores"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+Crea una base con N pacientes, M médicos repartidos en las 5 especialidades fijas, los horarios de
+un rango de días (pasados y futuros), citas en una fracción de esos horarios y notificaciones.
+Todos los pacientes tienen la contraseña CLAVE_PACIENTES.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import bd_medica
+import disponibilidad_bitmap
+
+CLAVE_PACIENTES = "Clave@123"
+
+# Escalas predefinidas: pacientes, médicos, días de historial y días futuros con horarios.
+ESCALAS = {
+    "pequena": {"pacientes": 500, "medicos": 10, "dias_pasados": 60, "dias_futuros": 30},
+    "mediana": {"pacientes": 5000, "medicos": 50, "dias_pasados": 365, "dias_futuros": 90},
+    "grande": {"pacientes": 50000, "medicos": 200, "dias_pasados": 730, "dias_futuros": 90},
+}
+
+NOMBRES = ["José", "María", "Luis", "Ana", "Carlos", "Lucía", "Andrés", "Sofía", "Jorge", "Valentina",
+           "Diego", "Camila", "Mateo", "Isabel", "Julián", "Gabriela", "Pedro", "Daniela", "Raúl", "Paola"]
+APELLIDOS = ["Pérez", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Ramírez", "Torres",
+             "Flores", "Rivera", "Gómez", "Díaz", "Cruz", "Morales", "Reyes", "Gutiérrez", "Ortiz", "Chávez"]
+
+
+def generar(ruta, pacientes, medicos, dias_pasados, dias_futuros, ocupacion=0.6, semilla=1):
+    """
+    Crea (o completa) la base en 'ruta' con los datos sintéticos y deja el pool apuntando a ella.
+    'ocupacion' es la fracción de horarios que tienen una cita. Retorna el número de filas por tabla.
+    """
+    azar = random.Random(semilla)
+    bd_medica.configurar_pool(db_name=ruta)
+    bd_medica.crear_base_de_datos()
+    clave = bd_medica.hash_password(CLAVE_PACIENTES)
+    hoy = date.today()
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    with bd_medica.obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.executemany("""
+            INSERT INTO Usuarios (tipo_usuario, nombres, apellidos, email, telefono, cedula, password)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ("Paciente" if i < pacientes else "Administrador",
+             f"{azar.choice(NOMBRES)} {azar.choice(NOMBRES)}",
+             f"{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}",
+             f"usuario{i}@sintetico.local", f"09{i:08d}", f"{i:010d}", clave)
+            for i in range(pacientes + medicos)
+        ))
+        cursor.execute("SELECT id FROM Especialidades ORDER BY id")
+        especialidades = [fila[0] for fila in cursor.fetchall()]
+        cursor.execute("SELECT id, nombres, apellidos, email, telefono FROM Usuarios WHERE tipo_usuario = 'Administrador'")
+        cursor.executemany("""
+            INSERT INTO Medicos (nombres, apellidos, especialidad_id, telefono, email, usuario_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(n, a, especialidades[i % len(especialidades)], t, e, uid)
+              for i, (uid, n, a, e, t) in enumerate(cursor.fetchall())])
+        cursor.execute("SELECT id FROM Usuarios WHERE tipo_usuario = 'Paciente'")
+        ids_pacientes = [fila[0] for fila in cursor.fetchall()]
+
+    bd_medica.generar_horarios_rango(hoy - timedelta(days=dias_pasados), hoy + timedelta(days=dias_futuros))
+
+    with bd_medica.obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT id, medico_id, fecha, hora FROM Horarios")
+        citas = []
+        reservados = []
+        ocupados = set()
+        for horario_id, medico_id, fecha, hora in cursor.fetchall():
+            if azar.random() >= ocupacion:
+                continue
+            paciente_id = azar.choice(ids_pacientes)
+            if (paciente_id, fecha, hora) in ocupados:
+                continue
+            ocupados.add((paciente_id, fecha, hora))
+            if f"{fecha} {hora}" < ahora:
+                estado = azar.choices(["Presente", "Ausente", "Cancelada"], [80, 12, 8])[0]
+            else:
+                estado = azar.choices(["Pendiente", "Cancelada"], [95, 5])[0]
+            citas.append((paciente_id, medico_id, fecha, hora, estado))
+            if estado != "Cancelada":
+                reservados.append((horario_id,))
+        cursor.executemany("""
+            INSERT INTO Citas (paciente_id, medico_id, fecha, hora, estado)
+            VALUES (?, ?, ?, ?, ?)
+        """, citas)
+        cursor.executemany("UPDATE Horarios SET estado = 'Reservado' WHERE id = ?", reservados)
+        # Las reservas se marcaron directo en Horarios: DisponibilidadDia se vuelve a armar desde ahí.
+        cursor.execute("DELETE FROM DisponibilidadDia")
+        disponibilidad_bitmap.migrar_desde_horarios(cursor)
+        # Bienvenida para todos los pacientes y un recordatorio (ya leído) por cada cita atendida.
+        cursor.executemany("""
+            INSERT INTO Notificaciones (usuario_id, message, leido) VALUES (?, 'Bienvenido a la aplicación de citas médicas.', 1)
+        """, [(pid,) for pid in ids_pacientes])
+        cursor.execute("""
+            INSERT INTO Notificaciones (usuario_id, cita_id, tipo, message, leido, fecha)
+            SELECT paciente_id, id, 'recordatorio_24h',
+                   'Tienes una cita agendada para el ' || fecha || ' a las ' || hora || ' en 24 horas.',
+                   1, datetime(fecha || ' ' || hora, '-1 day')
+            FROM Citas WHERE estado IN ('Presente', 'Ausente')
+        """)
+        cursor.execute("ANALYZE")
+        conteos = {}
+        for tabla in ("Usuarios", "Medicos", "Horarios", "Citas", "Notificaciones"):
+            conteos[tabla] = cursor.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+    return conteos
@@ -0,0 +1,122 @@
+"""
+Benchmark del recorrido de Usuarios antes y después de mover las fotos a la tabla Fotos.
+Crea una base sintética, le pone a una fracción de los usuarios una foto PNG en base64 dentro de
+Usuarios.photo (como quedaban las bases anteriores a la migración 14), mide recorridos completos de la
+tabla, aplica la migración de fotos y vuelve a medir. Las dos mediciones se hacen tras un VACUUM, con una
+conexión propia sin mmap y con la caché de páginas por defecto de SQLite (2 MB).
+
+Uso:
+    python -m benchmarks.escaneo_usuarios [--escala pequena] [--con-foto 0.8] [--lado 200]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+import bd_medica
+import fotos
+import migraciones
+from benchmarks import datos_sinteticos
+
+# Consultas que recorren Usuarios completa (NOT INDEXED obliga a leer la tabla y no un índice).
+RECORRIDOS = {
+    "contar_por_telefono": "SELECT COUNT(*) FROM Usuarios NOT INDEXED WHERE telefono LIKE '%7%'",
+    "listar_perfiles": "SELECT id, nombres, apellidos, email, tipo_usuario FROM Usuarios NOT INDEXED",
+}
+
+
+def _png(ancho, alto, azar):
+    """PNG RGB de ruido (no se comprime, como una foto), sin depender de Pillow."""
+    filas = b"".join(b"\x00" + azar.randbytes(ancho * 3) for _ in range(alto))
+
+    def bloque(tipo, datos):
+        return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+
+    cabecera = struct.pack(">IIBBBBB", ancho, alto, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + bloque(b"IHDR", cabecera) + bloque(b"IDAT", zlib.compress(filas, 1))
+            + bloque(b"IEND", b""))
+
+
+def _paginas(conexion, tabla):
+    """
+    {tipo de página: cantidad} de la tabla, o None si SQLite no tiene la tabla virtual dbstat.
+    Un recorrido lee las páginas 'internal' y 'leaf'; las 'overflow' solo si pide la columna desbordada.
+    """
+    try:
+        return dict(conexion.execute(
+            "SELECT pagetype, COUNT(*) FROM dbstat WHERE name = ? GROUP BY pagetype", (tabla,)).fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+
+def medir(ruta, repeticiones):
+    conexion = sqlite3.connect(ruta)
+    try:
+        conexion.execute("VACUUM")
+        conexion.execute("PRAGMA mmap_size = 0")
+        conexion.execute("PRAGMA cache_size = -2000")
+        resultado = {
+            "tamano_archivo_kb": round(os.path.getsize(ruta) / 1024, 1),
+            "paginas_usuarios": _paginas(conexion, "Usuarios"),
+            "paginas_fotos": _paginas(conexion, "Fotos"),
+        }
+        for nombre, sql in RECORRIDOS.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                conexion.execute(sql).fetchall()
+                tiempos.append(time.perf_counter() - inicio)
+            tiempos.sort()
+            resultado[f"{nombre}_ms"] = round(tiempos[len(tiempos) // 2] * 1000, 3)
+        return resultado
+    finally:
+        conexion.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", default="pequena", choices=sorted(datos_sinteticos.ESCALAS))
+    parser.add_argument("--con-foto", type=float, default=0.8, help="fracción de usuarios con foto")
+    parser.add_argument("--lado", type=int, default=200, help="ancho y alto en píxeles de las fotos")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    ruta = os.path.join(tempfile.mkdtemp(), "usuarios.db")
+    datos_sinteticos.generar(ruta, semilla=args.semilla, **datos_sinteticos.ESCALAS[args.escala])
+    azar = random.Random(args.semilla)
+    with bd_medica.obtener_conexion() as conexion:
+        ids = [fila[0] for fila in conexion.execute("SELECT id FROM Usuarios")]
+        con_foto = azar.sample(ids, int(len(ids) * args.con_foto))
+        conexion.executemany("UPDATE Usuarios SET photo = ? WHERE id = ?",
+                             ((fotos.a_base64(_png(args.lado, args.lado, azar)), user_id) for user_id in con_foto))
+    bd_medica.pool.cerrar()
+    antes = medir(ruta, args.repeticiones)
+
+    inicio = time.perf_counter()
+    with bd_medica.obtener_conexion() as conexion:
+        migraciones._m014_almacen_fotos(conexion.cursor())
+    migracion = time.perf_counter() - inicio
+    bd_medica.pool.cerrar()
+    despues = medir(ruta, args.repeticiones)
+
+    print(json.dumps({
+        "usuarios": len(ids),
+        "con_foto": len(con_foto),
+        "migracion_s": round(migracion, 3),
+        "antes": antes,
+        "despues": despues,
+        "aceleracion": {nombre: round(antes[f"{nombre}_ms"] / despues[f"{nombre}_ms"], 1)
+                        for nombre in RECORRIDOS if despues[f"{nombre}_ms"]},
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
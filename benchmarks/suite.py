@@ -0,0 +1,173 @@
+"""
+Suite de benchmarks de bd_medica.
+Genera una base sintética por escala y mide las operaciones más frecuentes. El resultado es un JSON
+con el commit actual, para comparar entre versiones.
+
+Uso:
+    python -m benchmarks.suite [--escalas pequena mediana] [--repeticiones 200] [--salida resultados.json]
+    python -m benchmarks.suite --comparar anterior.json nuevo.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import bd_medica
+import notificaciones_paciente
+from benchmarks import datos_sinteticos
+
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(bd_medica.__file__)),
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir(funcion, argumentos):
+    """Ejecuta funcion(*args) para cada tupla de 'argumentos' y retorna las estadísticas en milisegundos."""
+    tiempos = []
+    for args in argumentos:
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+
+    def percentil(p):
+        return round(tiempos[min(len(tiempos) - 1, int(p / 100 * len(tiempos)))], 4)
+
+    return {
+        "n": len(tiempos),
+        "media_ms": round(sum(tiempos) / len(tiempos), 4),
+        "p50_ms": percentil(50),
+        "p95_ms": percentil(95),
+        "p99_ms": percentil(99),
+    }
+
+
+def _muestras(sql, n, azar):
+    with bd_medica.obtener_conexion() as conexion:
+        filas = conexion.execute(sql).fetchall()
+    return [azar.choice(filas) for _ in range(n)] if filas else []
+
+
+def operaciones(repeticiones, azar):
+    """(nombre, función, lista de argumentos). Las operaciones de escritura van al final."""
+    pacientes = _muestras("SELECT id, email FROM Usuarios WHERE tipo_usuario = 'Paciente'", repeticiones, azar)
+    medicos = _muestras("SELECT id FROM Medicos", repeticiones, azar)
+    with bd_medica.obtener_conexion() as conexion:
+        libres = conexion.execute("""
+            SELECT medico_id, fecha, hora FROM Horarios
+            WHERE estado = 'Disponible' AND fecha > date('now', 'localtime')
+        """).fetchall()
+        pendientes = conexion.execute("SELECT id FROM Citas WHERE estado = 'Pendiente'").fetchall()
+    libres = azar.sample(libres, min(repeticiones, len(libres)))
+    pendientes = azar.sample(pendientes, min(repeticiones, len(pendientes)))
+    hoy = datetime.now()
+    return [
+        ("verificar_credenciales", bd_medica.verificar_credenciales,
+         [(email, datos_sinteticos.CLAVE_PACIENTES) for _, email in pacientes]),
+        ("obtener_todas_citas", lambda m: bd_medica.obtener_todas_citas(medico_id=m), medicos),
+        ("obtener_todas_citas_pagina", lambda m: bd_medica.obtener_todas_citas(
+            medico_id=m, estados=["Presente", "Ausente", "Cancelada"], limite=50), medicos),
+        ("obtener_citas_paciente", bd_medica.obtener_citas_paciente, [(pid,) for pid, _ in pacientes]),
+        ("obtener_citas_paciente_mes", bd_medica.obtener_citas_paciente_mes,
+         [(pid, hoy.year, hoy.month) for pid, _ in pacientes]),
+        ("obtener_medicos(especialidad)", lambda e: bd_medica.obtener_medicos(especialidad_id=e),
+         [(azar.randint(1, 5),) for _ in range(repeticiones)]),
+        ("buscar_pacientes", bd_medica.buscar_pacientes,
+         [(azar.choice(datos_sinteticos.NOMBRES)[:azar.randint(1, 5)],) for _ in range(repeticiones)]),
+        ("generar_notificaciones_citas", notificaciones_paciente.generar_notificaciones_citas,
+         [(pid,) for pid, _ in pacientes]),
+        ("registrar_cita", bd_medica.registrar_cita,
+         [(azar.choice(pacientes)[0], m, f, h) for m, f, h in libres]),
+        ("cancelar_cita_por_id", bd_medica.cancelar_cita_por_id, pendientes),
+    ]
+
+
+def ejecutar_escala(nombre, parametros, repeticiones, directorio, semilla):
+    ruta = os.path.join(directorio, f"bench_{nombre}.db")
+    inicio = time.perf_counter()
+    filas = datos_sinteticos.generar(ruta, semilla=semilla, **parametros)
+    generacion = time.perf_counter() - inicio
+    azar = random.Random(semilla)
+    resultados = {}
+    for operacion, funcion, argumentos in operaciones(repeticiones, azar):
+        if argumentos:
+            resultados[operacion] = medir(funcion, argumentos)
+            print(f"  {operacion:<30} p50={resultados[operacion]['p50_ms']:.3f} ms  "
+                  f"p95={resultados[operacion]['p95_ms']:.3f} ms")
+    bd_medica.pool.cerrar()
+    return {"parametros": parametros, "filas": filas, "generacion_s": round(generacion, 2),
+            "operaciones": resultados}
+
+
+def comparar(anterior, nuevo):
+    """Imprime la variación de p50 y p95 de cada operación entre dos archivos de resultados."""
+    with open(anterior, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(nuevo, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{a.get('commit')} -> {b.get('commit')}")
+    for escala, datos in b["escalas"].items():
+        if escala not in a["escalas"]:
+            continue
+        print(f"[{escala}]")
+        for operacion, medidas in datos["operaciones"].items():
+            previas = a["escalas"][escala]["operaciones"].get(operacion)
+            if not previas:
+                continue
+            cambios = []
+            for clave in ("p50_ms", "p95_ms"):
+                base = previas[clave] or 1e-9
+                cambios.append(f"{clave[:3]} {previas[clave]:.3f} -> {medidas[clave]:.3f} ({(medidas[clave] / base - 1) * 100:+.0f}%)")
+            print(f"  {operacion:<30} " + "  ".join(cambios))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", nargs="+", default=["pequena"], choices=sorted(datos_sinteticos.ESCALAS))
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto se imprime)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTERIOR", "NUEVO"))
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return 0
+
+    directorio = tempfile.mkdtemp()
+    resultado = {
+        "commit": _commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "escalas": {},
+    }
+    for escala in args.escalas:
+        print(f"[{escala}] generando datos...")
+        resultado["escalas"][escala] = ejecutar_escala(
+            escala, datos_sinteticos.ESCALAS[escala], args.repeticiones, directorio, args.semilla)
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f"Resultados guardados en {args.salida}")
+    else:
+        print(texto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
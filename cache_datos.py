@@ -0,0 +1,191 @@
+"""
+Cachés en memoria del proceso para datos que se leen mucho y cambian poco.
+
+CacheTTL guarda el resultado de cargar(clave) durante 'ttl' segundos (lectura a través de la caché:
+si la clave no está o venció, se consulta y se guarda). invalidar() descarta una clave o todas; una
+carga que empezó antes de invalidar no se guarda, para no volver a dejar el dato viejo.
+El ttl acota cuánto tarda en verse un cambio hecho por otro proceso que comparte la base.
+
+CacheLRU funciona igual pero sin vencimiento y con un límite de memoria: cuando el tamaño estimado de
+los valores supera 'max_bytes' se descartan los usados hace más tiempo. Sirve para datos por usuario
+(perfiles, fotos), que solo cambian a través de funciones que la invalidan.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_TODAS = object()
+
+
+class _Invalidaciones:
+    """
+    Recuerda qué claves se invalidaron mientras había cargas en curso, para que esas cargas no guarden
+    el dato viejo. Solo se conservan las invalidaciones posteriores al inicio de la carga en curso más
+    antigua: las demás ya no afectan a nadie, así el registro no crece con el número de claves.
+    No tiene lock propio: se usa bajo el lock de la caché.
+    """
+
+    def __init__(self):
+        self._numero = 0
+        self._invalidada_en = {}  # clave -> número de invalidación
+        self._cargas = {}  # número al iniciar -> cargas en curso que empezaron con ese número
+
+    def iniciar_carga(self):
+        self._cargas[self._numero] = self._cargas.get(self._numero, 0) + 1
+        return self._numero
+
+    def terminar_carga(self, clave, inicio):
+        """
+        Da por terminada la carga de 'clave' que empezó en 'inicio' (el número que retornó iniciar_carga).
+        Retorna True si nadie invalidó la clave mientras tanto, es decir, si el valor puede guardarse.
+        """
+        vigente = max(self._invalidada_en.get(clave, 0), self._invalidada_en.get(_TODAS, 0)) <= inicio
+        self._cargas[inicio] -= 1
+        if not self._cargas[inicio]:
+            del self._cargas[inicio]
+            self._podar()
+        return vigente
+
+    def invalidar(self, clave):
+        self._numero += 1
+        if not self._cargas:
+            return
+        if clave is _TODAS:
+            self._invalidada_en.clear()
+        self._invalidada_en[clave] = self._numero
+
+    def _podar(self):
+        if not self._cargas:
+            self._invalidada_en.clear()
+            return
+        mas_antigua = min(self._cargas)
+        for clave in [c for c, numero in self._invalidada_en.items() if numero <= mas_antigua]:
+            del self._invalidada_en[clave]
+
+
+class CacheTTL:
+    def __init__(self, nombre, ttl, cargar):
+        """
+        - nombre: para las métricas y los mensajes.
+        - ttl: segundos que un valor se considera vigente.
+        - cargar(clave): función que obtiene el valor de la base.
+        """
+        self.nombre = nombre
+        self.ttl = ttl
+        self.cargar = cargar
+        self._valores = {}  # clave -> (momento de carga, valor)
+        self._invalidaciones = _Invalidaciones()
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+
+    def obtener(self, clave=None):
+        ahora = time.monotonic()
+        with self._lock:
+            guardado = self._valores.get(clave)
+            if guardado is not None and ahora - guardado[0] < self.ttl:
+                self._aciertos += 1
+                return guardado[1]
+            self._fallos += 1
+            inicio = self._invalidaciones.iniciar_carga()
+        try:
+            valor = self.cargar(clave)
+        except Exception:
+            with self._lock:
+                self._invalidaciones.terminar_carga(clave, inicio)
+            raise
+        with self._lock:
+            if self._invalidaciones.terminar_carga(clave, inicio):
+                self._valores[clave] = (ahora, valor)
+        return valor
+
+    def invalidar(self, clave=_TODAS):
+        """Descarta 'clave' (o todas si no se indica); la siguiente lectura vuelve a la base."""
+        with self._lock:
+            self._invalidaciones.invalidar(clave)
+            if clave is _TODAS:
+                self._valores.clear()
+            else:
+                self._valores.pop(clave, None)
+
+    def metricas(self):
+        with self._lock:
+            return {"nombre": self.nombre, "claves": len(self._valores),
+                    "aciertos": self._aciertos, "fallos": self._fallos}
+
+
+def tamano_aproximado(valor):
+    """Bytes aproximados de un valor: textos y bytes por su longitud, tuplas y listas por sus elementos."""
+    if isinstance(valor, (str, bytes)):
+        return sys.getsizeof(valor)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    def __init__(self, nombre, max_bytes, cargar, medir=tamano_aproximado):
+        """
+        - max_bytes: tamaño total aproximado que se conserva en memoria.
+        - cargar(clave): función que obtiene el valor de la base.
+        - medir(valor): bytes que ocupa un valor.
+        """
+        self.nombre = nombre
+        self.max_bytes = max_bytes
+        self.cargar = cargar
+        self.medir = medir
+        self._valores = OrderedDict()  # clave -> (valor, bytes); el último es el más reciente
+        self._bytes = 0
+        self._invalidaciones = _Invalidaciones()
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+        self._descartados = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            guardado = self._valores.get(clave)
+            if guardado is not None:
+                self._valores.move_to_end(clave)
+                self._aciertos += 1
+                return guardado[0]
+            self._fallos += 1
+            inicio = self._invalidaciones.iniciar_carga()
+        try:
+            valor = self.cargar(clave)
+            tamano = self.medir(valor)
+        except Exception:
+            with self._lock:
+                self._invalidaciones.terminar_carga(clave, inicio)
+            raise
+        with self._lock:
+            vigente = self._invalidaciones.terminar_carga(clave, inicio)
+            # Un valor más grande que toda la caché no se guarda: desalojaría todo lo demás.
+            if vigente and tamano <= self.max_bytes:
+                anterior = self._valores.pop(clave, None)
+                if anterior is not None:
+                    self._bytes -= anterior[1]
+                self._valores[clave] = (valor, tamano)
+                self._bytes += tamano
+                while self._bytes > self.max_bytes:
+                    _, (_, liberados) = self._valores.popitem(last=False)
+                    self._bytes -= liberados
+                    self._descartados += 1
+        return valor
+
+    def invalidar(self, clave=_TODAS):
+        with self._lock:
+            self._invalidaciones.invalidar(clave)
+            if clave is _TODAS:
+                self._valores.clear()
+                self._bytes = 0
+            else:
+                anterior = self._valores.pop(clave, None)
+                if anterior is not None:
+                    self._bytes -= anterior[1]
+
+    def metricas(self):
+        with self._lock:
+            return {"nombre": self.nombre, "claves": len(self._valores), "bytes": self._bytes,
+                    "aciertos": self._aciertos, "fallos": self._fallos, "descartados": self._descartados}
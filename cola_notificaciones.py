@@ -0,0 +1,351 @@
+"""
+Cola persistente de envíos de notificaciones por varios canales.
+Los emisores (por ejemplo notificaciones_paciente.programar_recordatorios) encolan en ColaEnvios una fila
+por mensaje y canal; un hilo trabajador por canal toma lotes de envíos pendientes, los entrega y los marca
+como enviados, o los reprograma con espera exponencial si fallan (hasta MAX_INTENTOS, después quedan
+como 'Fallido').
+
+Canales incluidos:
+- app: inserta la notificación en Notificaciones (la que el paciente ve en la campanita).
+- email: envía por SMTP a CITAS_SMTP_HOST:CITAS_SMTP_PUERTO (por defecto localhost:1025, un servidor
+  local de pruebas como `python -m aiosmtpd -n -l localhost:1025`).
+- sms: simulado, solo guarda los últimos mensajes en memoria; se reemplaza por el del proveedor real
+  con registrar_canal.
+Los canales a los que se envían los recordatorios se eligen con la variable de entorno CITAS_CANALES
+(por defecto "app"; por ejemplo "app,email,sms").
+"""
+import json
+import os
+import smtplib
+import threading
+import time
+import traceback
+from collections import deque
+from email.message import EmailMessage
+
+import eventos_notificaciones
+from bd_medica import obtener_conexion
+
+TAMANO_LOTE = 100
+MAX_INTENTOS = 5
+ESPERA_BASE_REINTENTO = 30  # segundos; se duplica en cada intento fallido
+TIEMPO_RESERVA = 300        # segundos que un lote tomado por un trabajador queda reservado
+INTERVALO_SONDEO = 5        # segundos entre revisiones de la cola cuando está vacía
+DIAS_CONSERVACION_COLA = 30
+
+SMTP_HOST = os.environ.get("CITAS_SMTP_HOST", "localhost")
+SMTP_PUERTO = int(os.environ.get("CITAS_SMTP_PUERTO", "1025"))
+SMTP_REMITENTE = os.environ.get("CITAS_SMTP_REMITENTE", "citas@localhost")
+CANALES_ACTIVOS = [c.strip() for c in os.environ.get("CITAS_CANALES", "app").split(",") if c.strip()]
+
+
+class Canal:
+    """
+    Canal de entrega. enviar(envios) recibe una lista de envíos (diccionarios con id, usuario_id, cita_id,
+    tipo, mensaje e intentos) y retorna {id: None si se entregó o el texto del error}.
+    Si 'transaccional' es True, la entrega se hace en la misma transacción que marca los envíos como
+    enviados (para canales que escriben en la propia base).
+    """
+    nombre = None
+    transaccional = False
+
+    def enviar(self, envios):
+        raise NotImplementedError
+
+    def confirmado(self, envios, resultados):
+        """Se llama después de registrar los resultados en la base."""
+
+
+def _destinos(columna, envios):
+    """{usuario_id: valor de 'columna'} de los destinatarios del lote."""
+    ids = sorted({e["usuario_id"] for e in envios})
+    with obtener_conexion() as conexion:
+        filas = conexion.execute(
+            f"SELECT id, {columna} FROM Usuarios WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(ids),)
+        ).fetchall()
+    return dict(filas)
+
+
+class CanalApp(Canal):
+    nombre = "app"
+    transaccional = True
+
+    def enviar(self, envios):
+        with obtener_conexion() as conexion:
+            for envio in envios:
+                # Un recordatorio que el paciente ya tiene en Notificaciones (entregado antes de la cola,
+                # o cuyo envío ya se depuró de ColaEnvios) se da por entregado sin repetirlo.
+                envio["repetido"] = conexion.execute("""
+                    INSERT INTO Notificaciones (usuario_id, cita_id, tipo, message, leido)
+                    SELECT ?1, ?2, ?3, ?4, 0
+                    WHERE ?2 IS NULL OR NOT EXISTS (
+                        SELECT 1 FROM Notificaciones
+                        WHERE cita_id = ?2 AND usuario_id = ?1 AND tipo IS ?3
+                    )
+                """, (envio["usuario_id"], envio["cita_id"], envio["tipo"], envio["mensaje"])).rowcount == 0
+        return {e["id"]: None for e in envios}
+
+    def confirmado(self, envios, resultados):
+        deltas = {}
+        for envio in envios:
+            if resultados.get(envio["id"]) is None and not envio.get("repetido"):
+                deltas[envio["usuario_id"]] = deltas.get(envio["usuario_id"], 0) + 1
+        eventos_notificaciones.publicar(deltas)
+
+
+class CanalEmail(Canal):
+    nombre = "email"
+
+    def __init__(self, host=SMTP_HOST, puerto=SMTP_PUERTO, remitente=SMTP_REMITENTE):
+        self.host = host
+        self.puerto = puerto
+        self.remitente = remitente
+
+    def enviar(self, envios):
+        correos = _destinos("email", envios)
+        resultados = {}
+        try:
+            # Una sola conexión SMTP para todo el lote.
+            with smtplib.SMTP(self.host, self.puerto, timeout=30) as smtp:
+                for envio in envios:
+                    destino = correos.get(envio["usuario_id"])
+                    if not destino:
+                        resultados[envio["id"]] = "El usuario no tiene correo."
+                        continue
+                    mensaje = EmailMessage()
+                    mensaje["From"] = self.remitente
+                    mensaje["To"] = destino
+                    mensaje["Subject"] = "Recordatorio de cita médica"
+                    mensaje.set_content(envio["mensaje"])
+                    try:
+                        smtp.send_message(mensaje)
+                        resultados[envio["id"]] = None
+                    except smtplib.SMTPException as e:
+                        resultados[envio["id"]] = str(e)
+        except (OSError, smtplib.SMTPException) as e:
+            for envio in envios:
+                resultados.setdefault(envio["id"], f"Servidor SMTP no disponible: {e}")
+        return resultados
+
+
+class CanalSMS(Canal):
+    """SMS simulado: guarda los últimos mensajes en 'enviados' como (telefono, mensaje)."""
+    nombre = "sms"
+
+    def __init__(self, maximo=1000):
+        self.enviados = deque(maxlen=maximo)
+
+    def enviar(self, envios):
+        telefonos = _destinos("telefono", envios)
+        resultados = {}
+        for envio in envios:
+            telefono = telefonos.get(envio["usuario_id"])
+            if telefono:
+                self.enviados.append((telefono, envio["mensaje"]))
+                resultados[envio["id"]] = None
+            else:
+                resultados[envio["id"]] = "El usuario no tiene teléfono."
+        return resultados
+
+
+_canales = {canal.nombre: canal for canal in (CanalApp(), CanalEmail(), CanalSMS())}
+_trabajadores = {}
+_lock = threading.Lock()
+
+
+def registrar_canal(canal):
+    """Agrega o reemplaza un canal (por ejemplo, el proveedor real de SMS)."""
+    _canales[canal.nombre] = canal
+
+
+def encolar(usuario_id, mensaje, canales=None, cita_id=None, tipo=None):
+    """Encola un mensaje para el usuario en cada canal (por defecto CANALES_ACTIVOS). Retorna las filas creadas."""
+    canales = canales or CANALES_ACTIVOS
+    with obtener_conexion() as conexion:
+        conexion.executemany("""
+            INSERT OR IGNORE INTO ColaEnvios (usuario_id, cita_id, tipo, canal, mensaje)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(usuario_id, cita_id, tipo, canal, mensaje) for canal in canales])
+    despertar()
+    return len(canales)
+
+
+def _tomar_lote(canal, tamano):
+    """Reserva hasta 'tamano' envíos listos del canal (pendientes o con la reserva vencida)."""
+    with obtener_conexion() as conexion:
+        filas = conexion.execute("""
+            UPDATE ColaEnvios
+            SET estado = 'Procesando', intentos = intentos + 1,
+                proximo_intento = datetime('now', ?)
+            WHERE id IN (
+                SELECT id FROM ColaEnvios
+                WHERE canal = ? AND estado IN ('Pendiente', 'Procesando')
+                  AND proximo_intento <= datetime('now')
+                ORDER BY proximo_intento
+                LIMIT ?
+            )
+            RETURNING id, usuario_id, cita_id, tipo, mensaje, intentos
+        """, (f"+{TIEMPO_RESERVA} seconds", canal, tamano)).fetchall()
+    columnas = ("id", "usuario_id", "cita_id", "tipo", "mensaje", "intentos")
+    return [dict(zip(columnas, fila)) for fila in filas]
+
+
+def _registrar_resultados(envios, resultados):
+    """Marca los envíos entregados y reprograma (o da por fallidos) los demás. Retorna (enviados, reintentos, fallidos)."""
+    enviados, reintentos, fallidos = [], [], []
+    for envio in envios:
+        error = resultados.get(envio["id"], "Sin respuesta del canal.")
+        if error is None:
+            enviados.append((envio["id"],))
+        elif envio["intentos"] >= MAX_INTENTOS:
+            fallidos.append((error, envio["id"]))
+        else:
+            espera = ESPERA_BASE_REINTENTO * 2 ** (envio["intentos"] - 1)
+            reintentos.append((error, f"+{espera} seconds", envio["id"]))
+    with obtener_conexion() as conexion:
+        conexion.executemany("""
+            UPDATE ColaEnvios SET estado = 'Enviado', enviado = CURRENT_TIMESTAMP, ultimo_error = NULL
+            WHERE id = ?
+        """, enviados)
+        conexion.executemany("""
+            UPDATE ColaEnvios SET estado = 'Pendiente', ultimo_error = ?, proximo_intento = datetime('now', ?)
+            WHERE id = ?
+        """, reintentos)
+        conexion.executemany("UPDATE ColaEnvios SET estado = 'Fallido', ultimo_error = ? WHERE id = ?", fallidos)
+    return len(enviados), len(reintentos), len(fallidos)
+
+
+class TrabajadorCola:
+    """Hilo que entrega por lotes los envíos de un canal y acumula sus métricas."""
+
+    def __init__(self, canal, tamano_lote=TAMANO_LOTE, intervalo=INTERVALO_SONDEO):
+        self.canal = canal
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.lotes = 0
+        self.enviados = 0
+        self.reintentos = 0
+        self.fallidos = 0
+        self.segundos_entrega = 0.0
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def procesar_lote(self):
+        """Toma, entrega y registra un lote. Retorna el número de envíos procesados."""
+        envios = _tomar_lote(self.canal.nombre, self.tamano_lote)
+        if not envios:
+            return 0
+        inicio = time.perf_counter()
+        try:
+            if self.canal.transaccional:
+                with obtener_conexion():
+                    resultados = self.canal.enviar(envios)
+                    conteo = _registrar_resultados(envios, resultados)
+            else:
+                resultados = self.canal.enviar(envios)
+                conteo = _registrar_resultados(envios, resultados)
+        except Exception as e:
+            traceback.print_exc()
+            resultados = {envio["id"]: f"Error del canal: {e}" for envio in envios}
+            conteo = _registrar_resultados(envios, resultados)
+        self.canal.confirmado(envios, resultados)
+        self.segundos_entrega += time.perf_counter() - inicio
+        self.lotes += 1
+        self.enviados += conteo[0]
+        self.reintentos += conteo[1]
+        self.fallidos += conteo[2]
+        return len(envios)
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            try:
+                procesados = self.procesar_lote()
+            except Exception:
+                print(f"❌ Error en la cola del canal '{self.canal.nombre}':")
+                traceback.print_exc()
+                procesados = 0
+            if procesados < self.tamano_lote:
+                self._despertar.wait(self.intervalo)
+                self._despertar.clear()
+
+    def iniciar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._ciclo, name=f"cola_{self.canal.nombre}", daemon=True)
+            self._hilo.start()
+        return self
+
+    def despertar(self):
+        self._despertar.set()
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+
+    def metricas(self):
+        return {
+            "lotes": self.lotes,
+            "enviados": self.enviados,
+            "reintentos": self.reintentos,
+            "fallidos": self.fallidos,
+            "envios_por_segundo": round(self.enviados / self.segundos_entrega, 1) if self.segundos_entrega else 0.0,
+        }
+
+
+def iniciar_cola(canales=None):
+    """Inicia (una sola vez por proceso) un trabajador por canal (por defecto CANALES_ACTIVOS)."""
+    with _lock:
+        for nombre in canales or CANALES_ACTIVOS:
+            if nombre not in _trabajadores:
+                _trabajadores[nombre] = TrabajadorCola(_canales[nombre])
+            _trabajadores[nombre].iniciar()
+        return dict(_trabajadores)
+
+
+def detener_cola():
+    with _lock:
+        for trabajador in _trabajadores.values():
+            trabajador.detener()
+
+
+def despertar():
+    """Avisa a los trabajadores de este proceso que hay envíos nuevos (los de otros procesos los ven al sondear)."""
+    for trabajador in list(_trabajadores.values()):
+        trabajador.despertar()
+
+
+def procesar_pendientes(canales=None):
+    """Entrega en el hilo actual todos los envíos listos de los canales indicados. Retorna cuántos procesó."""
+    total = 0
+    for nombre in canales or CANALES_ACTIVOS:
+        trabajador = _trabajadores.get(nombre) or TrabajadorCola(_canales[nombre])
+        while True:
+            procesados = trabajador.procesar_lote()
+            total += procesados
+            if procesados < trabajador.tamano_lote:
+                break
+    return total
+
+
+def metricas():
+    """Métricas de los trabajadores de este proceso y envíos en la cola por canal y estado."""
+    with obtener_conexion() as conexion:
+        filas = conexion.execute("SELECT canal, estado, COUNT(*) FROM ColaEnvios GROUP BY canal, estado").fetchall()
+    cola = {}
+    for canal, estado, cantidad in filas:
+        cola.setdefault(canal, {})[estado] = cantidad
+    return {
+        "trabajadores": {nombre: t.metricas() for nombre, t in _trabajadores.items()},
+        "cola": cola,
+    }
+
+
+def depurar_cola(dias=DIAS_CONSERVACION_COLA):
+    """Elimina los envíos terminados (enviados o fallidos) hace más de 'dias' días. Retorna cuántos eliminó."""
+    with obtener_conexion() as conexion:
+        return conexion.execute("""
+            DELETE FROM ColaEnvios
+            WHERE estado IN ('Enviado', 'Fallido') AND creado < datetime('now', ?)
+        """, (f"-{int(dias)} days",)).rowcount
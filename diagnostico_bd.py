@@ -0,0 +1,177 @@
+"""
+Diagnóstico de planes de consulta.
+Ejecuta las funciones de consulta más frecuentes sobre una base temporal, captura las sentencias SQL
+que realmente envían a SQLite y comprueba con EXPLAIN QUERY PLAN que cada una usa el índice esperado
+(en lugar de recorrer la tabla completa).
+
+Uso:
+    python diagnostico_bd.py
+Devuelve código de salida 1 si alguna consulta no usa su índice.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+import bd_medica
+import migraciones
+
+
+def _casos():
+    """(descripción, función, argumentos, índices aceptados) de cada consulta crítica."""
+    import cola_notificaciones
+    import notificaciones_paciente
+    recordatorio = {"id": 1, "usuario_id": 1, "cita_id": 1, "tipo": "recordatorio_24h", "mensaje": "", "intentos": 0}
+    return [
+        ("obtener_todas_citas(medico_id)", bd_medica.obtener_todas_citas, {"medico_id": 1},
+         {"idx_citas_medico_estado_fecha", "idx_citas_medico_fecha"}),
+        ("obtener_todas_citas(pendientes, página)", bd_medica.obtener_todas_citas,
+         {"medico_id": 1, "estados": ["Pendiente"], "despues_de": ("2030-01-01", "08:00", 1), "limite": 50},
+         {"idx_citas_medico_estado_fecha"}),
+        ("obtener_todas_citas(historial, página)", bd_medica.obtener_todas_citas,
+         {"medico_id": 1, "estados": ["Presente", "Ausente", "Cancelada"], "limite": 50},
+         {"idx_citas_medico_fecha"}),
+        ("obtener_todas_citas(historial, página anterior)", bd_medica.obtener_todas_citas,
+         {"medico_id": 1, "estados": ["Presente", "Ausente", "Cancelada"], "antes_de": ("2030-01-01", "08:00", 1),
+          "limite": 50},
+         {"idx_citas_medico_fecha", "idx_citas_medico_estado_fecha"}),
+        ("contar_citas(historial)", bd_medica.contar_citas,
+         {"medico_id": 1, "estados": ["Presente", "Ausente", "Cancelada"]},
+         {"idx_citas_medico_estado_fecha", "idx_citas_medico_fecha"}),
+        ("obtener_citas_paciente", bd_medica.obtener_citas_paciente, {"user_id": 1},
+         {"idx_citas_paciente_fecha", "sqlite_autoindex_Citas_1"}),
+        ("obtener_citas_paciente_mes", bd_medica.obtener_citas_paciente_mes,
+         {"user_id": 1, "year": 2030, "month": 1, "meses": 3}, {"idx_citas_paciente_fecha", "sqlite_autoindex_Citas_1"}),
+        ("obtener_pacientes_de_medico", bd_medica.obtener_pacientes_de_medico, {"medico_id": 1},
+         {"idx_citas_medico_estado_fecha", "idx_citas_medico_fecha"}),
+        ("buscar_pacientes", bd_medica.buscar_pacientes, {"texto": "jose per", "medico_id": 1},
+         {"VIRTUAL TABLE INDEX"}),
+        ("obtener_foto_usuario(miniatura)", bd_medica._consultar_foto, {"clave": (1, "miniatura")},
+         {"sqlite_autoindex_Fotos_1"}),
+        ("obtener_medicos(especialidad_id)", bd_medica.obtener_medicos, {"especialidad_id": 1},
+         {"idx_medicos_especialidad"}),
+        ("obtener_medicos(usuario_id)", bd_medica.obtener_medicos, {"usuario_id": 1},
+         {"idx_medicos_usuario"}),
+        ("obtener_medico_id_por_usuario_id", bd_medica.obtener_medico_id_por_usuario_id, {"user_id": 1},
+         {"idx_medicos_usuario"}),
+        ("obtener_horarios_disponibles", bd_medica.obtener_horarios_disponibles,
+         {"medico_id": 1, "fecha": "2030-01-01"}, {"sqlite_autoindex_Horarios_1"}),
+        ("buscar_proxima_disponibilidad", bd_medica.buscar_proxima_disponibilidad, {"especialidad_id": 1},
+         {"idx_horarios_disponibles"}),
+        ("obtener_notificaciones", notificaciones_paciente.obtener_notificaciones,
+         {"usuario_id": 1, "limit": 30, "before": ("2030-01-01 00:00:00", 100)},
+         {"idx_notificaciones_usuario_fecha"}),
+        ("archivar_notificaciones", notificaciones_paciente.archivar_notificaciones, {},
+         {"idx_notificaciones_leidas_fecha"}),
+        ("generar_notificaciones", notificaciones_paciente.generar_notificaciones, {"usuario_id": 1},
+         {"idx_notificaciones_usuario_leido_fecha", "idx_notificaciones_usuario_fecha"}),
+        ("contar_no_leidas", notificaciones_paciente.contar_no_leidas, {"usuario_id": 1},
+         {"USING INTEGER PRIMARY KEY"}),
+        ("programar_recordatorios", notificaciones_paciente.programar_recordatorios, {},
+         {"idx_citas_pendientes_fecha_hora"}),
+        ("entrega de recordatorios en la app (sin repetidos)", cola_notificaciones.CanalApp().enviar,
+         {"envios": [recordatorio]}, {"idx_notificaciones_cita_usuario"}),
+    ]
+
+
+def _es_consulta(sql):
+    """SELECT o INSERT ... SELECT enviados por la aplicación (no las consultas internas de FTS5 a sus tablas auxiliares)."""
+    sql = sql.lstrip().upper()
+    if "'MAIN'." in sql:
+        return False
+    return sql.startswith("SELECT") or (sql.startswith("INSERT") and "SELECT" in sql)
+
+
+def capturar_sentencias(funcion, **kwargs):
+    """Ejecuta la función y retorna las consultas (SELECT e INSERT ... SELECT) que envió a SQLite."""
+    sentencias = []
+    with bd_medica.obtener_conexion() as conexion:
+        conexion.set_trace_callback(sentencias.append)
+        try:
+            funcion(**kwargs)
+        finally:
+            conexion.set_trace_callback(None)
+        conexion.rollback()
+    return [s for s in sentencias if _es_consulta(s)]
+
+
+def plan_de_consulta(sql):
+    with bd_medica.obtener_conexion() as conexion:
+        return [fila[3] for fila in conexion.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+
+
+def verificar_indices():
+    """
+    Retorna una lista de (descripción, sql, plan) para las consultas que no usan ninguno de sus índices aceptados.
+    Debe ejecutarse con el pool apuntando a una base ya creada.
+    """
+    fallas = []
+    for descripcion, funcion, kwargs, aceptados in _casos():
+        sentencias = capturar_sentencias(funcion, **kwargs)
+        if not sentencias:
+            fallas.append((descripcion, "(no ejecutó ninguna consulta)", []))
+        for sql in sentencias:
+            plan = plan_de_consulta(sql)
+            if not any(indice in detalle for detalle in plan for indice in aceptados):
+                fallas.append((descripcion, sql, plan))
+    return fallas
+
+
+def verificar_migracion_turnos(ruta):
+    """
+    Aplica la migración 7 sobre una base con citas duplicadas en un mismo turno, como las que dejaban las
+    reservas simultáneas: dos atendidas, y una pendiente junto a una atendida registrada después.
+    Retorna una lista de problemas (vacía si la migración se aplicó y dejó los estados esperados).
+    """
+    conexion = sqlite3.connect(ruta)
+    try:
+        migraciones.aplicar_migraciones(conexion, hasta=6)
+        conexion.executemany("""
+            INSERT INTO Usuarios (id, tipo_usuario, nombres, apellidos, email, telefono, cedula, password)
+            VALUES (?, 'Paciente', 'P', 'P', ?, '0999999999', ?, 'x')
+        """, [(i, f"p{i}@diagnostico.local", f"{i:010d}") for i in range(1, 5)])
+        conexion.execute("""
+            INSERT INTO Medicos (id, nombres, apellidos, especialidad_id, email) VALUES (1, 'M', 'M', 1, 'm@diagnostico.local')
+        """)
+        # (id, paciente, hora, estado): turno de las 08:00 con dos atendidas; de las 09:00 con una
+        # pendiente y una atendida registrada después; de las 10:00 con dos pendientes.
+        citas = [(1, 1, "08:00", "Presente"), (2, 2, "08:00", "Ausente"),
+                 (3, 1, "09:00", "Pendiente"), (4, 2, "09:00", "Presente"),
+                 (5, 3, "10:00", "Pendiente"), (6, 4, "10:00", "Pendiente")]
+        conexion.executemany("""
+            INSERT INTO Citas (id, paciente_id, medico_id, fecha, hora, estado) VALUES (?, ?, 1, '2020-01-01', ?, ?)
+        """, citas)
+        conexion.commit()
+        try:
+            migraciones.aplicar_migraciones(conexion)
+        except sqlite3.Error as e:
+            return [f"las migraciones fallan con turnos duplicados: {e}"]
+        esperados = {1: "Presente", 2: "Ausente", 3: "Cancelada", 4: "Presente", 5: "Pendiente", 6: "Cancelada"}
+        obtenidos = dict(conexion.execute("SELECT id, estado FROM Citas").fetchall())
+        return [f"la cita {cita_id} quedó {obtenidos.get(cita_id)} (se esperaba {estado})"
+                for cita_id, estado in esperados.items() if obtenidos.get(cita_id) != estado]
+    finally:
+        conexion.close()
+
+
+def main():
+    directorio = tempfile.mkdtemp()
+    bd_medica.configurar_pool(db_name=os.path.join(directorio, "diagnostico.db"))
+    bd_medica.crear_base_de_datos()
+    fallas = verificar_indices()
+    problemas_migracion = verificar_migracion_turnos(os.path.join(directorio, "migracion_turnos.db"))
+    for problema in problemas_migracion:
+        print(f"❌ Migración de turnos únicos: {problema}")
+    if not fallas and not problemas_migracion:
+        print("✅ Todas las consultas críticas usan sus índices.")
+        return 0
+    for descripcion, sql, plan in fallas:
+        print(f"❌ {descripcion} no usa su índice:")
+        print("   " + " ".join(sql.split()))
+        for detalle in plan:
+            print("   -> " + detalle)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
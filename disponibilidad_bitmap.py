@@ -0,0 +1,248 @@
+"""
+Almacén compacto de disponibilidad: una fila por médico y día (tabla DisponibilidadDia) con todos los
+turnos del día empaquetados en un entero. El bit i de 'ocupados' corresponde al turno que empieza en
+hora_inicio + i * duracion_minutos; 1 = reservado (o inexistente), 0 = libre.
+
+Horarios sigue siendo la fuente de verdad de las reservas (su UPDATE condicional impide que dos reservas
+ganen el mismo turno). bd_medica actualiza DisponibilidadDia en la misma transacción en que cambia
+Horarios (reservar, liberar y generar días), y con CITAS_DISPONIBILIDAD=bitmap responde desde aquí las
+consultas de turnos libres. Un día que todavía no tiene fila se arma desde Horarios la primera vez que se
+modifica; migrar_desde_horarios() arma de una vez los que falten.
+
+Todas las funciones reciben el cursor de la transacción de quien llama.
+"""
+from datetime import datetime, timedelta
+from math import gcd
+
+# Bits de turnos por día: 1 << MAX_TURNOS debe caber en el INTEGER de 64 bits con signo de SQLite.
+MAX_TURNOS = 62
+
+
+def _a_minutos(hora):
+    h, m = map(int, hora.split(":"))
+    return h * 60 + m
+
+
+def _a_hora(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _indice_turno(inicio, duracion, num_turnos, hora):
+    """Índice del bit de 'hora' dentro del día, o None si la hora no corresponde a un turno."""
+    desfase = _a_minutos(hora) - _a_minutos(inicio)
+    if desfase < 0 or desfase % duracion != 0 or desfase // duracion >= num_turnos:
+        return None
+    return desfase // duracion
+
+
+def _turnos_libres(ocupados, num_turnos):
+    """Bits libres (en 1) del día."""
+    return ~ocupados & ((1 << num_turnos) - 1)
+
+
+def _horas_de_bits(bits, hora_inicio, duracion):
+    inicio = _a_minutos(hora_inicio)
+    horas = []
+    while bits:
+        bit_bajo = bits & -bits
+        indice = bit_bajo.bit_length() - 1
+        horas.append((indice, _a_hora(inicio + indice * duracion)))
+        bits ^= bit_bajo
+    return horas
+
+
+def _libres_despues_de(fila, fecha, ahora):
+    """Bits libres del día, sin los turnos de hoy cuya hora ya pasó."""
+    hora_inicio, duracion, num_turnos, ocupados = fila
+    libres = _turnos_libres(ocupados, num_turnos)
+    hoy = ahora.strftime("%Y-%m-%d")
+    if fecha < hoy:
+        return 0
+    if fecha == hoy:
+        # Primer turno que empieza después de la hora actual.
+        pasados = (ahora.hour * 60 + ahora.minute - _a_minutos(hora_inicio)) // duracion + 1
+        if pasados > 0:
+            libres &= ~((1 << min(pasados, num_turnos)) - 1)
+    return libres
+
+
+def _empaquetar(turnos):
+    """
+    (hora_inicio, duracion, num_turnos, ocupados) a partir de [(minutos, estado), ...] ordenados por hora.
+    Se toma como inicio la primera hora y como duración el máximo común divisor entre las horas; los
+    turnos que no existen quedan ocupados. Retorna None si el día no cabe en MAX_TURNOS bits.
+    """
+    inicio = turnos[0][0]
+    duracion = 0
+    for minutos, _ in turnos[1:]:
+        duracion = gcd(duracion, minutos - inicio)
+    duracion = duracion or 30
+    num_turnos = (turnos[-1][0] - inicio) // duracion + 1
+    if num_turnos > MAX_TURNOS:
+        return None
+    ocupados = (1 << num_turnos) - 1
+    for minutos, estado in turnos:
+        if estado == 'Disponible':
+            ocupados &= ~(1 << ((minutos - inicio) // duracion))
+    return _a_hora(inicio), duracion, num_turnos, ocupados
+
+
+def _fila_dia(cursor, medico_id, fecha):
+    cursor.execute("""
+        SELECT hora_inicio, duracion_minutos, num_turnos, ocupados
+        FROM DisponibilidadDia
+        WHERE medico_id = ? AND fecha = ?
+    """, (medico_id, fecha))
+    return cursor.fetchone()
+
+
+def construir_dia(cursor, medico_id, fecha):
+    """
+    Crea (o rehace) la fila del día a partir de sus horarios en Horarios.
+    Retorna False si el día no tiene horarios o tiene más turnos de los que caben en MAX_TURNOS bits
+    (ese día solo se consulta en Horarios).
+    """
+    cursor.execute("SELECT hora, estado FROM Horarios WHERE medico_id = ? AND fecha = ? ORDER BY hora",
+                   (medico_id, fecha))
+    turnos = [(_a_minutos(hora), estado) for hora, estado in cursor.fetchall()]
+    empaquetado = _empaquetar(turnos) if turnos else None
+    if empaquetado is None:
+        cursor.execute("DELETE FROM DisponibilidadDia WHERE medico_id = ? AND fecha = ?", (medico_id, fecha))
+        return False
+    cursor.execute("""
+        INSERT OR REPLACE INTO DisponibilidadDia (medico_id, fecha, hora_inicio, duracion_minutos, num_turnos, ocupados)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (medico_id, fecha) + empaquetado)
+    return True
+
+
+def generar_dias(cursor, dias):
+    """
+    Registra días recién generados en Horarios, con todos sus turnos libres.
+    'dias' es una lista de (medico_id, fecha, horas) con las horas 'HH:MM' en orden y a intervalos iguales.
+    Los días con más de MAX_TURNOS turnos no se registran.
+    """
+    filas = []
+    for medico_id, fecha, horas in dias:
+        if not 0 < len(horas) <= MAX_TURNOS:
+            continue
+        duracion = _a_minutos(horas[1]) - _a_minutos(horas[0]) if len(horas) > 1 else 30
+        filas.append((medico_id, fecha, horas[0], duracion, len(horas)))
+    cursor.executemany("""
+        INSERT OR REPLACE INTO DisponibilidadDia (medico_id, fecha, hora_inicio, duracion_minutos, num_turnos, ocupados)
+        VALUES (?, ?, ?, ?, ?, 0)
+    """, filas)
+
+
+def marcar_turno(cursor, medico_id, fecha, hora, reservado):
+    """
+    Refleja en el día el cambio de estado que acaba de hacerse en Horarios. Si el día no tiene fila, o
+    la hora no coincide con su cuadrícula de turnos, el día se rehace desde Horarios.
+    """
+    fila = _fila_dia(cursor, medico_id, fecha)
+    indice = _indice_turno(*fila[:3], hora) if fila else None
+    if indice is None:
+        construir_dia(cursor, medico_id, fecha)
+        return
+    bit = 1 << indice
+    if reservado:
+        cursor.execute("UPDATE DisponibilidadDia SET ocupados = ocupados | ? WHERE medico_id = ? AND fecha = ?",
+                       (bit, medico_id, fecha))
+    else:
+        cursor.execute("UPDATE DisponibilidadDia SET ocupados = ocupados & ~? WHERE medico_id = ? AND fecha = ?",
+                       (bit, medico_id, fecha))
+
+
+def obtener_horarios_disponibles(cursor, medico_id, fecha):
+    """
+    [(indice_turno, 'HH:MM'), ...] libres del día, en orden de hora, o None si el día no tiene fila
+    (quien llama debe consultar Horarios).
+    """
+    fila = _fila_dia(cursor, medico_id, fecha)
+    if fila is None:
+        return None
+    hora_inicio, duracion, num_turnos, ocupados = fila
+    return _horas_de_bits(_turnos_libres(ocupados, num_turnos), hora_inicio, duracion)
+
+
+def proximo_turno_libre(cursor, medico_id, desde, dias=30, ahora=None):
+    """
+    Retorna (fecha, hora) del primer turno libre del médico entre 'desde' y 'desde + dias',
+    o None si no hay ninguno. Los turnos de hoy cuya hora ya pasó no se cuentan.
+    Los días completos se descartan en SQL sin leer sus turnos.
+    """
+    ahora = ahora or datetime.now()
+    desde = desde if isinstance(desde, str) else desde.strftime("%Y-%m-%d")
+    desde = max(desde, ahora.strftime("%Y-%m-%d"))
+    hasta = (datetime.strptime(desde, "%Y-%m-%d") + timedelta(days=dias)).strftime("%Y-%m-%d")
+    cursor.execute("""
+        SELECT fecha, hora_inicio, duracion_minutos, num_turnos, ocupados
+        FROM DisponibilidadDia
+        WHERE medico_id = ? AND fecha BETWEEN ? AND ?
+          AND ocupados != (1 << num_turnos) - 1
+        ORDER BY fecha
+    """, (medico_id, desde, hasta))
+    for fecha, *fila in cursor:
+        libres = _libres_despues_de(fila, fecha, ahora)
+        if libres:
+            indice = (libres & -libres).bit_length() - 1
+            return fecha, _a_hora(_a_minutos(fila[0]) + indice * fila[1])
+    return None
+
+
+def buscar_proxima_disponibilidad(cursor, especialidad_id, desde, hasta, limite, ahora):
+    """
+    Versión de bd_medica.buscar_proxima_disponibilidad sobre DisponibilidadDia: los primeros 'limite'
+    turnos libres de los médicos de la especialidad, en orden de fecha y hora, sin los de hoy ya pasados.
+    Formato: [(indice_turno, fecha, hora, medico_id, "Nombres Apellidos"), ...].
+    """
+    cursor.execute("""
+        SELECT D.fecha, D.hora_inicio, D.duracion_minutos, D.num_turnos, D.ocupados,
+               M.id, (M.nombres || ' ' || M.apellidos)
+        FROM Medicos M
+        JOIN DisponibilidadDia D ON D.medico_id = M.id
+        WHERE M.especialidad_id = ?
+          AND D.fecha BETWEEN ? AND ?
+          AND D.ocupados != (1 << D.num_turnos) - 1
+        ORDER BY D.fecha
+    """, (especialidad_id, desde, hasta))
+    turnos = []
+    fecha_actual = None
+    for fecha, hora_inicio, duracion, num_turnos, ocupados, medico_id, medico in cursor:
+        # Los días llegan en orden: al pasar a otro día con 'limite' turnos ya reunidos se puede cortar.
+        if fecha != fecha_actual and len(turnos) >= limite:
+            break
+        fecha_actual = fecha
+        libres = _libres_despues_de((hora_inicio, duracion, num_turnos, ocupados), fecha, ahora)
+        turnos.extend((indice, fecha, hora, medico_id, medico)
+                      for indice, hora in _horas_de_bits(libres, hora_inicio, duracion))
+    turnos.sort(key=lambda turno: (turno[1], turno[2]))
+    return turnos[:limite]
+
+
+def migrar_desde_horarios(cursor, desde=None):
+    """
+    Arma las filas de DisponibilidadDia que faltan a partir de Horarios (desde la fecha 'desde', o todas).
+    Los días que ya tienen fila no se modifican y los que no caben en MAX_TURNOS bits se omiten.
+    Retorna el número de días creados.
+    """
+    cursor.execute("""
+        SELECT H.medico_id, H.fecha, H.hora, H.estado
+        FROM Horarios H
+        WHERE H.fecha >= ?
+          AND NOT EXISTS (SELECT 1 FROM DisponibilidadDia D WHERE D.medico_id = H.medico_id AND D.fecha = H.fecha)
+        ORDER BY H.medico_id, H.fecha, H.hora
+    """, (desde or "",))
+    dias = {}
+    for medico_id, fecha, hora, estado in cursor.fetchall():
+        dias.setdefault((medico_id, fecha), []).append((_a_minutos(hora), estado))
+    filas = []
+    for (medico_id, fecha), turnos in dias.items():
+        empaquetado = _empaquetar(turnos)
+        if empaquetado is not None:
+            filas.append((medico_id, fecha) + empaquetado)
+    cursor.executemany("""
+        INSERT OR IGNORE INTO DisponibilidadDia (medico_id, fecha, hora_inicio, duracion_minutos, num_turnos, ocupados)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, filas)
+    return len(filas)
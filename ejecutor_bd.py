@@ -0,0 +1,169 @@
+"""
+Ejecutor compartido para las llamadas a la base que hacen los manejadores de Flet.
+El manejador envía la función de bd_medica y retorna enseguida; un hilo del pool la ejecuta y al
+terminar llama a al_terminar(resultado) (o a al_fallar(error)), que aplica el resultado a la página y
+llama a page.update(). Así una consulta lenta no deja la sesión congelada.
+
+- clave: las tareas con la misma clave se reemplazan (gana la última). Si el usuario cambia un
+  dropdown varias veces seguidas, las consultas anteriores se cancelan si aún no empezaron y, si ya
+  estaban en curso, su resultado se descarta.
+- grupo: permite cancelar de una vez todas las tareas de una sesión (por ejemplo al cerrarla).
+
+Uso:
+    ejecutor_bd.ejecutar(obtener_horarios_disponibles, med_id, fecha,
+                         al_terminar=mostrar_horas, clave=("horas", id(page)))
+"""
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos del pool; SQLite solo escribe de a uno, así que más hilos solo ayudan a las lecturas.
+TRABAJADORES_BD = int(os.environ.get("CITAS_TRABAJADORES_BD", "4"))
+
+
+class Tarea:
+    """Una llamada enviada al ejecutor. cancelar() evita que se ejecute o que se aplique su resultado."""
+
+    def __init__(self, funcion, args, kwargs, al_terminar, al_fallar, clave, grupo):
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.al_terminar = al_terminar
+        self.al_fallar = al_fallar
+        self.clave = clave
+        self.grupo = grupo
+        self.cancelada = False
+        self.terminada = threading.Event()
+        self.resultado = None
+        self.error = None
+        self._futuro = None
+
+    def cancelar(self):
+        self.cancelada = True
+        if self._futuro is not None and self._futuro.cancel():
+            # No llegó a empezar: nadie más la marcará como terminada.
+            self.terminada.set()
+
+    def esperar(self, timeout=None):
+        """Espera a que termine (o se cancele) y retorna el resultado; relanza el error de la función."""
+        self.terminada.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.resultado
+
+
+class EjecutorBD:
+    def __init__(self, trabajadores=TRABAJADORES_BD):
+        self._pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="bd")
+        self._lock = threading.Lock()
+        self._ultimas = {}  # clave -> última Tarea enviada con esa clave
+        self._pendientes = set()
+        self._contadores = {"enviadas": 0, "completadas": 0, "fallidas": 0, "canceladas": 0}
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=None, clave=None, grupo=None, **kwargs):
+        """Encola funcion(*args, **kwargs) y retorna su Tarea."""
+        tarea = Tarea(funcion, args, kwargs, al_terminar, al_fallar, clave, grupo)
+        anterior = None
+        with self._lock:
+            if clave is not None:
+                anterior = self._ultimas.get(clave)
+                self._ultimas[clave] = tarea
+            self._pendientes.add(tarea)
+            self._contadores["enviadas"] += 1
+        # Fuera del lock: cancelar un futuro que no empezó ejecuta _retirar en este mismo hilo.
+        if anterior is not None:
+            anterior.cancelar()
+        tarea._futuro = self._pool.submit(self._ejecutar, tarea)
+        tarea._futuro.add_done_callback(lambda _: self._retirar(tarea))
+        return tarea
+
+    def _ejecutar(self, tarea):
+        try:
+            if tarea.cancelada:
+                return
+            try:
+                tarea.resultado = tarea.funcion(*tarea.args, **tarea.kwargs)
+            except Exception as e:
+                tarea.error = e
+            # Si otra tarea con la misma clave la reemplazó mientras corría, su resultado ya no sirve.
+            if tarea.cancelada:
+                return
+            if tarea.error is None:
+                if tarea.al_terminar:
+                    tarea.al_terminar(tarea.resultado)
+            elif tarea.al_fallar:
+                tarea.al_fallar(tarea.error)
+            else:
+                print(f"❌ Error en la tarea de base de datos {getattr(tarea.funcion, '__name__', tarea.funcion)}:")
+                traceback.print_exception(tarea.error)
+        except Exception:
+            # El callback falló (por ejemplo, la página ya se cerró).
+            print("❌ Error al aplicar el resultado de una tarea de base de datos:")
+            traceback.print_exc()
+        finally:
+            tarea.terminada.set()
+
+    def _retirar(self, tarea):
+        with self._lock:
+            self._pendientes.discard(tarea)
+            if tarea.clave is not None and self._ultimas.get(tarea.clave) is tarea:
+                del self._ultimas[tarea.clave]
+            if tarea.cancelada:
+                self._contadores["canceladas"] += 1
+            elif tarea.error is not None:
+                self._contadores["fallidas"] += 1
+            else:
+                self._contadores["completadas"] += 1
+
+    def cancelar(self, clave):
+        """Cancela la última tarea enviada con 'clave', si sigue pendiente."""
+        with self._lock:
+            tarea = self._ultimas.get(clave)
+        if tarea is not None:
+            tarea.cancelar()
+
+    def cancelar_grupo(self, grupo):
+        """Cancela todas las tareas pendientes del grupo (por ejemplo, las de una sesión que se cerró)."""
+        with self._lock:
+            tareas = [t for t in self._pendientes if t.grupo == grupo]
+        for tarea in tareas:
+            tarea.cancelar()
+        return len(tareas)
+
+    def metricas(self):
+        with self._lock:
+            return dict(self._contadores, en_curso=len(self._pendientes))
+
+    def cerrar(self, esperar=True):
+        self._pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+def obtener_ejecutor():
+    """Ejecutor compartido por todas las sesiones del proceso (se crea en el primer uso)."""
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is None:
+            _ejecutor = EjecutorBD()
+        return _ejecutor
+
+
+def ejecutar(funcion, *args, **kwargs):
+    """Atajo de obtener_ejecutor().enviar(...)."""
+    return obtener_ejecutor().enviar(funcion, *args, **kwargs)
+
+
+def cancelar(clave):
+    obtener_ejecutor().cancelar(clave)
+
+
+def cancelar_grupo(grupo):
+    return obtener_ejecutor().cancelar_grupo(grupo)
+
+
+def metricas():
+    return obtener_ejecutor().metricas()
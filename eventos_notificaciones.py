@@ -0,0 +1,102 @@
+"""
+Bus de eventos de notificaciones dentro del proceso.
+Las funciones que escriben en Notificaciones publican, después de confirmar la transacción, cuánto cambió
+el número de no leídas de cada usuario; cada sesión abierta se suscribe con su usuario y recibe esos
+cambios sin consultar la base. El callback de la suscripción solo se llama cuando el contador cambia.
+
+Uso:
+    suscripcion = eventos_notificaciones.suscribir(user_id, actualizar_badge, no_leidas_iniciales)
+    ...
+    suscripcion.cancelar()  # al cerrar sesión o desconectarse
+"""
+import threading
+import traceback
+
+_lock = threading.Lock()
+_suscripciones = {}  # usuario_id -> set de Suscripcion
+
+
+class Suscripcion:
+    """Contador de no leídas de un usuario para una sesión; llama a al_cambiar(no_leidas) cuando cambia."""
+
+    def __init__(self, usuario_id, al_cambiar, no_leidas=0):
+        self.usuario_id = usuario_id
+        self.al_cambiar = al_cambiar
+        self.no_leidas = no_leidas
+        self.activa = True
+        # Reentrante: el callback puede volver a tocar la suscripción desde el mismo hilo.
+        self._lock = threading.RLock()
+
+    def _actualizar(self, calcular):
+        """
+        Reemplaza el contador por calcular(contador actual) y avisa si cambió. Lectura, escritura y aviso
+        van bajo el lock, así dos publicaciones simultáneas no pierden un cambio ni avisan fuera de orden.
+        """
+        with self._lock:
+            if not self.activa:
+                return
+            no_leidas = calcular(self.no_leidas)
+            if no_leidas == self.no_leidas:
+                return
+            self.no_leidas = no_leidas
+            try:
+                self.al_cambiar(no_leidas)
+            except Exception:
+                # La sesión ya no puede actualizarse (página cerrada): se deja de notificar.
+                print(f"❌ Error al notificar al usuario {self.usuario_id}; se cancela la suscripción:")
+                traceback.print_exc()
+                self.cancelar()
+
+    def aplicar(self, delta):
+        """Suma 'delta' al contador (nunca por debajo de cero)."""
+        self._actualizar(lambda no_leidas: max(0, no_leidas + delta))
+
+    def sincronizar(self, no_leidas):
+        """Reemplaza el contador por el valor leído de la base (por ejemplo, tras cambios de otro proceso)."""
+        self._actualizar(lambda _: no_leidas)
+
+    def cancelar(self):
+        cancelar(self)
+
+
+def suscribir(usuario_id, al_cambiar, no_leidas=0):
+    """Registra una sesión del usuario. 'no_leidas' es el contador inicial (normalmente leído de la base)."""
+    suscripcion = Suscripcion(usuario_id, al_cambiar, no_leidas)
+    with _lock:
+        _suscripciones.setdefault(usuario_id, set()).add(suscripcion)
+    return suscripcion
+
+
+def cancelar(suscripcion):
+    suscripcion.activa = False
+    with _lock:
+        sesiones = _suscripciones.get(suscripcion.usuario_id)
+        if sesiones is not None:
+            sesiones.discard(suscripcion)
+            if not sesiones:
+                del _suscripciones[suscripcion.usuario_id]
+
+
+def publicar(deltas):
+    """
+    Publica los cambios de no leídas {usuario_id: delta}. Los usuarios sin sesiones abiertas se ignoran.
+    Debe llamarse después de confirmar la escritura.
+    """
+    with _lock:
+        destinos = [(s, delta) for usuario_id, delta in deltas.items() if delta
+                    for s in _suscripciones.get(usuario_id, ())]
+    for suscripcion, delta in destinos:
+        suscripcion.aplicar(delta)
+
+
+def publicar_total(usuario_id, no_leidas):
+    """Publica el número exacto de no leídas del usuario (por ejemplo, tras reconstruir los contadores)."""
+    with _lock:
+        destinos = list(_suscripciones.get(usuario_id, ()))
+    for suscripcion in destinos:
+        suscripcion.sincronizar(no_leidas)
+
+
+def numero_suscripciones():
+    with _lock:
+        return sum(len(sesiones) for sesiones in _suscripciones.values())
@@ -0,0 +1,174 @@
+"""
+Almacén de fotografías de usuario direccionado por contenido.
+Cada imagen se guarda una sola vez en la tabla Fotos, identificada por el SHA-256 de los bytes que se
+subieron, en variantes ya redimensionadas (VARIANTES): "original", hasta 300×400 como se guardaba antes,
+y "miniatura" para los avatares. Usuarios.photo solo guarda el hash, así las filas de Usuarios quedan
+pequeñas y dos usuarios con la misma imagen comparten las mismas filas de Fotos.
+
+Las variantes se codifican en WebP si Pillow lo soporta, o si no en JPEG. Pillow es opcional: sin él la
+imagen se guarda tal como llegó y solo como "original" (las consultas de otra variante usan esa).
+Las fotos que solo tienen "original" (las convertidas por la migración 14 o guardadas sin Pillow)
+reciben las demás variantes en segundo plano al iniciar la aplicación con Pillow instalado
+(bd_medica.iniciar_variantes_fotos); mientras tanto se muestra la original.
+"""
+import base64
+import hashlib
+import io
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+# variante -> (ancho máximo, alto máximo) en píxeles.
+VARIANTES = {
+    "original": (300, 400),
+    "miniatura": (160, 160),  # avatar de 80 px en pantallas de alta densidad
+}
+CALIDAD = 85
+
+
+class FotoPreparada:
+    """Una imagen ya procesada y lista para guardar con guardar_foto()."""
+
+    def __init__(self, hash_foto, variantes, ancho_original=None, alto_original=None):
+        self.hash = hash_foto
+        self.variantes = variantes  # variante -> (formato, ancho, alto, datos)
+        self.ancho_original = ancho_original
+        self.alto_original = alto_original
+
+    @property
+    def datos(self):
+        """Bytes de la variante "original"."""
+        return self.variantes["original"][3]
+
+    def base64(self, variante="original"):
+        return a_base64(self.variantes.get(variante, self.variantes["original"])[3])
+
+
+def a_base64(datos):
+    """Texto base64 de los bytes, como lo espera ft.Image(src_base64=...)."""
+    return base64.b64encode(datos).decode("ascii")
+
+
+def formato_preferido():
+    """WEBP si Pillow puede escribirlo, si no JPEG."""
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def detectar_formato(datos):
+    """Formato de una imagen por su firma (sin decodificarla)."""
+    if datos.startswith(b"\x89PNG"):
+        return "PNG"
+    if datos.startswith(b"\xff\xd8"):
+        return "JPEG"
+    if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+        return "WEBP"
+    if datos.startswith(b"GIF8"):
+        return "GIF"
+    return "desconocido"
+
+
+def _codificar(imagen, caja, formato):
+    copia = imagen.copy()
+    copia.thumbnail(caja)
+    if formato == "JPEG" and copia.mode != "RGB":
+        # JPEG no tiene transparencia: se compone sobre fondo blanco.
+        fondo = Image.new("RGB", copia.size, "white")
+        rgba = copia.convert("RGBA")
+        fondo.paste(rgba, mask=rgba.getchannel("A"))
+        copia = fondo
+    elif formato == "WEBP" and copia.mode not in ("RGB", "RGBA"):
+        copia = copia.convert("RGBA")
+    salida = io.BytesIO()
+    copia.save(salida, format=formato, quality=CALIDAD)
+    return formato, copia.width, copia.height, salida.getvalue()
+
+
+def preparar_foto(datos):
+    """
+    Calcula el hash de la imagen y genera sus variantes. 'datos' son los bytes del archivo o su texto
+    base64 (el formato que se guardaba antes en Usuarios.photo).
+    Lanza una excepción si Pillow está instalado y los datos no son una imagen válida.
+    """
+    if isinstance(datos, str):
+        datos = base64.b64decode(datos)
+    if Image is None:
+        return foto_sin_procesar(datos)
+    imagen = Image.open(io.BytesIO(datos))
+    imagen.load()
+    formato = formato_preferido()
+    variantes = {nombre: _codificar(imagen, caja, formato) for nombre, caja in VARIANTES.items()}
+    return FotoPreparada(hashlib.sha256(datos).hexdigest(), variantes, imagen.width, imagen.height)
+
+
+def foto_sin_procesar(datos):
+    """FotoPreparada con los bytes tal como están, para imágenes que Pillow no puede abrir."""
+    return FotoPreparada(hashlib.sha256(datos).hexdigest(), {"original": (detectar_formato(datos), None, None, datos)})
+
+
+def es_referencia(valor):
+    """True si 'valor' (de Usuarios.photo) es un hash de Fotos y no una imagen en base64."""
+    return isinstance(valor, str) and len(valor) == 64 and all(c in "0123456789abcdef" for c in valor)
+
+
+def guardar_foto(cursor, foto):
+    """
+    Guarda las variantes de 'foto' (si el hash ya existe no se duplica) y retorna el hash,
+    que es lo que se guarda en Usuarios.photo. Se ejecuta dentro de la transacción de quien llama.
+    """
+    cursor.executemany("""
+        INSERT OR IGNORE INTO Fotos (hash, variante, formato, ancho, alto, datos)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(foto.hash, variante, formato, ancho, alto, datos)
+          for variante, (formato, ancho, alto, datos) in foto.variantes.items()])
+    return foto.hash
+
+
+def fotos_sin_variantes(cursor, despues_de="", limite=20):
+    """
+    [(hash, bytes de la original), ...] de hasta 'limite' fotos a las que les falta alguna variante,
+    en orden de hash y con hash mayor que 'despues_de' (para recorrerlas por lotes).
+    """
+    cursor.execute("""
+        SELECT F.hash, F.datos
+        FROM Fotos F
+        WHERE F.variante = 'original' AND F.hash > ?
+          AND (SELECT COUNT(*) FROM Fotos V WHERE V.hash = F.hash) < ?
+        ORDER BY F.hash
+        LIMIT ?
+    """, (despues_de, len(VARIANTES), limite))
+    return cursor.fetchall()
+
+
+def preparar_variantes(hash_foto, original):
+    """
+    FotoPreparada con las variantes distintas de "original", generadas a partir de sus bytes, para
+    completar con guardar_foto() una foto guardada solo como original. None si Pillow no está instalado
+    o no puede abrir la imagen.
+    """
+    if Image is None:
+        return None
+    try:
+        imagen = Image.open(io.BytesIO(original))
+        imagen.load()
+        formato = formato_preferido()
+        variantes = {nombre: _codificar(imagen, caja, formato)
+                     for nombre, caja in VARIANTES.items() if nombre != "original"}
+    except Exception:
+        return None
+    return FotoPreparada(hash_foto, variantes, imagen.width, imagen.height)
+
+
+def consultar_foto_usuario(cursor, user_id, variante="original"):
+    """Bytes de la variante pedida de la foto del usuario (o de la original si no existe), o None."""
+    cursor.execute("""
+        SELECT F.datos
+        FROM Usuarios U
+        JOIN Fotos F ON F.hash = U.photo AND F.variante IN (?, 'original')
+        WHERE U.id = ?
+        ORDER BY F.variante = 'original'
+        LIMIT 1
+    """, (variante, user_id))
+    fila = cursor.fetchone()
+    return fila[0] if fila else None
@@ -0,0 +1,197 @@
+"""
+Instrumentación de consultas SQL.
+Las conexiones del pool se crean con ConexionInstrumentada; mientras la instrumentación está desactivada
+cada consulta solo paga la lectura de una variable. Al activarla se registra, por cada función que
+ejecuta SQL (por ejemplo 'bd_medica.obtener_todas_citas'), el número de llamadas, las filas y la
+distribución de tiempos (p50/p95/p99), y las consultas que superan el umbral se escriben en el
+registro de consultas lentas.
+
+Uso:
+    import instrumentacion
+    instrumentacion.activar(umbral_ms=50)
+    ...
+    print(instrumentacion.resumen())
+También se activa al iniciar con la variable de entorno CITAS_INSTRUMENTACION=1.
+"""
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+MUESTRAS_POR_FUNCION = 2048
+ARCHIVO_LENTAS = "consultas_lentas.log"
+
+_activo = False
+_umbral_ms = 100.0
+_lock = threading.Lock()
+_estadisticas = {}
+_modulos_ignorados = {__name__, "pool_conexiones", "contextlib"}
+
+registro_lentas = logging.getLogger("citas_medicas.consultas_lentas")
+
+
+class _Estadistica:
+    __slots__ = ("llamadas", "filas", "total_ms", "muestras")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.filas = 0
+        self.total_ms = 0.0
+        self.muestras = deque(maxlen=MUESTRAS_POR_FUNCION)
+
+
+def _origen():
+    """(función, 'archivo:línea') del primer marco de la pila fuera de este módulo y del pool."""
+    marco = sys._getframe(2)
+    while marco is not None and marco.f_globals.get("__name__") in _modulos_ignorados:
+        marco = marco.f_back
+    if marco is None:
+        return "desconocido", "?"
+    codigo = marco.f_code
+    funcion = f"{marco.f_globals.get('__name__')}.{codigo.co_name}"
+    return funcion, f"{os.path.basename(codigo.co_filename)}:{marco.f_lineno}"
+
+
+def _registrar(funcion, ubicacion, sql, duracion_ms, filas):
+    with _lock:
+        estadistica = _estadisticas.get(funcion)
+        if estadistica is None:
+            estadistica = _estadisticas[funcion] = _Estadistica()
+        estadistica.llamadas += 1
+        estadistica.total_ms += duracion_ms
+        estadistica.muestras.append(duracion_ms)
+        if filas > 0:
+            estadistica.filas += filas
+    if duracion_ms >= _umbral_ms:
+        # En los SELECT las filas aún no se conocen al terminar execute (rowcount = -1).
+        registro_lentas.warning("%.1f ms | %s (%s) | filas=%s | %s",
+                                duracion_ms, funcion, ubicacion, filas if filas >= 0 else "?",
+                                " ".join(sql.split())[:500])
+
+
+def _sumar_filas(funcion, filas):
+    with _lock:
+        estadistica = _estadisticas.get(funcion)
+        if estadistica is not None:
+            estadistica.filas += filas
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    _funcion = None
+
+    def execute(self, sql, parametros=()):
+        if not _activo:
+            return super().execute(sql, parametros)
+        funcion, ubicacion = _origen()
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._funcion = funcion
+            _registrar(funcion, ubicacion, sql, (time.perf_counter() - inicio) * 1000, self.rowcount)
+
+    def executemany(self, sql, secuencia):
+        if not _activo:
+            return super().executemany(sql, secuencia)
+        funcion, ubicacion = _origen()
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, secuencia)
+        finally:
+            self._funcion = funcion
+            _registrar(funcion, ubicacion, sql, (time.perf_counter() - inicio) * 1000, self.rowcount)
+
+    # Para los SELECT rowcount es -1: las filas se cuentan al leerlas.
+    def fetchone(self):
+        fila = super().fetchone()
+        if _activo and fila is not None and self._funcion:
+            _sumar_filas(self._funcion, 1)
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        if _activo and self._funcion:
+            _sumar_filas(self._funcion, len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = super().fetchall()
+        if _activo and self._funcion:
+            _sumar_filas(self._funcion, len(filas))
+        return filas
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión cuyos cursores (incluidos los de conexion.execute) pasan por CursorInstrumentado."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, secuencia):
+        return self.cursor().executemany(sql, secuencia)
+
+
+def activar(umbral_ms=None, archivo=ARCHIVO_LENTAS):
+    """Activa la medición. Las consultas de al menos umbral_ms milisegundos se escriben en 'archivo'."""
+    global _activo, _umbral_ms
+    if umbral_ms is not None:
+        _umbral_ms = umbral_ms
+    if archivo and not registro_lentas.handlers:
+        manejador = logging.FileHandler(archivo, encoding="utf-8")
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        registro_lentas.addHandler(manejador)
+        registro_lentas.setLevel(logging.WARNING)
+        registro_lentas.propagate = False
+    _activo = True
+
+
+def desactivar():
+    global _activo
+    _activo = False
+
+
+def esta_activa():
+    return _activo
+
+
+def reiniciar():
+    """Borra las estadísticas acumuladas."""
+    with _lock:
+        _estadisticas.clear()
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+    return ordenadas[indice]
+
+
+def resumen():
+    """
+    Retorna {funcion: {llamadas, filas, total_ms, p50_ms, p95_ms, p99_ms}}, ordenado por tiempo total.
+    Los percentiles se calculan sobre las últimas MUESTRAS_POR_FUNCION consultas de cada función.
+    """
+    with _lock:
+        copia = {f: (e.llamadas, e.filas, e.total_ms, sorted(e.muestras)) for f, e in _estadisticas.items()}
+    datos = {}
+    for funcion, (llamadas, filas, total_ms, ordenadas) in sorted(copia.items(), key=lambda x: -x[1][2]):
+        datos[funcion] = {
+            "llamadas": llamadas,
+            "filas": filas,
+            "total_ms": round(total_ms, 3),
+            "p50_ms": round(_percentil(ordenadas, 50), 3),
+            "p95_ms": round(_percentil(ordenadas, 95), 3),
+            "p99_ms": round(_percentil(ordenadas, 99), 3),
+        }
+    return datos
+
+
+if os.environ.get("CITAS_INSTRUMENTACION") == "1":
+    activar(float(os.environ.get("CITAS_UMBRAL_LENTAS_MS", _umbral_ms)))
@@ -1,748 +1,983 @@
-import flet as ft
-import datetime
-from datetime import datetime as dt, timedelta, date
-import calendar
-import notificaciones_paciente
-
-def update_notification_badge():
-    notificaciones_paciente.generar_notificaciones(user_id)
-    notifs = notificaciones_paciente.obtener_notificaciones(user_id)
-    count = len([n for n in notifs if n["leido"] == 0])
-    badge_text = str(count) if count > 0 else ""
-    badge_container.content.value = badge_text
-    badge_container.visible = True if count > 0 else False
-    page.update()
-
-from bd_medica import (
-    crear_base_de_datos,
-    obtener_medicos,
-    obtener_horarios_disponibles,
-    registrar_cita,
-    obtener_usuario,
-    actualizar_datos_usuario,
-    cambiar_contrasena,
-    obtener_citas_paciente,
-    cancelar_cita,
-    generar_horarios_disponibles,
-    editar_cita
-)
-
-def main(page: ft.Page, user_id: int):
-    # Asegurarse de que la base de datos y las tablas existan
-    crear_base_de_datos()
-
-    page.title = "Agendamiento de Citas Médicas - Paciente"
-    page.theme_mode = ft.ThemeMode.LIGHT
-    page.window_width = 900
-    page.window_height = 600
-    page.window_resizable = True
-    page.padding = 20
-
-    # 1) OBTENER DATOS DEL USUARIO (se espera foto como séptimo valor)
-    user_data = obtener_usuario(user_id)
-    if user_data:
-        if len(user_data) == 7:
-            nombres, apellidos, email, telefono, cedula, tipo_usuario, photo = user_data
-        else:
-            nombres, apellidos, email, telefono, cedula, tipo_usuario = user_data
-            photo = None
-        primer_nombre = nombres.split()[0]
-        primer_apellido = apellidos.split()[0]
-    else:
-        nombres = apellidos = email = telefono = cedula = ""
-        tipo_usuario = "Paciente"
-        primer_nombre = "Usuario"
-        primer_apellido = ""
-        photo = None
-
-    now = dt.now()
-    bienvenida = ft.Text(
-        f"Bienvenido, {primer_nombre} {primer_apellido}\n{now.strftime('%d/%m/%Y %H:%M')}",
-        size=18,
-        weight=ft.FontWeight.BOLD,
-        color="#0D47A1",
-        text_align=ft.TextAlign.CENTER
-    )
-
-    # 2) FUNCIONES DE DIÁLOGOS COMUNES
-    def close_dialog(dlg: ft.AlertDialog):
-        dlg.open = False
-        page.update()
-
-    # 3) DIÁLOGOS DE CONFIGURACIÓN
-    def cambiar_contrasena_dialog(_):
-        current_pw = ft.TextField(label="Contraseña Actual", password=True, can_reveal_password=True)
-        new_pw = ft.TextField(label="Contraseña Nueva", password=True, can_reveal_password=True)
-        conf_pw = ft.TextField(label="Confirmar Contraseña", password=True, can_reveal_password=True)
-        msg = ft.Text(color="red")
-
-        req_length  = ft.Text("● Mínimo 8 caracteres", color="red", size=12)
-        req_upper   = ft.Text("● Al menos 1 mayúscula", color="red", size=12)
-        req_digit   = ft.Text("● Al menos 1 dígito", color="red", size=12)
-        req_special = ft.Text("● Al menos 1 símbolo (@$!%*?&)", color="red", size=12)
-
-        password_requirements = ft.Column(
-            [
-                ft.Text("Requisitos de la nueva contraseña:", weight=ft.FontWeight.BOLD, size=13),
-                req_length,
-                req_upper,
-                req_digit,
-                req_special
-            ],
-            spacing=2
-        )
-
-        def update_newpw_requirements(_):
-            pw = new_pw.value or ""
-            req_length.color  = "green" if len(pw) >= 8 else "red"
-            req_upper.color   = "green" if any(c.isupper() for c in pw) else "red"
-            req_digit.color   = "green" if any(c.isdigit() for c in pw) else "red"
-            req_special.color = "green" if any(c in "@$!%*?&" for c in pw) else "red"
-            page.update()
-
-        new_pw.on_change = update_newpw_requirements
-
-        def intentar_cambiar():
-            pw_current = current_pw.value or ""
-            pw_new = new_pw.value or ""
-            pw_conf = conf_pw.value or ""
-            if not pw_current or not pw_new or not pw_conf:
-                msg.value = "Todos los campos son obligatorios."
-                page.update()
-                return
-            if pw_new == pw_current:
-                msg.value = "La contraseña nueva no puede ser la misma que la actual."
-                page.update()
-                return
-
-            import re
-            if not re.match(r'^(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&]).{8,}$', pw_new):
-                msg.value = "La nueva contraseña no cumple los requisitos."
-                page.update()
-                return
-
-            if pw_new != pw_conf:
-                msg.value = "La confirmación no coincide."
-                page.update()
-                return
-
-            ok, respuesta = cambiar_contrasena(user_id, pw_current, pw_new)
-            if ok:
-                page.snack_bar = ft.SnackBar(ft.Text(respuesta, color="white"), bgcolor="green")
-                dialog.open = False
-            else:
-                msg.value = respuesta
-                page.snack_bar = ft.SnackBar(ft.Text("Error al cambiar la contraseña", color="white"), bgcolor="red")
-            page.snack_bar.open = True
-            page.update()
-
-        def confirmar_cambio(_):
-            intentar_cambiar()
-
-        def close_dialog_btn(_):
-            dialog.open = False
-            page.update()
-
-        dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Cambiar Contraseña"),
-            content=ft.Column([current_pw, new_pw, conf_pw, password_requirements, msg], tight=True),
-            actions=[ft.TextButton("Cancelar", on_click=close_dialog_btn),
-                     ft.ElevatedButton("Guardar", on_click=confirmar_cambio)],
-            actions_alignment="end"
-        )
-
-        if dialog not in page.overlay:
-            page.overlay.append(dialog)
-        dialog.open = True
-        page.update()
-
-    def actualizar_datos_dialog(_):
-        nombres_field = ft.TextField(label="Nombres", value=nombres)
-        apellidos_field = ft.TextField(label="Apellidos", value=apellidos)
-        email_field = ft.TextField(label="Correo", value=email)
-        telefono_field = ft.TextField(label="Teléfono (10 dígitos)", value=telefono)
-        msg = ft.Text(color="red")
-
-        def intentar_actualizar():
-            n = nombres_field.value.strip()
-            a = apellidos_field.value.strip()
-            em = email_field.value.strip()
-            tel = telefono_field.value.strip()
-            if not n or not a or not em or not tel:
-                msg.value = "Ningún campo puede quedar vacío."
-                page.update()
-                return
-            ok, respuesta = actualizar_datos_usuario(user_id, n, a, em, tel)
-            if ok:
-                page.snack_bar = ft.SnackBar(ft.Text(respuesta, color="white"), bgcolor="green")
-                dialog.open = False
-                nonlocal nombres, apellidos, email, telefono, primer_nombre, primer_apellido
-                nombres = n
-                apellidos = a
-                email = em
-                telefono = tel
-                primer_nombre = n.split()[0]
-                primer_apellido = a.split()[0]
-                bienvenida.value = f"Bienvenido, {primer_nombre} {primer_apellido}\n{dt.now().strftime('%d/%m/%Y %H:%M')}"
-            else:
-                msg.value = respuesta
-            page.snack_bar.open = True
-            page.update()
-
-        def confirmar_actualizacion(_):
-            intentar_actualizar()
-
-        def close_dialog_btn(_):
-            dialog.open = False
-            page.update()
-
-        dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Actualizar Datos"),
-            content=ft.Column([nombres_field, apellidos_field, email_field, telefono_field, msg], tight=True),
-            actions=[ft.TextButton("Cancelar", on_click=close_dialog_btn),
-                     ft.ElevatedButton("Guardar", on_click=confirmar_actualizacion)],
-            actions_alignment="end"
-        )
-
-        if dialog not in page.overlay:
-            page.overlay.append(dialog)
-        dialog.open = True
-        page.update()
-
-    def cerrar_sesion_dialog(_):
-        def do_cerrar_sesion(_2):
-            dialog.open = False
-            page.update()
-            page.clean()
-            import login_flet
-            login_flet.main(page)
-        def cancel_cerrar(_2):
-            dialog.open = False
-            page.update()
-        dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Cerrar Sesión"),
-            content=ft.Text("¿Está seguro que desea cerrar sesión?"),
-            actions=[ft.TextButton("No", on_click=cancel_cerrar),
-                     ft.ElevatedButton("Sí", on_click=do_cerrar_sesion, bgcolor="red", color="white")],
-            actions_alignment="end"
-        )
-        if dialog not in page.overlay:
-            page.overlay.append(dialog)
-        dialog.open = True
-        page.update()
-
-    # Menú de configuración con avatar circular (foto o ícono por defecto)
-    def abrir_config_dialog(_):
-        def btn_cambiar_contrasena(_2):
-            config_dialog.open = False
-            page.update()
-            cambiar_contrasena_dialog(_2)
-        def btn_actualizar_datos(_2):
-            config_dialog.open = False
-            page.update()
-            actualizar_datos_dialog(_2)
-        def btn_cerrar_sesion(_2):
-            config_dialog.open = False
-            page.update()
-            cerrar_sesion_dialog(_2)
-        def btn_cancelar(_2):
-            config_dialog.open = False
-            page.update()
-        avatar = ft.Container(
-            content=ft.Image(
-                src_base64=photo, 
-                width=80, 
-                height=80, 
-                fit=ft.ImageFit.COVER
-            ) if photo else ft.Icon(ft.icons.ACCOUNT_CIRCLE, size=80),
-            border_radius=40,
-            clip_behavior=ft.ClipBehavior.ANTI_ALIAS,
-            alignment=ft.alignment.center
-        )
-        content = ft.Column(
-            controls=[
-                avatar,
-                ft.Divider(),
-                ft.ElevatedButton("🔒 Cambiar Contraseña", on_click=btn_cambiar_contrasena),
-                ft.ElevatedButton("✏️ Actualizar Datos", on_click=btn_actualizar_datos),
-                ft.ElevatedButton("🚪 Cerrar Sesión", on_click=btn_cerrar_sesion)
-            ],
-            tight=True,
-            spacing=10,
-            alignment=ft.MainAxisAlignment.CENTER
-        )
-        config_dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Configuración"),
-            content=content,
-            actions=[ft.TextButton("Cerrar", on_click=btn_cancelar)],
-            actions_alignment="end"
-        )
-        if config_dialog not in page.overlay:
-            page.overlay.append(config_dialog)
-        config_dialog.open = True
-        page.update()
-
-    # 4) FUNCIONES DE NOTIFICACIONES
-    def show_notifications(e):
-        import notificaciones_paciente
-        notificaciones_paciente.generar_notificaciones(user_id)
-        notifs = notificaciones_paciente.obtener_notificaciones(user_id)
-        notif_controls = []
-        if not notifs:
-            notif_controls.append(ft.Text("No hay notificaciones."))
-        else:
-            for notif in notifs:
-                notif_id = notif["id"]
-                def mark_read(e, notif_id=notif_id):
-                    notificaciones_paciente.marcar_notificacion_leida(notif_id)
-                    show_notifications(e)
-                def delete_notif(e, notif_id=notif_id):
-                    notificaciones_paciente.eliminar_notificacion(notif_id)
-                    show_notifications(e)
-                row = ft.Row(
-                    controls=[
-                        ft.Text(notif["message"], expand=True),
-                        ft.IconButton(icon=ft.icons.CHECK, tooltip="Marcar como leído", on_click=mark_read, icon_color="green"),
-                        ft.IconButton(icon=ft.icons.DELETE, tooltip="Eliminar notificación", on_click=delete_notif, icon_color="red")
-                    ],
-                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN
-                )
-                notif_controls.append(row)
-        def close_notif_dialog(e):
-            notif_dialog.open = False
-            page.update()
-        notif_dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Notificaciones"),
-            content=ft.Container(
-                content=ft.Column(notif_controls, spacing=10, scroll=ft.ScrollMode.AUTO),
-                height=300
-            ),
-            actions=[ft.TextButton("Cerrar", on_click=close_notif_dialog)],
-            actions_alignment="end"
-        )
-        if notif_dialog not in page.overlay:
-            page.overlay.append(notif_dialog)
-        notif_dialog.open = True
-        page.update()
-
-    def update_notification_badge():
-        import notificaciones_paciente
-        notificaciones_paciente.generar_notificaciones(user_id)
-        notifs = notificaciones_paciente.obtener_notificaciones(user_id)
-        count = len([n for n in notifs if n["leido"] == 0])
-        badge_text = str(count) if count > 0 else ""
-        badge_container.content.value = badge_text
-        badge_container.visible = True if count > 0 else False
-        page.update()
-    import threading
-    def periodic_update():
-        update_notification_badge()
-        threading.Timer(10, periodic_update).start()  # Actualiza cada 10 segundos
-
-    # 5) ÍCONOS DE CAMPANITA Y CONFIGURACIÓN (CABECERA)
-    bell_icon_button = ft.IconButton(
-        icon=ft.icons.NOTIFICATIONS,
-        tooltip="Notificaciones",
-        on_click=show_notifications,
-        icon_color="blue"
-    )
-    badge_container = ft.Container(
-        content=ft.Text("", color="white", size=10),
-        bgcolor="red",
-        border_radius=10,
-        padding=ft.Padding(2, 2, 2, 2),
-        alignment=ft.alignment.center,
-        visible=False,
-        width=20,
-        height=20
-    )
-    bell_stack = ft.Stack(
-        controls=[
-            bell_icon_button,
-            ft.Container(content=badge_container, alignment=ft.alignment.top_right)
-        ]
-    )
-    update_notification_badge()
-
-    menu_config_btn = ft.IconButton(
-        icon=ft.icons.SETTINGS,
-        tooltip="Configuración",
-        on_click=abrir_config_dialog,
-        icon_color="blue"
-    )
-
-    # 6) BLOQUE SUPERIOR: BIENVENIDA + ÍCONOS
-    bloque_1 = ft.Container(
-        content=ft.Row(
-            controls=[
-                bienvenida,
-                ft.Row(controls=[bell_stack, menu_config_btn], spacing=10)
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_BETWEEN
-        ),
-        padding=15,
-        border=ft.border.all(1, "#aaa"),
-        border_radius=10,
-        bgcolor="#E3F2FD"
-    )
-
-    # 7) BLOQUE 2: PANEL DE AGENDAMIENTO DE CITA
-    especialidades = [
-        (1, "Medicina General"),
-        (2, "Medicina Familiar"),
-        (3, "Odontología"),
-        (4, "Obstetricia"),
-        (5, "Ginecología")
-    ]
-    especialidad_dropdown = ft.Dropdown(
-        label="Especialidad",
-        options=[ft.dropdown.Option(text=esp[1], key=str(esp[0])) for esp in especialidades],
-        expand=True
-    )
-    medico_dropdown = ft.Dropdown(label="Médico", options=[], expand=True)
-    hora_dropdown = ft.Dropdown(label="Seleccione una hora", options=[], expand=True)
-
-    date_picker = ft.DatePicker(first_date=date.today())
-
-    def on_date_selected(_):
-        if date_picker.value:
-            fecha_picker_btn.text = f"Fecha: {date_picker.value.strftime('%d/%m/%Y')}"
-        page.update()
-
-    date_picker.on_change = on_date_selected
-
-    def open_date_picker(_):
-        date_picker.open = True
-        page.update()
-
-    fecha_picker_btn = ft.ElevatedButton("Seleccionar Fecha", on_click=open_date_picker)
-
-    def agendar_cita(_):
-        if (not especialidad_dropdown.value or 
-            not medico_dropdown.value or
-            date_picker.value is None or
-            not hora_dropdown.value):
-            page.snack_bar = ft.SnackBar(ft.Text("Complete todos los campos", color="white"), bgcolor="red")
-            page.snack_bar.open = True
-            page.update()
-            return
-        selected_date = date_picker.value
-        if selected_date == date.today():
-            now_time = dt.now().time()
-            selected_time = dt.strptime(hora_dropdown.value, "%H:%M").time()
-            if selected_time < now_time:
-                page.snack_bar = ft.SnackBar(ft.Text("No se puede agendar una cita en horas pasadas", color="white"), bgcolor="red")
-                page.snack_bar.open = True
-                page.update()
-                return
-        def do_agendar():
-            paciente_id = user_id
-            med_id = int(medico_dropdown.value)
-            fecha = selected_date.strftime("%Y-%m-%d")
-            hora = hora_dropdown.value
-            resultado, mensaje = registrar_cita(paciente_id, med_id, fecha, hora)
-            if resultado:
-                page.snack_bar = ft.SnackBar(ft.Text("¡Cita agendada con éxito! ✅", color="white"), bgcolor="green")
-            else:
-                page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="red")
-            page.snack_bar.open = True
-            actualizar_horas(None)
-            bloque_3_refrescar_calendario()
-            page.update()
-        def on_confirm_agendar():
-            do_agendar()
-        dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Confirmar Agendamiento"),
-            content=ft.Text("¿Está seguro que desea agendar esta cita?"),
-            actions=[
-                ft.TextButton("Cancelar", on_click=lambda _: close_dialog(dialog)),
-                ft.ElevatedButton("Agendar", on_click=lambda _: [close_dialog(dialog), on_confirm_agendar()], bgcolor="blue", color="white")
-            ],
-            actions_alignment="end"
-        )
-        if dialog not in page.overlay:
-            page.overlay.append(dialog)
-        dialog.open = True
-        page.update()
-
-    botones_accion = ft.Row(
-        controls=[
-            ft.ElevatedButton("Agendar", on_click=agendar_cita, bgcolor="#1976D2", color="white"),
-            ft.OutlinedButton("Cancelar"),
-            ft.OutlinedButton("Limpiar")
-        ],
-        spacing=10
-    )
-
-    bloque_2 = ft.Container(
-        content=ft.Column(
-            controls=[
-                ft.Text("Seleccione una especialidad:", size=14, weight=ft.FontWeight.BOLD),
-                especialidad_dropdown,
-                ft.Text("Seleccione un médico:", size=14, weight=ft.FontWeight.BOLD),
-                medico_dropdown,
-                ft.Text("Seleccione la fecha de la cita:", size=14, weight=ft.FontWeight.BOLD),
-                fecha_picker_btn,
-                ft.Text("Seleccione la hora disponible:", size=14, weight=ft.FontWeight.BOLD),
-                hora_dropdown,
-                botones_accion
-            ],
-            spacing=10
-        ),
-        padding=15,
-        border=ft.border.all(1, "#aaa"),
-        border_radius=10,
-        bgcolor="#FFF3E0",
-        width=350
-    )
-
-    # 8) FUNCIÓN PARA EDITAR CITA (CAMBIAR FECHA Y HORA)
-    def editar_cita_dialog(cita_info):
-        msg_edit = ft.Text("", color="red")
-        edit_date_picker = ft.DatePicker(value=cita_info["fecha"], first_date=date.today())
-        selected_date_text = ft.Text(value=cita_info["fecha"].strftime("%d/%m/%Y"), size=14)
-        def open_edit_date_picker(_):
-            edit_date_picker.open = True
-            page.update()
-        select_date_btn = ft.ElevatedButton("Seleccionar nueva fecha", on_click=open_edit_date_picker)
-        def update_edit_horas(_):
-            if not edit_date_picker.value:
-                return
-            med_id = cita_info["medico_id"]
-            fecha_str = edit_date_picker.value.strftime("%Y-%m-%d")
-            generar_horarios_disponibles(med_id, fecha_str)
-            horarios = obtener_horarios_disponibles(med_id, fecha_str)
-            if edit_date_picker.value == date.today():
-                now_time = dt.now().time()
-                horarios = [h for h in horarios if dt.strptime(h[1], "%H:%M").time() > now_time]
-            new_time_dropdown.options = [ft.dropdown.Option(text=h[1], key=h[1]) for h in horarios]
-            if any(h[1] == cita_info["hora"] for h in horarios):
-                new_time_dropdown.value = cita_info["hora"]
-            else:
-                new_time_dropdown.value = None
-            page.update()
-        edit_date_picker.on_change = lambda e: (
-            selected_date_text.__setattr__("value", edit_date_picker.value.strftime("%d/%m/%Y")),
-            update_edit_horas(e),
-            page.update()
-        )
-        new_time_dropdown = ft.Dropdown(label="Seleccione la hora disponible", options=[], expand=True)
-        update_edit_horas(None)
-        def guardar_edicion(_):
-            if not edit_date_picker.value or not new_time_dropdown.value:
-                msg_edit.value = "Debe seleccionar fecha y hora."
-                page.update()
-                return
-            new_fecha_str = edit_date_picker.value.strftime("%Y-%m-%d")
-            cita_id = cita_info["cita_id"]
-            ok, res = editar_cita(cita_id, new_fecha_str, new_time_dropdown.value)
-            if ok:
-                page.snack_bar = ft.SnackBar(ft.Text(res, color="white"), bgcolor="green")
-                edit_dialog.open = False
-                bloque_3_refrescar_calendario()
-            else:
-                msg_edit.value = res
-            page.snack_bar.open = True
-            page.update()
-        edit_dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Editar Cita"),
-            content=ft.Column([
-                ft.Text("Seleccione nueva fecha:", size=14, weight=ft.FontWeight.BOLD),
-                ft.Row([select_date_btn, selected_date_text], spacing=10),
-                ft.Text("Seleccione nueva hora:", size=14, weight=ft.FontWeight.BOLD),
-                new_time_dropdown,
-                msg_edit
-            ], spacing=10),
-            actions=[ft.TextButton("Cancelar", on_click=lambda _: close_dialog(edit_dialog)),
-                     ft.ElevatedButton("Guardar Cambios", on_click=guardar_edicion, bgcolor="blue", color="white")],
-            actions_alignment="end"
-        )
-        if edit_dialog not in page.overlay:
-            page.overlay.append(edit_dialog)
-        edit_dialog.open = True
-        if edit_date_picker not in page.overlay:
-            page.overlay.append(edit_date_picker)
-        page.update()
-
-    # 9) BLOQUE 3: CALENDARIO DE CITAS
-    today = date.today()
-    current_year = today.year
-    current_month = today.month
-    def bloque_3_refrescar_calendario():
-        nuevo_cal = crear_calendario(current_year, current_month)
-        bloque_3.content.controls[1] = nuevo_cal
-        page.update()
-    def anterior_mes(_):
-        nonlocal current_year, current_month
-        current_month -= 1
-        if current_month < 1:
-            current_month = 12
-            current_year -= 1
-        bloque_3_refrescar_calendario()
-    def siguiente_mes(_):
-        nonlocal current_year, current_month
-        current_month += 1
-        if current_month > 12:
-            current_month = 1
-            current_year += 1
-        bloque_3_refrescar_calendario()
-    def crear_calendario(year: int, month: int) -> ft.Column:
-        citas_paciente = obtener_citas_paciente(user_id)
-        citas_dict = {}
-        for c in citas_paciente:
-            cita_id, fecha_str, especialidad, medico, hora, medico_id = c
-            cita_date = dt.strptime(fecha_str, "%Y-%m-%d").date()
-            if cita_date.year == year and cita_date.month == month:
-                citas_dict.setdefault(cita_date.day, []).append({
-                    "cita_id": cita_id,
-                    "especialidad": especialidad,
-                    "medico": medico,
-                    "fecha": cita_date,
-                    "hora": hora,
-                    "medico_id": medico_id
-                })
-        dias_semana = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
-        header = [ft.Container(content=ft.Text(d, weight="bold", size=12), alignment=ft.alignment.center, width=40, height=40) for d in dias_semana]
-        cells = []
-        first_weekday, num_days = calendar.monthrange(year, month)
-        for _ in range(first_weekday):
-            cells.append(ft.Container(width=40, height=40))
-        for day in range(1, num_days + 1):
-            bg_color = "#a5d6a7" if day in citas_dict else "white"
-            def on_click_dia(selected_day=day):
-                def _handle_click(_):
-                    if selected_day not in citas_dict:
-                        return
-                    citas_del_dia = citas_dict[selected_day]
-                    filas_citas = []
-                    for cita_info in citas_del_dia:
-                        detalle_str = f"Especialidad: {cita_info['especialidad']}\nMédico: {cita_info['medico']}\nFecha: {cita_info['fecha'].strftime('%d/%m/%Y')}\nHora: {cita_info['hora']}"
-                        def on_cancel_btn(ci=cita_info):
-                            def _cancel(_2):
-                                def do_cancel():
-                                    fecha_str = ci['fecha'].strftime("%Y-%m-%d")
-                                    ok, mensaje = cancelar_cita(user_id, ci["medico_id"], fecha_str, ci["hora"])
-                                    if ok:
-                                        page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="green")
-                                    else:
-                                        page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="red")
-                                    page.snack_bar.open = True
-                                    detalle_dialog.open = False
-                                    bloque_3_refrescar_calendario()
-                                    page.update()
-                                confirm_dialog = ft.AlertDialog(
-                                    modal=True,
-                                    title=ft.Text("Cancelar Cita"),
-                                    content=ft.Text(f"¿Está seguro que desea cancelar esta cita de las {ci['hora']}?"),
-                                    actions=[ft.TextButton("No", on_click=lambda _: close_dialog(confirm_dialog)),
-                                             ft.ElevatedButton("Sí", on_click=lambda _: [close_dialog(confirm_dialog), do_cancel()], bgcolor="red", color="white")],
-                                    actions_alignment="end"
-                                )
-                                if confirm_dialog not in page.overlay:
-                                    page.overlay.append(confirm_dialog)
-                                confirm_dialog.open = True
-                                page.update()
-                            return _cancel
-                        def on_edit_btn(ci=cita_info):
-                            def _edit(_):
-                                editar_cita_dialog(ci)
-                            return _edit
-                        buttons_row = ft.Row(
-                            controls=[
-                                ft.ElevatedButton("Editar", on_click=on_edit_btn(cita_info), bgcolor="blue", color="white"),
-                                ft.ElevatedButton("Cancelar", on_click=on_cancel_btn(cita_info), bgcolor="red", color="white")
-                            ],
-                            spacing=5
-                        )
-                        cita_container = ft.Container(
-                            content=ft.Column([ft.Text(detalle_str, size=13), buttons_row], spacing=5, width=240),
-                            padding=5,
-                            bgcolor="#EEEEEE",
-                            border_radius=5
-                        )
-                        filas_citas.append(cita_container)
-                    def cerrar_dialogo(_2):
-                        detalle_dialog.open = False
-                        page.update()
-                    detalle_dialog = ft.AlertDialog(
-                        modal=True,
-                        title=ft.Text(f"Citas del {selected_day}/{month}/{year}"),
-                        content=ft.Container(content=ft.ListView(controls=filas_citas, spacing=10), height=300),
-                        actions=[ft.TextButton("Cerrar", on_click=cerrar_dialogo)],
-                        actions_alignment="end"
-                    )
-                    if detalle_dialog not in page.overlay:
-                        page.overlay.append(detalle_dialog)
-                    detalle_dialog.open = True
-                    page.update()
-                return _handle_click
-            cell = ft.ElevatedButton(
-                text=str(day),
-                on_click=on_click_dia(day),
-                width=40,
-                height=40,
-                bgcolor=bg_color
-            )
-            cells.append(cell)
-        while len(cells) % 7 != 0:
-            cells.append(ft.Container(width=40, height=40))
-        grid = ft.GridView(expand=True, runs_count=7, spacing=5, run_spacing=5, controls=header + cells)
-        month_name = calendar.month_name[month]
-        nav_row = ft.Row([
-            ft.IconButton(ft.icons.CHEVRON_LEFT, on_click=anterior_mes),
-            ft.Text(f"{month_name} {year}", size=16, weight=ft.FontWeight.BOLD),
-            ft.IconButton(ft.icons.CHEVRON_RIGHT, on_click=siguiente_mes)
-        ], alignment=ft.MainAxisAlignment.CENTER)
-        return ft.Column([nav_row, ft.Container(content=grid, width=350, height=350, alignment=ft.alignment.center, padding=10, border=ft.border.all(1, "#aaa"), border_radius=10, bgcolor="#FFFDE7")], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
-    calendario_widget = crear_calendario(current_year, current_month)
-    bloque_3 = ft.Container(
-        content=ft.Column([ft.Text("Calendario de Citas", size=20, weight=ft.FontWeight.BOLD, color="#1B5E20"), calendario_widget],
-                          alignment="center", horizontal_alignment="center", spacing=10, expand=True),
-        padding=15,
-        border=ft.border.all(1, "#aaa"),
-        border_radius=10,
-        bgcolor="#E8F5E9",
-        expand=True
-    )
-    layout = ft.Column([bloque_1, ft.Row([bloque_2, bloque_3], spacing=15, expand=True)], spacing=20, expand=True)
-    page.add(layout)
-    page.overlay.append(date_picker)
-    page.update()
-
-    def actualizar_medicos(_):
-        if not especialidad_dropdown.value:
-            return
-        esp_id = int(especialidad_dropdown.value)
-        medicos = obtener_medicos(esp_id)
-        medico_dropdown.options = [ft.dropdown.Option(text=m[1], key=str(m[0])) for m in medicos]
-        medico_dropdown.value = None
-        page.update()
-    especialidad_dropdown.on_change = actualizar_medicos
-
-    def actualizar_horas(_):
-        if not medico_dropdown.value or date_picker.value is None:
-            return
-        med_id = int(medico_dropdown.value)
-        fecha_str = date_picker.value.strftime("%Y-%m-%d")
-        generar_horarios_disponibles(med_id, fecha_str)
-        horarios = obtener_horarios_disponibles(med_id, fecha_str)
-        if date_picker.value == date.today():
-            now_time = dt.now().time()
-            horarios = [h for h in horarios if dt.strptime(h[1], "%H:%M").time() > now_time]
-        hora_dropdown.options = [ft.dropdown.Option(text=h[1], key=h[1]) for h in horarios]
-        hora_dropdown.value = None
-        page.update()
-    def on_date_change(_):
-        on_date_selected(_)
-        actualizar_horas(_)
-    periodic_update()
-
-    date_picker.on_change = on_date_change
-    medico_dropdown.on_change = actualizar_horas
+import flet as ft
+import datetime
+from datetime import datetime as dt, timedelta, date
+import calendar
+import threading
+import time
+import notificaciones_paciente
+import eventos_notificaciones
+import ejecutor_bd
+from tareas_programadas import TareaPeriodica
+
+# La campanita se actualiza por eventos; cada cierto tiempo se vuelve a contar en la base por si otro
+# proceso escribió notificaciones para el usuario.
+INTERVALO_RESINCRONIZACION_BADGE = 120
+NOTIFICACIONES_POR_PAGINA = 30
+# Los meses del calendario se guardan por sesión; pasado este tiempo se vuelven a leer por si el médico
+# cambió alguna cita (agendar, cancelar o editar desde esta sesión los invalida de inmediato).
+VIGENCIA_MES_CALENDARIO = 300
+
+from bd_medica import (
+    crear_base_de_datos,
+    obtener_especialidades,
+    obtener_medicos,
+    obtener_horarios_disponibles,
+    buscar_proxima_disponibilidad,
+    registrar_cita,
+    obtener_perfil_usuario,
+    obtener_foto_usuario,
+    actualizar_datos_usuario,
+    cambiar_contrasena,
+    obtener_citas_paciente_mes,
+    cancelar_cita,
+    editar_cita,
+    DIAS_PREGENERACION
+)
+
+def main(page: ft.Page, user_id: int):
+    # Identifica las tareas de esta sesión en el ejecutor de la base (ver ejecutor_bd).
+    sesion = id(page)
+    # Asegurarse de que la base de datos y las tablas existan
+    crear_base_de_datos()
+
+    page.title = "Agendamiento de Citas Médicas - Paciente"
+    page.theme_mode = ft.ThemeMode.LIGHT
+    page.window_width = 900
+    page.window_height = 600
+    page.window_resizable = True
+    page.padding = 20
+
+    # 1) OBTENER DATOS DEL USUARIO (la foto se pide al abrir la configuración)
+    user_data = obtener_perfil_usuario(user_id)
+    if user_data:
+        nombres, apellidos, email, telefono, cedula, tipo_usuario = user_data
+        primer_nombre = nombres.split()[0]
+        primer_apellido = apellidos.split()[0]
+    else:
+        nombres = apellidos = email = telefono = cedula = ""
+        tipo_usuario = "Paciente"
+        primer_nombre = "Usuario"
+        primer_apellido = ""
+
+    now = dt.now()
+    bienvenida = ft.Text(
+        f"Bienvenido, {primer_nombre} {primer_apellido}\n{now.strftime('%d/%m/%Y %H:%M')}",
+        size=18,
+        weight=ft.FontWeight.BOLD,
+        color="#0D47A1",
+        text_align=ft.TextAlign.CENTER
+    )
+
+    # 2) FUNCIONES DE DIÁLOGOS COMUNES
+    def close_dialog(dlg: ft.AlertDialog):
+        dlg.open = False
+        page.update()
+
+    def mostrar_error_bd(error):
+        """al_fallar de las tareas del ejecutor: avisa del error sin cerrar la sesión."""
+        page.snack_bar = ft.SnackBar(ft.Text(f"Error al consultar la base de datos: {error}", color="white"), bgcolor="red")
+        page.snack_bar.open = True
+        page.update()
+
+    # 3) DIÁLOGOS DE CONFIGURACIÓN
+    def cambiar_contrasena_dialog(_):
+        current_pw = ft.TextField(label="Contraseña Actual", password=True, can_reveal_password=True)
+        new_pw = ft.TextField(label="Contraseña Nueva", password=True, can_reveal_password=True)
+        conf_pw = ft.TextField(label="Confirmar Contraseña", password=True, can_reveal_password=True)
+        msg = ft.Text(color="red")
+
+        req_length  = ft.Text("● Mínimo 8 caracteres", color="red", size=12)
+        req_upper   = ft.Text("● Al menos 1 mayúscula", color="red", size=12)
+        req_digit   = ft.Text("● Al menos 1 dígito", color="red", size=12)
+        req_special = ft.Text("● Al menos 1 símbolo (@$!%*?&)", color="red", size=12)
+
+        password_requirements = ft.Column(
+            [
+                ft.Text("Requisitos de la nueva contraseña:", weight=ft.FontWeight.BOLD, size=13),
+                req_length,
+                req_upper,
+                req_digit,
+                req_special
+            ],
+            spacing=2
+        )
+
+        def update_newpw_requirements(_):
+            pw = new_pw.value or ""
+            req_length.color  = "green" if len(pw) >= 8 else "red"
+            req_upper.color   = "green" if any(c.isupper() for c in pw) else "red"
+            req_digit.color   = "green" if any(c.isdigit() for c in pw) else "red"
+            req_special.color = "green" if any(c in "@$!%*?&" for c in pw) else "red"
+            page.update()
+
+        new_pw.on_change = update_newpw_requirements
+
+        def intentar_cambiar():
+            pw_current = current_pw.value or ""
+            pw_new = new_pw.value or ""
+            pw_conf = conf_pw.value or ""
+            if not pw_current or not pw_new or not pw_conf:
+                msg.value = "Todos los campos son obligatorios."
+                page.update()
+                return
+            if pw_new == pw_current:
+                msg.value = "La contraseña nueva no puede ser la misma que la actual."
+                page.update()
+                return
+
+            import re
+            if not re.match(r'^(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&]).{8,}$', pw_new):
+                msg.value = "La nueva contraseña no cumple los requisitos."
+                page.update()
+                return
+
+            if pw_new != pw_conf:
+                msg.value = "La confirmación no coincide."
+                page.update()
+                return
+
+            def al_cambiar(resultado):
+                ok, respuesta = resultado
+                if ok:
+                    page.snack_bar = ft.SnackBar(ft.Text(respuesta, color="white"), bgcolor="green")
+                    dialog.open = False
+                else:
+                    msg.value = respuesta
+                    page.snack_bar = ft.SnackBar(ft.Text("Error al cambiar la contraseña", color="white"), bgcolor="red")
+                page.snack_bar.open = True
+                page.update()
+            ejecutor_bd.ejecutar(cambiar_contrasena, user_id, pw_current, pw_new,
+                                 al_terminar=al_cambiar, al_fallar=mostrar_error_bd, grupo=sesion)
+
+        def confirmar_cambio(_):
+            intentar_cambiar()
+
+        def close_dialog_btn(_):
+            dialog.open = False
+            page.update()
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Cambiar Contraseña"),
+            content=ft.Column([current_pw, new_pw, conf_pw, password_requirements, msg], tight=True),
+            actions=[ft.TextButton("Cancelar", on_click=close_dialog_btn),
+                     ft.ElevatedButton("Guardar", on_click=confirmar_cambio)],
+            actions_alignment="end"
+        )
+
+        if dialog not in page.overlay:
+            page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    def actualizar_datos_dialog(_):
+        nombres_field = ft.TextField(label="Nombres", value=nombres)
+        apellidos_field = ft.TextField(label="Apellidos", value=apellidos)
+        email_field = ft.TextField(label="Correo", value=email)
+        telefono_field = ft.TextField(label="Teléfono (10 dígitos)", value=telefono)
+        msg = ft.Text(color="red")
+
+        def intentar_actualizar():
+            n = nombres_field.value.strip()
+            a = apellidos_field.value.strip()
+            em = email_field.value.strip()
+            tel = telefono_field.value.strip()
+            if not n or not a or not em or not tel:
+                msg.value = "Ningún campo puede quedar vacío."
+                page.update()
+                return
+            def al_actualizar(resultado):
+                nonlocal nombres, apellidos, email, telefono, primer_nombre, primer_apellido
+                ok, respuesta = resultado
+                if ok:
+                    page.snack_bar = ft.SnackBar(ft.Text(respuesta, color="white"), bgcolor="green")
+                    dialog.open = False
+                    nombres = n
+                    apellidos = a
+                    email = em
+                    telefono = tel
+                    primer_nombre = n.split()[0]
+                    primer_apellido = a.split()[0]
+                    bienvenida.value = f"Bienvenido, {primer_nombre} {primer_apellido}\n{dt.now().strftime('%d/%m/%Y %H:%M')}"
+                else:
+                    msg.value = respuesta
+                    page.snack_bar = ft.SnackBar(ft.Text("Error al actualizar los datos", color="white"), bgcolor="red")
+                page.snack_bar.open = True
+                page.update()
+            ejecutor_bd.ejecutar(actualizar_datos_usuario, user_id, n, a, em, tel,
+                                 al_terminar=al_actualizar, al_fallar=mostrar_error_bd, grupo=sesion)
+
+        def confirmar_actualizacion(_):
+            intentar_actualizar()
+
+        def close_dialog_btn(_):
+            dialog.open = False
+            page.update()
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Actualizar Datos"),
+            content=ft.Column([nombres_field, apellidos_field, email_field, telefono_field, msg], tight=True),
+            actions=[ft.TextButton("Cancelar", on_click=close_dialog_btn),
+                     ft.ElevatedButton("Guardar", on_click=confirmar_actualizacion)],
+            actions_alignment="end"
+        )
+
+        if dialog not in page.overlay:
+            page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    def cerrar_sesion_dialog(_):
+        def do_cerrar_sesion(_2):
+            dialog.open = False
+            page.update()
+            terminar_sesion()
+            page.clean()
+            import login_flet
+            login_flet.main(page)
+        def cancel_cerrar(_2):
+            dialog.open = False
+            page.update()
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Cerrar Sesión"),
+            content=ft.Text("¿Está seguro que desea cerrar sesión?"),
+            actions=[ft.TextButton("No", on_click=cancel_cerrar),
+                     ft.ElevatedButton("Sí", on_click=do_cerrar_sesion, bgcolor="red", color="white")],
+            actions_alignment="end"
+        )
+        if dialog not in page.overlay:
+            page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    # Menú de configuración con avatar circular (foto o ícono por defecto)
+    def abrir_config_dialog(_):
+        def btn_cambiar_contrasena(_2):
+            config_dialog.open = False
+            page.update()
+            cambiar_contrasena_dialog(_2)
+        def btn_actualizar_datos(_2):
+            config_dialog.open = False
+            page.update()
+            actualizar_datos_dialog(_2)
+        def btn_cerrar_sesion(_2):
+            config_dialog.open = False
+            page.update()
+            cerrar_sesion_dialog(_2)
+        def btn_cancelar(_2):
+            config_dialog.open = False
+            page.update()
+        # La foto se carga aparte (puede pesar cientos de KB): mientras tanto se muestra el ícono.
+        avatar = ft.Container(
+            content=ft.Icon(ft.icons.ACCOUNT_CIRCLE, size=80),
+            border_radius=40,
+            clip_behavior=ft.ClipBehavior.ANTI_ALIAS,
+            alignment=ft.alignment.center
+        )
+        content = ft.Column(
+            controls=[
+                avatar,
+                ft.Divider(),
+                ft.ElevatedButton("🔒 Cambiar Contraseña", on_click=btn_cambiar_contrasena),
+                ft.ElevatedButton("✏️ Actualizar Datos", on_click=btn_actualizar_datos),
+                ft.ElevatedButton("🚪 Cerrar Sesión", on_click=btn_cerrar_sesion)
+            ],
+            tight=True,
+            spacing=10,
+            alignment=ft.MainAxisAlignment.CENTER
+        )
+        config_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Configuración"),
+            content=content,
+            actions=[ft.TextButton("Cerrar", on_click=btn_cancelar)],
+            actions_alignment="end"
+        )
+        if config_dialog not in page.overlay:
+            page.overlay.append(config_dialog)
+        config_dialog.open = True
+        page.update()
+        def mostrar_foto(photo):
+            if photo and config_dialog.open:
+                avatar.content = ft.Image(src_base64=photo, width=80, height=80, fit=ft.ImageFit.COVER)
+                page.update()
+        ejecutor_bd.ejecutar(obtener_foto_usuario, user_id, "miniatura", al_terminar=mostrar_foto, clave=("foto", sesion), grupo=sesion)
+
+    # 4) FUNCIONES DE NOTIFICACIONES
+    def show_notifications(e):
+        import notificaciones_paciente
+        notif_columna = ft.Column([], spacing=10, scroll=ft.ScrollMode.AUTO)
+        notif_controls = notif_columna.controls
+        cursor_notif = None
+        ver_mas_btn = ft.TextButton("Ver más", visible=False)
+        filas_notif = {}  # notif_id -> (fila, botón de marcar leída, leída)
+
+        def marcar_fila_leida(notif_id):
+            fila, check_btn, _ = filas_notif[notif_id]
+            check_btn.visible = False
+            fila.controls[0].color = "grey"
+            filas_notif[notif_id] = (fila, check_btn, True)
+
+        def quitar_fila(notif_id):
+            fila, _, _ = filas_notif.pop(notif_id)
+            notif_controls.remove(fila)
+            if not filas_notif and not ver_mas_btn.visible:
+                notif_controls.insert(0, ft.Text("No hay notificaciones."))
+
+        def leer_pagina(before):
+            # Al abrir el diálogo se generan antes los recordatorios que falten.
+            if before is None:
+                notificaciones_paciente.generar_notificaciones(user_id)
+            return notificaciones_paciente.obtener_notificaciones(
+                user_id, limit=NOTIFICACIONES_POR_PAGINA + 1, before=before)
+
+        def cargar_pagina(e=None):
+            # Pide la siguiente página de notificaciones (de la más reciente a la más antigua).
+            ejecutor_bd.ejecutar(leer_pagina, cursor_notif, al_terminar=mostrar_pagina, al_fallar=mostrar_error_bd,
+                                 clave=("notificaciones", sesion), grupo=sesion)
+
+        def mostrar_pagina(notifs):
+            nonlocal cursor_notif
+            ver_mas_btn.visible = len(notifs) > NOTIFICACIONES_POR_PAGINA
+            notifs = notifs[:NOTIFICACIONES_POR_PAGINA]
+            if notifs:
+                cursor_notif = (notifs[-1]["fecha"], notifs[-1]["id"])
+            if ver_mas_btn in notif_controls:
+                notif_controls.remove(ver_mas_btn)
+            for notif in notifs:
+                notif_id = notif["id"]
+                def mark_read(e, notif_id=notif_id):
+                    def al_marcar(_):
+                        if notif_id in filas_notif:
+                            marcar_fila_leida(notif_id)
+                            page.update()
+                    ejecutor_bd.ejecutar(notificaciones_paciente.marcar_notificacion_leida, notif_id,
+                                         al_terminar=al_marcar, al_fallar=mostrar_error_bd, grupo=sesion)
+                def delete_notif(e, notif_id=notif_id):
+                    def al_eliminar(_):
+                        if notif_id in filas_notif:
+                            quitar_fila(notif_id)
+                            page.update()
+                    ejecutor_bd.ejecutar(notificaciones_paciente.eliminar_notificacion, notif_id,
+                                         al_terminar=al_eliminar, al_fallar=mostrar_error_bd, grupo=sesion)
+                check_btn = ft.IconButton(icon=ft.icons.CHECK, tooltip="Marcar como leído", on_click=mark_read, icon_color="green")
+                row = ft.Row(
+                    controls=[
+                        ft.Text(notif["message"], expand=True),
+                        check_btn,
+                        ft.IconButton(icon=ft.icons.DELETE, tooltip="Eliminar notificación", on_click=delete_notif, icon_color="red")
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+                )
+                notif_controls.append(row)
+                filas_notif[notif_id] = (row, check_btn, False)
+                if notif["leido"]:
+                    marcar_fila_leida(notif_id)
+            if not notif_controls:
+                notif_controls.append(ft.Text("No hay notificaciones."))
+            notif_controls.append(ver_mas_btn)
+            page.update()
+
+        ver_mas_btn.on_click = cargar_pagina
+        def marcar_todas(e):
+            def al_marcar(_):
+                for notif_id in list(filas_notif):
+                    marcar_fila_leida(notif_id)
+                page.update()
+            ejecutor_bd.ejecutar(notificaciones_paciente.marcar_todas_leidas, user_id,
+                                 al_terminar=al_marcar, al_fallar=mostrar_error_bd, grupo=sesion)
+        def eliminar_leidas(e):
+            leidas = [notif_id for notif_id, (_, _, leida) in filas_notif.items() if leida]
+            if leidas:
+                def al_eliminar(_):
+                    for notif_id in leidas:
+                        if notif_id in filas_notif:
+                            quitar_fila(notif_id)
+                    page.update()
+                ejecutor_bd.ejecutar(notificaciones_paciente.eliminar_notificaciones, leidas, usuario_id=user_id,
+                                     al_terminar=al_eliminar, al_fallar=mostrar_error_bd, grupo=sesion)
+        def close_notif_dialog(e):
+            notif_dialog.open = False
+            page.update()
+        notif_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Notificaciones"),
+            content=ft.Container(
+                content=notif_columna,
+                height=300
+            ),
+            actions=[ft.TextButton("Marcar todas como leídas", on_click=marcar_todas),
+                     ft.TextButton("Eliminar leídas", on_click=eliminar_leidas),
+                     ft.TextButton("Cerrar", on_click=close_notif_dialog)],
+            actions_alignment="end"
+        )
+        if notif_dialog not in page.overlay:
+            page.overlay.append(notif_dialog)
+        notif_dialog.open = True
+        page.update()
+        cargar_pagina()
+
+    def update_notification_badge(count):
+        badge_text = str(count) if count > 0 else ""
+        badge_container.content.value = badge_text
+        badge_container.visible = True if count > 0 else False
+        page.update()
+
+    # 5) ÍCONOS DE CAMPANITA Y CONFIGURACIÓN (CABECERA)
+    bell_icon_button = ft.IconButton(
+        icon=ft.icons.NOTIFICATIONS,
+        tooltip="Notificaciones",
+        on_click=show_notifications,
+        icon_color="blue"
+    )
+    badge_container = ft.Container(
+        content=ft.Text("", color="white", size=10),
+        bgcolor="red",
+        border_radius=10,
+        padding=ft.Padding(2, 2, 2, 2),
+        alignment=ft.alignment.center,
+        visible=False,
+        width=20,
+        height=20
+    )
+    bell_stack = ft.Stack(
+        controls=[
+            bell_icon_button,
+            ft.Container(content=badge_container, alignment=ft.alignment.top_right)
+        ]
+    )
+    notificaciones_paciente.generar_notificaciones(user_id)
+    suscripcion_notificaciones = eventos_notificaciones.suscribir(
+        user_id, update_notification_badge, notificaciones_paciente.contar_no_leidas(user_id))
+    update_notification_badge(suscripcion_notificaciones.no_leidas)
+    resincronizacion_badge = TareaPeriodica(
+        f"badge_notificaciones_{user_id}", INTERVALO_RESINCRONIZACION_BADGE,
+        lambda: suscripcion_notificaciones.sincronizar(notificaciones_paciente.contar_no_leidas(user_id))
+    ).iniciar()
+
+    def terminar_sesion():
+        """Deja de recibir eventos y detiene la resincronización de esta sesión."""
+        suscripcion_notificaciones.cancelar()
+        resincronizacion_badge.detener()
+        ejecutor_bd.cancelar_grupo(sesion)
+
+    page.on_disconnect = lambda e: terminar_sesion()
+
+    menu_config_btn = ft.IconButton(
+        icon=ft.icons.SETTINGS,
+        tooltip="Configuración",
+        on_click=abrir_config_dialog,
+        icon_color="blue"
+    )
+
+    # 6) BLOQUE SUPERIOR: BIENVENIDA + ÍCONOS
+    bloque_1 = ft.Container(
+        content=ft.Row(
+            controls=[
+                bienvenida,
+                ft.Row(controls=[bell_stack, menu_config_btn], spacing=10)
+            ],
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+        ),
+        padding=15,
+        border=ft.border.all(1, "#aaa"),
+        border_radius=10,
+        bgcolor="#E3F2FD"
+    )
+
+    # 7) BLOQUE 2: PANEL DE AGENDAMIENTO DE CITA
+    especialidades = obtener_especialidades()
+    especialidad_dropdown = ft.Dropdown(
+        label="Especialidad",
+        options=[ft.dropdown.Option(text=esp[1], key=str(esp[0])) for esp in especialidades],
+        expand=True
+    )
+    medico_dropdown = ft.Dropdown(label="Médico", options=[], expand=True)
+    hora_dropdown = ft.Dropdown(label="Seleccione una hora", options=[], expand=True)
+
+    # Los horarios se pregeneran en segundo plano solo hasta DIAS_PREGENERACION días adelante.
+    date_picker = ft.DatePicker(first_date=date.today(), last_date=date.today() + timedelta(days=DIAS_PREGENERACION))
+
+    def on_date_selected(_):
+        if date_picker.value:
+            fecha_picker_btn.text = f"Fecha: {date_picker.value.strftime('%d/%m/%Y')}"
+        page.update()
+
+    date_picker.on_change = on_date_selected
+
+    def open_date_picker(_):
+        date_picker.open = True
+        page.update()
+
+    fecha_picker_btn = ft.ElevatedButton("Seleccionar Fecha", on_click=open_date_picker)
+
+    def agendar_cita(_):
+        if (not especialidad_dropdown.value or 
+            not medico_dropdown.value or
+            date_picker.value is None or
+            not hora_dropdown.value):
+            page.snack_bar = ft.SnackBar(ft.Text("Complete todos los campos", color="white"), bgcolor="red")
+            page.snack_bar.open = True
+            page.update()
+            return
+        selected_date = date_picker.value
+        if selected_date == date.today():
+            now_time = dt.now().time()
+            selected_time = dt.strptime(hora_dropdown.value, "%H:%M").time()
+            if selected_time < now_time:
+                page.snack_bar = ft.SnackBar(ft.Text("No se puede agendar una cita en horas pasadas", color="white"), bgcolor="red")
+                page.snack_bar.open = True
+                page.update()
+                return
+        def do_agendar():
+            paciente_id = user_id
+            med_id = int(medico_dropdown.value)
+            fecha = selected_date.strftime("%Y-%m-%d")
+            hora = hora_dropdown.value
+            def al_agendar(respuesta):
+                resultado, mensaje = respuesta
+                if resultado:
+                    page.snack_bar = ft.SnackBar(ft.Text("¡Cita agendada con éxito! ✅", color="white"), bgcolor="green")
+                    invalidar_mes(selected_date)
+                else:
+                    page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="red")
+                page.snack_bar.open = True
+                actualizar_horas(None)
+                bloque_3_refrescar_calendario()
+                page.update()
+            ejecutor_bd.ejecutar(registrar_cita, paciente_id, med_id, fecha, hora, al_terminar=al_agendar,
+                                 al_fallar=mostrar_error_bd, grupo=sesion)
+        def on_confirm_agendar():
+            do_agendar()
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Confirmar Agendamiento"),
+            content=ft.Text("¿Está seguro que desea agendar esta cita?"),
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda _: close_dialog(dialog)),
+                ft.ElevatedButton("Agendar", on_click=lambda _: [close_dialog(dialog), on_confirm_agendar()], bgcolor="blue", color="white")
+            ],
+            actions_alignment="end"
+        )
+        if dialog not in page.overlay:
+            page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    # Muestra las próximas citas libres de la especialidad (de cualquier médico) para agendar con un clic.
+    def mostrar_proximas_disponibles(_):
+        if not especialidad_dropdown.value:
+            page.snack_bar = ft.SnackBar(ft.Text("Seleccione una especialidad", color="white"), bgcolor="red")
+            page.snack_bar.open = True
+            page.update()
+            return
+        def mostrar_turnos(turnos):
+            filas = []
+            if not turnos:
+                filas.append(ft.Text("No hay citas disponibles en los próximos días."))
+            for _, fecha_str, hora_str, med_id, medico in turnos:
+                def agendar_turno(_2, med_id=med_id, fecha_str=fecha_str, hora_str=hora_str):
+                    def al_agendar(respuesta):
+                        resultado, mensaje = respuesta
+                        if resultado:
+                            page.snack_bar = ft.SnackBar(ft.Text("¡Cita agendada con éxito! ✅", color="white"), bgcolor="green")
+                            proximas_dialog.open = False
+                            invalidar_mes(dt.strptime(fecha_str, "%Y-%m-%d").date())
+                        else:
+                            page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="red")
+                        page.snack_bar.open = True
+                        bloque_3_refrescar_calendario()
+                        page.update()
+                    ejecutor_bd.ejecutar(registrar_cita, user_id, med_id, fecha_str, hora_str, al_terminar=al_agendar,
+                                         al_fallar=mostrar_error_bd, grupo=sesion)
+                fecha_txt = dt.strptime(fecha_str, "%Y-%m-%d").strftime("%d/%m/%Y")
+                filas.append(ft.Row(
+                    controls=[
+                        ft.Text(f"{fecha_txt} {hora_str}\n{medico}", size=13, expand=True),
+                        ft.ElevatedButton("Agendar", on_click=agendar_turno, bgcolor="blue", color="white")
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+                ))
+            proximas_dialog = ft.AlertDialog(
+                modal=True,
+                title=ft.Text("Próximas citas disponibles"),
+                content=ft.Container(content=ft.Column(filas, spacing=10, scroll=ft.ScrollMode.AUTO), height=300),
+                actions=[ft.TextButton("Cerrar", on_click=lambda _: close_dialog(proximas_dialog))],
+                actions_alignment="end"
+            )
+            if proximas_dialog not in page.overlay:
+                page.overlay.append(proximas_dialog)
+            proximas_dialog.open = True
+            page.update()
+        ejecutor_bd.ejecutar(buscar_proxima_disponibilidad, int(especialidad_dropdown.value), limite=10,
+                             al_terminar=mostrar_turnos, al_fallar=mostrar_error_bd,
+                             clave=("proximas", sesion), grupo=sesion)
+
+    proximas_btn = ft.TextButton("Ver próximas citas disponibles", icon=ft.icons.SEARCH, on_click=mostrar_proximas_disponibles)
+
+    botones_accion = ft.Row(
+        controls=[
+            ft.ElevatedButton("Agendar", on_click=agendar_cita, bgcolor="#1976D2", color="white"),
+            ft.OutlinedButton("Cancelar"),
+            ft.OutlinedButton("Limpiar")
+        ],
+        spacing=10
+    )
+
+    bloque_2 = ft.Container(
+        content=ft.Column(
+            controls=[
+                ft.Text("Seleccione una especialidad:", size=14, weight=ft.FontWeight.BOLD),
+                especialidad_dropdown,
+                proximas_btn,
+                ft.Text("Seleccione un médico:", size=14, weight=ft.FontWeight.BOLD),
+                medico_dropdown,
+                ft.Text("Seleccione la fecha de la cita:", size=14, weight=ft.FontWeight.BOLD),
+                fecha_picker_btn,
+                ft.Text("Seleccione la hora disponible:", size=14, weight=ft.FontWeight.BOLD),
+                hora_dropdown,
+                botones_accion
+            ],
+            spacing=10
+        ),
+        padding=15,
+        border=ft.border.all(1, "#aaa"),
+        border_radius=10,
+        bgcolor="#FFF3E0",
+        width=350
+    )
+
+    # 8) FUNCIÓN PARA EDITAR CITA (CAMBIAR FECHA Y HORA)
+    def editar_cita_dialog(cita_info):
+        msg_edit = ft.Text("", color="red")
+        edit_date_picker = ft.DatePicker(value=cita_info["fecha"], first_date=date.today(),
+                                         last_date=date.today() + timedelta(days=DIAS_PREGENERACION))
+        selected_date_text = ft.Text(value=cita_info["fecha"].strftime("%d/%m/%Y"), size=14)
+        def open_edit_date_picker(_):
+            edit_date_picker.open = True
+            page.update()
+        select_date_btn = ft.ElevatedButton("Seleccionar nueva fecha", on_click=open_edit_date_picker)
+        def update_edit_horas(_):
+            if not edit_date_picker.value:
+                return
+            med_id = cita_info["medico_id"]
+            fecha_sel = edit_date_picker.value
+            def mostrar_horas(horarios):
+                if fecha_sel == date.today():
+                    now_time = dt.now().time()
+                    horarios = [h for h in horarios if dt.strptime(h[1], "%H:%M").time() > now_time]
+                new_time_dropdown.options = [ft.dropdown.Option(text=h[1], key=h[1]) for h in horarios]
+                if any(h[1] == cita_info["hora"] for h in horarios):
+                    new_time_dropdown.value = cita_info["hora"]
+                else:
+                    new_time_dropdown.value = None
+                page.update()
+            ejecutor_bd.ejecutar(obtener_horarios_disponibles, med_id, fecha_sel.strftime("%Y-%m-%d"),
+                                 al_terminar=mostrar_horas, clave=("horas_edicion", sesion), grupo=sesion)
+        edit_date_picker.on_change = lambda e: (
+            selected_date_text.__setattr__("value", edit_date_picker.value.strftime("%d/%m/%Y")),
+            update_edit_horas(e),
+            page.update()
+        )
+        new_time_dropdown = ft.Dropdown(label="Seleccione la hora disponible", options=[], expand=True)
+        guardar_btn = ft.ElevatedButton("Guardar Cambios", bgcolor="blue", color="white")
+        update_edit_horas(None)
+        def guardar_edicion(_):
+            if not edit_date_picker.value or not new_time_dropdown.value:
+                msg_edit.value = "Debe seleccionar fecha y hora."
+                page.update()
+                return
+            new_fecha = edit_date_picker.value
+            cita_id = cita_info["cita_id"]
+            guardar_btn.disabled = True
+            page.update()
+            def al_guardar(respuesta):
+                ok, res = respuesta
+                guardar_btn.disabled = False
+                if ok:
+                    page.snack_bar = ft.SnackBar(ft.Text(res, color="white"), bgcolor="green")
+                    page.snack_bar.open = True
+                    edit_dialog.open = False
+                    invalidar_mes(cita_info["fecha"])
+                    invalidar_mes(new_fecha)
+                    bloque_3_refrescar_calendario()
+                else:
+                    msg_edit.value = res
+                page.update()
+            def al_fallar(error):
+                guardar_btn.disabled = False
+                mostrar_error_bd(error)
+            ejecutor_bd.ejecutar(editar_cita, cita_id, new_fecha.strftime("%Y-%m-%d"), new_time_dropdown.value,
+                                 al_terminar=al_guardar, al_fallar=al_fallar, grupo=sesion)
+        guardar_btn.on_click = guardar_edicion
+        edit_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Editar Cita"),
+            content=ft.Column([
+                ft.Text("Seleccione nueva fecha:", size=14, weight=ft.FontWeight.BOLD),
+                ft.Row([select_date_btn, selected_date_text], spacing=10),
+                ft.Text("Seleccione nueva hora:", size=14, weight=ft.FontWeight.BOLD),
+                new_time_dropdown,
+                msg_edit
+            ], spacing=10),
+            actions=[ft.TextButton("Cancelar", on_click=lambda _: close_dialog(edit_dialog)), guardar_btn],
+            actions_alignment="end"
+        )
+        if edit_dialog not in page.overlay:
+            page.overlay.append(edit_dialog)
+        edit_dialog.open = True
+        if edit_date_picker not in page.overlay:
+            page.overlay.append(edit_date_picker)
+        page.update()
+
+    # 9) BLOQUE 3: CALENDARIO DE CITAS
+    today = date.today()
+    current_year = today.year
+    current_month = today.month
+    # (año, mes) -> (momento de lectura, {día: [citas]}). Se comparte con las tareas de ejecutor_bd que precargan meses.
+    meses_calendario = {}
+    meses_invalidados = {}  # (año, mes) -> número de invalidación (ver cargar_meses)
+    invalidaciones = 0
+    meses_precargando = set()
+    meses_lock = threading.Lock()
+
+    def mes_relativo(year, month, delta):
+        year_rel, month_rel = divmod(year * 12 + month - 1 + delta, 12)
+        return year_rel, month_rel + 1
+
+    def cargar_meses(year, month, meses):
+        """Lee 'meses' meses consecutivos en una sola consulta, los guarda en la caché y los retorna."""
+        with meses_lock:
+            invalidaciones_inicio = invalidaciones
+        momento = time.monotonic()
+        por_mes = {mes_relativo(year, month, i): {} for i in range(meses)}
+        for cita_id, fecha_str, especialidad, medico, hora, medico_id in obtener_citas_paciente_mes(user_id, year, month, meses):
+            cita_date = dt.strptime(fecha_str, "%Y-%m-%d").date()
+            por_mes[(cita_date.year, cita_date.month)].setdefault(cita_date.day, []).append({
+                "cita_id": cita_id,
+                "especialidad": especialidad,
+                "medico": medico,
+                "fecha": cita_date,
+                "hora": hora,
+                "medico_id": medico_id
+            })
+        with meses_lock:
+            for clave, citas_dict in por_mes.items():
+                # Una lectura que empezó antes de invalidar el mes trae datos viejos y se descarta.
+                if meses_invalidados.get(clave, 0) <= invalidaciones_inicio:
+                    meses_calendario[clave] = (momento, citas_dict)
+        return por_mes
+
+    def mes_vigente(clave):
+        with meses_lock:
+            guardado = meses_calendario.get(clave)
+        if guardado and time.monotonic() - guardado[0] < VIGENCIA_MES_CALENDARIO:
+            return guardado[1]
+        return None
+
+    def citas_del_mes(year, month):
+        citas_dict = mes_vigente((year, month))
+        if citas_dict is None:
+            # Se lee el mes junto con sus vecinos: la navegación siguiente ya no consulta la base.
+            anterior = mes_relativo(year, month, -1)
+            citas_dict = cargar_meses(anterior[0], anterior[1], 3)[(year, month)]
+        else:
+            precargar_vecinos(year, month)
+        return citas_dict
+
+    def precargar_vecinos(year, month):
+        """
+        Carga en ejecutor_bd el mes anterior y el siguiente si no están en la caché. Las tareas van en el
+        grupo de la sesión, así que terminar_sesion() cancela las que no empezaron.
+        """
+        def precargar(clave):
+            try:
+                cargar_meses(clave[0], clave[1], 1)
+            finally:
+                with meses_lock:
+                    meses_precargando.discard(clave)
+        for clave in (mes_relativo(year, month, -1), mes_relativo(year, month, 1)):
+            if mes_vigente(clave) is not None:
+                continue
+            with meses_lock:
+                if clave in meses_precargando:
+                    continue
+                meses_precargando.add(clave)
+            ejecutor_bd.ejecutar(precargar, clave, grupo=sesion)
+
+    def invalidar_mes(fecha):
+        nonlocal invalidaciones
+        with meses_lock:
+            invalidaciones += 1
+            meses_calendario.pop((fecha.year, fecha.month), None)
+            meses_invalidados[(fecha.year, fecha.month)] = invalidaciones
+
+    def bloque_3_refrescar_calendario():
+        nuevo_cal = crear_calendario(current_year, current_month)
+        bloque_3.content.controls[1] = nuevo_cal
+        page.update()
+    def anterior_mes(_):
+        nonlocal current_year, current_month
+        current_month -= 1
+        if current_month < 1:
+            current_month = 12
+            current_year -= 1
+        bloque_3_refrescar_calendario()
+    def siguiente_mes(_):
+        nonlocal current_year, current_month
+        current_month += 1
+        if current_month > 12:
+            current_month = 1
+            current_year += 1
+        bloque_3_refrescar_calendario()
+    def crear_calendario(year: int, month: int) -> ft.Column:
+        citas_dict = citas_del_mes(year, month)
+        dias_semana = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+        header = [ft.Container(content=ft.Text(d, weight="bold", size=12), alignment=ft.alignment.center, width=40, height=40) for d in dias_semana]
+        cells = []
+        first_weekday, num_days = calendar.monthrange(year, month)
+        for _ in range(first_weekday):
+            cells.append(ft.Container(width=40, height=40))
+        for day in range(1, num_days + 1):
+            bg_color = "#a5d6a7" if day in citas_dict else "white"
+            def on_click_dia(selected_day=day):
+                def _handle_click(_):
+                    if selected_day not in citas_dict:
+                        return
+                    citas_del_dia = citas_dict[selected_day]
+                    filas_citas = []
+                    for cita_info in citas_del_dia:
+                        detalle_str = f"Especialidad: {cita_info['especialidad']}\nMédico: {cita_info['medico']}\nFecha: {cita_info['fecha'].strftime('%d/%m/%Y')}\nHora: {cita_info['hora']}"
+                        def on_cancel_btn(ci=cita_info):
+                            def _cancel(_2):
+                                def do_cancel():
+                                    fecha_str = ci['fecha'].strftime("%Y-%m-%d")
+                                    def al_cancelar(respuesta):
+                                        ok, mensaje = respuesta
+                                        # Si falló, la cita cambió en otra sesión (atendida o cancelada por el
+                                        # médico): el mes guardado también está desactualizado.
+                                        invalidar_mes(ci["fecha"])
+                                        if ok:
+                                            page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="green")
+                                        else:
+                                            page.snack_bar = ft.SnackBar(ft.Text(mensaje, color="white"), bgcolor="red")
+                                        page.snack_bar.open = True
+                                        detalle_dialog.open = False
+                                        bloque_3_refrescar_calendario()
+                                        page.update()
+                                    ejecutor_bd.ejecutar(cancelar_cita, user_id, ci["medico_id"], fecha_str, ci["hora"],
+                                                         al_terminar=al_cancelar, al_fallar=mostrar_error_bd, grupo=sesion)
+                                confirm_dialog = ft.AlertDialog(
+                                    modal=True,
+                                    title=ft.Text("Cancelar Cita"),
+                                    content=ft.Text(f"¿Está seguro que desea cancelar esta cita de las {ci['hora']}?"),
+                                    actions=[ft.TextButton("No", on_click=lambda _: close_dialog(confirm_dialog)),
+                                             ft.ElevatedButton("Sí", on_click=lambda _: [close_dialog(confirm_dialog), do_cancel()], bgcolor="red", color="white")],
+                                    actions_alignment="end"
+                                )
+                                if confirm_dialog not in page.overlay:
+                                    page.overlay.append(confirm_dialog)
+                                confirm_dialog.open = True
+                                page.update()
+                            return _cancel
+                        def on_edit_btn(ci=cita_info):
+                            def _edit(_):
+                                editar_cita_dialog(ci)
+                            return _edit
+                        buttons_row = ft.Row(
+                            controls=[
+                                ft.ElevatedButton("Editar", on_click=on_edit_btn(cita_info), bgcolor="blue", color="white"),
+                                ft.ElevatedButton("Cancelar", on_click=on_cancel_btn(cita_info), bgcolor="red", color="white")
+                            ],
+                            spacing=5
+                        )
+                        cita_container = ft.Container(
+                            content=ft.Column([ft.Text(detalle_str, size=13), buttons_row], spacing=5, width=240),
+                            padding=5,
+                            bgcolor="#EEEEEE",
+                            border_radius=5
+                        )
+                        filas_citas.append(cita_container)
+                    def cerrar_dialogo(_2):
+                        detalle_dialog.open = False
+                        page.update()
+                    detalle_dialog = ft.AlertDialog(
+                        modal=True,
+                        title=ft.Text(f"Citas del {selected_day}/{month}/{year}"),
+                        content=ft.Container(content=ft.ListView(controls=filas_citas, spacing=10), height=300),
+                        actions=[ft.TextButton("Cerrar", on_click=cerrar_dialogo)],
+                        actions_alignment="end"
+                    )
+                    if detalle_dialog not in page.overlay:
+                        page.overlay.append(detalle_dialog)
+                    detalle_dialog.open = True
+                    page.update()
+                return _handle_click
+            cell = ft.ElevatedButton(
+                text=str(day),
+                on_click=on_click_dia(day),
+                width=40,
+                height=40,
+                bgcolor=bg_color
+            )
+            cells.append(cell)
+        while len(cells) % 7 != 0:
+            cells.append(ft.Container(width=40, height=40))
+        grid = ft.GridView(expand=True, runs_count=7, spacing=5, run_spacing=5, controls=header + cells)
+        month_name = calendar.month_name[month]
+        nav_row = ft.Row([
+            ft.IconButton(ft.icons.CHEVRON_LEFT, on_click=anterior_mes),
+            ft.Text(f"{month_name} {year}", size=16, weight=ft.FontWeight.BOLD),
+            ft.IconButton(ft.icons.CHEVRON_RIGHT, on_click=siguiente_mes)
+        ], alignment=ft.MainAxisAlignment.CENTER)
+        return ft.Column([nav_row, ft.Container(content=grid, width=350, height=350, alignment=ft.alignment.center, padding=10, border=ft.border.all(1, "#aaa"), border_radius=10, bgcolor="#FFFDE7")], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+    calendario_widget = crear_calendario(current_year, current_month)
+    bloque_3 = ft.Container(
+        content=ft.Column([ft.Text("Calendario de Citas", size=20, weight=ft.FontWeight.BOLD, color="#1B5E20"), calendario_widget],
+                          alignment="center", horizontal_alignment="center", spacing=10, expand=True),
+        padding=15,
+        border=ft.border.all(1, "#aaa"),
+        border_radius=10,
+        bgcolor="#E8F5E9",
+        expand=True
+    )
+    layout = ft.Column([bloque_1, ft.Row([bloque_2, bloque_3], spacing=15, expand=True)], spacing=20, expand=True)
+    page.add(layout)
+    page.overlay.append(date_picker)
+    page.update()
+
+    def actualizar_medicos(_):
+        if not especialidad_dropdown.value:
+            return
+        esp_id = int(especialidad_dropdown.value)
+        def mostrar_medicos(medicos):
+            medico_dropdown.options = [ft.dropdown.Option(text=m[1], key=str(m[0])) for m in medicos]
+            medico_dropdown.value = None
+            page.update()
+        # Si se cambia de especialidad varias veces seguidas, solo se aplica la última consulta.
+        ejecutor_bd.ejecutar(obtener_medicos, esp_id, al_terminar=mostrar_medicos,
+                             clave=("medicos", sesion), grupo=sesion)
+    especialidad_dropdown.on_change = actualizar_medicos
+
+    def actualizar_horas(_):
+        if not medico_dropdown.value or date_picker.value is None:
+            return
+        med_id = int(medico_dropdown.value)
+        fecha_sel = date_picker.value
+        def mostrar_horas(horarios):
+            if fecha_sel == date.today():
+                now_time = dt.now().time()
+                horarios = [h for h in horarios if dt.strptime(h[1], "%H:%M").time() > now_time]
+            hora_dropdown.options = [ft.dropdown.Option(text=h[1], key=h[1]) for h in horarios]
+            hora_dropdown.value = None
+            page.update()
+        ejecutor_bd.ejecutar(obtener_horarios_disponibles, med_id, fecha_sel.strftime("%Y-%m-%d"),
+                             al_terminar=mostrar_horas, clave=("horas", sesion), grupo=sesion)
+    def on_date_change(_):
+        on_date_selected(_)
+        actualizar_horas(_)
+
+    date_picker.on_change = on_date_change
+    medico_dropdown.on_change = actualizar_horas
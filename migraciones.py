@@ -0,0 +1,499 @@
+"""
+Migraciones versionadas del esquema de citas_medicas.db.
+La versión aplicada se guarda en la tabla schema_version. Cada migración es una función que recibe
+un cursor y se ejecuta una sola vez, en orden, dentro de su propia transacción.
+Para agregar un cambio de esquema se añade una nueva función al final de MIGRACIONES; nunca se
+modifica una migración ya publicada.
+"""
+import base64
+import binascii
+import hashlib
+import sqlite3
+
+
+def _m001_esquema_inicial(cursor):
+    """Tablas base e inserción de las 5 especialidades fijas."""
+    # Tabla Usuarios (actualizada para incluir seguridad y fotografía)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo_usuario TEXT CHECK(tipo_usuario IN ('Paciente', 'Administrador')) NOT NULL,
+            nombres TEXT NOT NULL,
+            apellidos TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            telefono TEXT CHECK(LENGTH(telefono) = 10) NOT NULL,
+            cedula TEXT UNIQUE CHECK(LENGTH(cedula) = 10) NOT NULL,
+            password TEXT NOT NULL,
+            security_q1 TEXT,
+            security_a1 TEXT,
+            security_q2 TEXT,
+            security_a2 TEXT,
+            security_q3 TEXT,
+            security_a3 TEXT,
+            photo TEXT
+        );
+    """)
+    # Tabla Especialidades
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Especialidades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL
+        );
+    """)
+    # Tabla Medicos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Medicos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombres TEXT NOT NULL,
+            apellidos TEXT NOT NULL,
+            especialidad_id INTEGER NOT NULL,
+            telefono TEXT CHECK(LENGTH(telefono) = 10),
+            email TEXT UNIQUE NOT NULL,
+            usuario_id INTEGER,
+            FOREIGN KEY (especialidad_id) REFERENCES Especialidades(id) ON DELETE CASCADE
+        );
+    """)
+    # Tabla Horarios
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Horarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            medico_id INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            hora TIME NOT NULL,
+            estado TEXT CHECK(estado IN ('Disponible', 'Reservado')) DEFAULT 'Disponible',
+            FOREIGN KEY (medico_id) REFERENCES Medicos(id) ON DELETE CASCADE,
+            UNIQUE (medico_id, fecha, hora)
+        );
+    """)
+    # Tabla Citas
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Citas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER NOT NULL,
+            medico_id INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            hora TIME NOT NULL,
+            estado TEXT CHECK(estado IN ('Pendiente', 'Presente', 'Ausente', 'Cancelada')) DEFAULT 'Pendiente',
+            FOREIGN KEY (paciente_id) REFERENCES Usuarios(id) ON DELETE CASCADE,
+            FOREIGN KEY (medico_id) REFERENCES Medicos(id) ON DELETE CASCADE,
+            UNIQUE (paciente_id, fecha, hora)
+        );
+    """)
+    especialidades_fijas = [
+        "Medicina General",
+        "Medicina Familiar",
+        "Odontología",
+        "Obstetricia",
+        "Ginecología"
+    ]
+    cursor.executemany("INSERT OR IGNORE INTO Especialidades (nombre) VALUES (?)",
+                       [(esp,) for esp in especialidades_fijas])
+
+
+def _m002_notificaciones(cursor):
+    """Tabla Notificaciones con la columna cita_id (las bases antiguas la crearon sin ella)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Notificaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            leido INTEGER DEFAULT 0,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            cita_id INTEGER
+        )
+    """)
+    if not columna_existe(cursor, "Notificaciones", "cita_id"):
+        cursor.execute("ALTER TABLE Notificaciones ADD COLUMN cita_id INTEGER")
+
+
+def _m003_indices_secundarios(cursor):
+    """Índices para los filtros más frecuentes de las pantallas."""
+    # obtener_todas_citas(medico_id=...), obtener_pacientes_de_medico, citas activas/historial del panel
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_citas_medico_estado_fecha ON Citas(medico_id, estado, fecha, hora)")
+    # obtener_citas_paciente y el calendario del paciente
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_citas_paciente_fecha ON Citas(paciente_id, fecha)")
+    # obtener_medicos(usuario_id=...) y obtener_medico_id_por_usuario_id
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_medicos_usuario ON Medicos(usuario_id)")
+    # obtener_medicos(especialidad_id=...)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_medicos_especialidad ON Medicos(especialidad_id)")
+    # Campanita (no leídas por usuario) y recordatorios duplicados por cita
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notificaciones_usuario_leido_fecha ON Notificaciones(usuario_id, leido, fecha)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notificaciones_cita_usuario ON Notificaciones(cita_id, usuario_id)")
+
+
+def _m004_jornadas(cursor):
+    """Horario de trabajo y duración de los turnos de cada médico (para generar Horarios en bloque)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Jornadas (
+            medico_id INTEGER PRIMARY KEY,
+            hora_inicio TIME NOT NULL DEFAULT '08:00',
+            hora_fin TIME NOT NULL DEFAULT '17:00',
+            duracion_minutos INTEGER NOT NULL DEFAULT 30 CHECK(duracion_minutos > 0),
+            FOREIGN KEY (medico_id) REFERENCES Medicos(id) ON DELETE CASCADE
+        )
+    """)
+
+
+def _m005_disponibilidad_dia(cursor):
+    """Almacén compacto de disponibilidad: una fila por médico y día con los turnos en un entero (ver disponibilidad_bitmap)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS DisponibilidadDia (
+            medico_id INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            hora_inicio TIME NOT NULL,
+            duracion_minutos INTEGER NOT NULL CHECK(duracion_minutos > 0),
+            num_turnos INTEGER NOT NULL CHECK(num_turnos BETWEEN 1 AND 62),
+            ocupados INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (medico_id, fecha),
+            FOREIGN KEY (medico_id) REFERENCES Medicos(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+
+
+def _m006_indice_horarios_disponibles(cursor):
+    """Índice parcial de turnos libres ordenado por fecha y hora (búsqueda de la próxima cita disponible)."""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_horarios_disponibles
+        ON Horarios(fecha, hora, medico_id) WHERE estado = 'Disponible'
+    """)
+
+
+def _m007_turno_unico_por_medico(cursor):
+    """
+    Un médico no puede tener dos citas pendientes en la misma fecha y hora.
+    Las reservas simultáneas de versiones anteriores pudieron dejar varias citas en un mismo turno. Una
+    cita pendiente se cancela si en su turno hay otra ya atendida (Presente o Ausente) o otra pendiente
+    registrada antes. Las citas atendidas duplicadas son historial y se conservan: por eso el índice
+    solo abarca las pendientes y esas filas no pueden impedir crearlo.
+    """
+    cursor.execute("""
+        UPDATE Citas SET estado = 'Cancelada'
+        WHERE estado = 'Pendiente'
+          AND EXISTS (
+              SELECT 1 FROM Citas O
+              WHERE O.medico_id = Citas.medico_id AND O.fecha = Citas.fecha AND O.hora = Citas.hora
+                AND O.id != Citas.id
+                AND (O.estado IN ('Presente', 'Ausente') OR (O.estado = 'Pendiente' AND O.id < Citas.id))
+          )
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_citas_medico_turno_activo
+        ON Citas(medico_id, fecha, hora) WHERE estado = 'Pendiente'
+    """)
+
+
+def _m008_indice_citas_medico_fecha(cursor):
+    """
+    Recorre las citas de un médico en orden de fecha y hora sin importar el estado: permite paginar el
+    historial (varios estados a la vez) sin ordenar todas las citas del médico en cada página.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_citas_medico_fecha ON Citas(medico_id, fecha, hora)")
+
+
+def _m009_busqueda_usuarios(cursor):
+    """
+    Índice de texto completo (FTS5) sobre nombres, apellidos, cédula y email de Usuarios, sin acentos
+    ni mayúsculas ("jose" encuentra "José"). Es una tabla de contenido externo: guarda solo el índice
+    y los triggers lo mantienen al día con Usuarios. Los índices de prefijos de 1 a 4 letras evitan
+    recorrer todas las palabras que empiezan igual mientras se escribe.
+    """
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS UsuariosFTS USING fts5(
+            nombres, apellidos, cedula, email,
+            content='Usuarios', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='1 2 3 4'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_fts_insert AFTER INSERT ON Usuarios BEGIN
+            INSERT INTO UsuariosFTS (rowid, nombres, apellidos, cedula, email)
+            VALUES (new.id, new.nombres, new.apellidos, new.cedula, new.email);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_fts_delete AFTER DELETE ON Usuarios BEGIN
+            INSERT INTO UsuariosFTS (UsuariosFTS, rowid, nombres, apellidos, cedula, email)
+            VALUES ('delete', old.id, old.nombres, old.apellidos, old.cedula, old.email);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_fts_update
+        AFTER UPDATE OF nombres, apellidos, cedula, email ON Usuarios BEGIN
+            INSERT INTO UsuariosFTS (UsuariosFTS, rowid, nombres, apellidos, cedula, email)
+            VALUES ('delete', old.id, old.nombres, old.apellidos, old.cedula, old.email);
+            INSERT INTO UsuariosFTS (rowid, nombres, apellidos, cedula, email)
+            VALUES (new.id, new.nombres, new.apellidos, new.cedula, new.email);
+        END
+    """)
+    cursor.execute("INSERT INTO UsuariosFTS (UsuariosFTS) VALUES ('rebuild')")
+
+
+def _m010_recordatorios(cursor):
+    """
+    Columna tipo en Notificaciones para distinguir los recordatorios de cada ventana (24 horas, 1 hora...).
+    Las notificaciones con cita existentes eran todas recordatorios de 24 horas. El índice parcial
+    permite recorrer las citas pendientes de una ventana de tiempo sin leer las demás.
+    """
+    if not columna_existe(cursor, "Notificaciones", "tipo"):
+        cursor.execute("ALTER TABLE Notificaciones ADD COLUMN tipo TEXT")
+    cursor.execute("UPDATE Notificaciones SET tipo = 'recordatorio_24h' WHERE cita_id IS NOT NULL AND tipo IS NULL")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_citas_pendientes_fecha_hora
+        ON Citas(fecha, hora) WHERE estado = 'Pendiente'
+    """)
+
+
+def _m011_contadores_no_leidas(cursor):
+    """
+    Contador de notificaciones no leídas por usuario, mantenido por triggers sobre Notificaciones,
+    para que la campanita no cuente todo el historial del usuario. Se inicializa con los datos actuales.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS NotificacionesNoLeidas (
+            usuario_id INTEGER PRIMARY KEY,
+            no_leidas INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_no_leidas_insert
+        AFTER INSERT ON Notificaciones WHEN new.leido = 0 BEGIN
+            INSERT INTO NotificacionesNoLeidas (usuario_id, no_leidas) VALUES (new.usuario_id, 1)
+            ON CONFLICT(usuario_id) DO UPDATE SET no_leidas = no_leidas + 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_no_leidas_delete
+        AFTER DELETE ON Notificaciones WHEN old.leido = 0 BEGIN
+            UPDATE NotificacionesNoLeidas SET no_leidas = no_leidas - 1 WHERE usuario_id = old.usuario_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_no_leidas_update
+        AFTER UPDATE OF leido, usuario_id ON Notificaciones BEGIN
+            UPDATE NotificacionesNoLeidas SET no_leidas = no_leidas - 1
+            WHERE old.leido = 0 AND usuario_id = old.usuario_id;
+            INSERT INTO NotificacionesNoLeidas (usuario_id, no_leidas) SELECT new.usuario_id, 1 WHERE new.leido = 0
+            ON CONFLICT(usuario_id) DO UPDATE SET no_leidas = no_leidas + 1;
+        END
+    """)
+    cursor.execute("DELETE FROM NotificacionesNoLeidas")
+    cursor.execute("""
+        INSERT INTO NotificacionesNoLeidas (usuario_id, no_leidas)
+        SELECT usuario_id, COUNT(*) FROM Notificaciones WHERE leido = 0 GROUP BY usuario_id
+    """)
+
+
+def _m012_archivo_notificaciones(cursor):
+    """
+    Tabla de archivo para las notificaciones leídas antiguas (ver notificaciones_paciente.archivar_notificaciones),
+    índice parcial para encontrarlas por fecha e índice para paginar las notificaciones de un usuario.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS NotificacionesArchivo (
+            id INTEGER PRIMARY KEY,
+            usuario_id INTEGER NOT NULL,
+            cita_id INTEGER,
+            tipo TEXT,
+            message TEXT NOT NULL,
+            leido INTEGER,
+            fecha TIMESTAMP,
+            archivada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notificaciones_archivo_usuario ON NotificacionesArchivo(usuario_id, fecha)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notificaciones_leidas_fecha ON Notificaciones(fecha) WHERE leido = 1")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notificaciones_usuario_fecha ON Notificaciones(usuario_id, fecha)")
+
+
+def _m013_cola_envios(cursor):
+    """
+    Cola persistente de envíos: una fila por mensaje y canal (app, email, sms), que los trabajadores de
+    cola_notificaciones toman por lotes y reintentan si fallan. Los recordatorios ya entregados en la
+    aplicación para citas que aún no pasaron se registran como enviados, para no repetirlos.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ColaEnvios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            cita_id INTEGER,
+            tipo TEXT,
+            canal TEXT NOT NULL,
+            mensaje TEXT NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'Pendiente'
+                CHECK(estado IN ('Pendiente', 'Procesando', 'Enviado', 'Fallido')),
+            intentos INTEGER NOT NULL DEFAULT 0,
+            proximo_intento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            ultimo_error TEXT,
+            creado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            enviado TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cola_envios_canal_estado
+        ON ColaEnvios(canal, estado, proximo_intento)
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_cola_envios_recordatorio
+        ON ColaEnvios(cita_id, tipo, canal) WHERE cita_id IS NOT NULL
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO ColaEnvios (usuario_id, cita_id, tipo, canal, mensaje, estado, enviado)
+        SELECT N.usuario_id, N.cita_id, N.tipo, 'app', N.message, 'Enviado', N.fecha
+        FROM Notificaciones N
+        JOIN Citas C ON C.id = N.cita_id
+        WHERE N.tipo IS NOT NULL AND C.fecha >= date('now', '-1 day')
+    """)
+
+
+def _m014_almacen_fotos(cursor):
+    """
+    Tabla Fotos (ver fotos.py): cada imagen una sola vez por hash y variante, en BLOB. Las fotos que
+    estaban en base64 en Usuarios.photo se pasan a Fotos como variante "original", con los mismos bytes,
+    y la columna queda con el hash; las que no son base64 válido se dejan sin cambios. Las miniaturas se
+    generan después, en segundo plano (bd_medica.iniciar_variantes_fotos). La conversión no usa
+    fotos.py ni Pillow, para que el resultado no dependa de la versión instalada.
+    Las páginas que liberan las filas de Usuarios quedan en la lista libre hasta la siguiente compactación
+    (bd_medica.compactar_bd).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Fotos (
+            hash TEXT NOT NULL,
+            variante TEXT NOT NULL,
+            formato TEXT NOT NULL,
+            ancho INTEGER,
+            alto INTEGER,
+            datos BLOB NOT NULL,
+            creada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (hash, variante)
+        )
+    """)
+
+    def formato(datos):
+        # Por la firma del archivo, sin decodificar la imagen.
+        if datos.startswith(b"\x89PNG"):
+            return "PNG"
+        if datos.startswith(b"\xff\xd8"):
+            return "JPEG"
+        if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+            return "WEBP"
+        if datos.startswith(b"GIF8"):
+            return "GIF"
+        return "desconocido"
+
+    # Solo los ids: las fotos se leen de a una para no cargarlas todas en memoria.
+    cursor.execute("SELECT id FROM Usuarios WHERE photo IS NOT NULL")
+    for (user_id,) in cursor.fetchall():
+        photo = cursor.execute("SELECT photo FROM Usuarios WHERE id = ?", (user_id,)).fetchone()[0]
+        # Ya convertida: el hash SHA-256 en hexadecimal.
+        if isinstance(photo, str) and len(photo) == 64 and all(c in "0123456789abcdef" for c in photo):
+            continue
+        try:
+            datos = base64.b64decode(photo, validate=True)
+        except (binascii.Error, TypeError, ValueError):
+            continue
+        referencia = hashlib.sha256(datos).hexdigest()
+        cursor.execute("""
+            INSERT OR IGNORE INTO Fotos (hash, variante, formato, ancho, alto, datos)
+            VALUES (?, 'original', ?, NULL, NULL, ?)
+        """, (referencia, formato(datos), datos))
+        cursor.execute("UPDATE Usuarios SET photo = ? WHERE id = ?", (referencia, user_id))
+
+
+# (versión, descripción, función). Las versiones deben ser consecutivas.
+MIGRACIONES = [
+    (1, "Esquema inicial", _m001_esquema_inicial),
+    (2, "Tabla Notificaciones", _m002_notificaciones),
+    (3, "Índices secundarios", _m003_indices_secundarios),
+    (4, "Jornadas de los médicos", _m004_jornadas),
+    (5, "Disponibilidad por día en bits", _m005_disponibilidad_dia),
+    (6, "Índice de turnos disponibles", _m006_indice_horarios_disponibles),
+    (7, "Turno único por médico en citas activas", _m007_turno_unico_por_medico),
+    (8, "Índice de citas por médico y fecha", _m008_indice_citas_medico_fecha),
+    (9, "Búsqueda de texto completo de usuarios", _m009_busqueda_usuarios),
+    (10, "Tipos de recordatorio", _m010_recordatorios),
+    (11, "Contadores de notificaciones no leídas", _m011_contadores_no_leidas),
+    (12, "Archivo de notificaciones", _m012_archivo_notificaciones),
+    (13, "Cola de envíos de notificaciones", _m013_cola_envios),
+    (14, "Almacén de fotos por hash", _m014_almacen_fotos),
+]
+
+
+def columna_existe(cursor, tabla, columna):
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    return any(fila[1] == columna for fila in cursor.fetchall())
+
+
+def reconstruir_tabla(cursor, tabla, nuevo_ddl, columnas):
+    """
+    Reconstruye una tabla con una nueva definición, conservando sus datos
+    (procedimiento recomendado por SQLite para cambios que ALTER TABLE no soporta).
+    - nuevo_ddl: sentencia CREATE TABLE con el nombre '<tabla>_nueva'.
+    - columnas: columnas que se copian de la tabla anterior a la nueva.
+    Los índices de la tabla anterior se eliminan con ella; la migración debe volver a crearlos.
+    Solo debe llamarse dentro de una migración (las claves foráneas están desactivadas).
+    """
+    lista = ", ".join(columnas)
+    cursor.execute(nuevo_ddl)
+    cursor.execute(f"INSERT INTO {tabla}_nueva ({lista}) SELECT {lista} FROM {tabla}")
+    cursor.execute(f"DROP TABLE {tabla}")
+    cursor.execute(f"ALTER TABLE {tabla}_nueva RENAME TO {tabla}")
+
+
+def version_actual(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    fila = conexion.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return fila[0] or 0
+
+
+def aplicar_migraciones(conexion, hasta=None):
+    """
+    Aplica en orden las migraciones pendientes. Cada una corre en una transacción
+    BEGIN IMMEDIATE con las claves foráneas desactivadas (para poder reconstruir tablas)
+    y se verifica la integridad referencial antes de confirmarla.
+    - hasta: última versión que se aplica (None: todas). Permite preparar bases antiguas en los diagnósticos.
+    Retorna la lista de versiones aplicadas.
+    """
+    if conexion.in_transaction:
+        conexion.commit()
+    if conexion.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+        # Base nueva: auto_vacuum solo cambia con un VACUUM (inmediato mientras la base está vacía).
+        # En modo incremental las páginas libres se devuelven al sistema con PRAGMA incremental_vacuum.
+        conexion.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conexion.execute("VACUUM")
+    actual = version_actual(conexion)
+    pendientes = [m for m in MIGRACIONES if m[0] > actual and (hasta is None or m[0] <= hasta)]
+    aplicadas = []
+    if not pendientes:
+        return aplicadas
+    conexion.execute("PRAGMA foreign_keys = OFF;")
+    try:
+        for version, descripcion, migracion in pendientes:
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                # Otra instancia pudo haber aplicado esta migración mientras esperábamos el bloqueo.
+                if version_actual(conexion) >= version:
+                    conexion.rollback()
+                    continue
+                cursor = conexion.cursor()
+                migracion(cursor)
+                violaciones = cursor.execute("PRAGMA foreign_key_check").fetchall()
+                if violaciones:
+                    raise sqlite3.IntegrityError(
+                        f"La migración {version} deja {len(violaciones)} referencias inválidas.")
+                cursor.execute("INSERT INTO schema_version (version, descripcion) VALUES (?, ?)",
+                               (version, descripcion))
+                conexion.commit()
+            except BaseException:
+                conexion.rollback()
+                raise
+            aplicadas.append(version)
+    finally:
+        conexion.execute("PRAGMA foreign_keys = ON;")
+    return aplicadas
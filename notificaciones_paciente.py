@@ -1,141 +1,284 @@
-import sqlite3
-from datetime import datetime, timedelta
-from bd_medica import obtener_citas_paciente  # Asegúrate de que bd_medica.py esté en el mismo directorio
-
-DB_NAME = "citas_medicas.db"
-
-def conectar_bd():
-    conexion = sqlite3.connect(DB_NAME)
-    conexion.execute("PRAGMA foreign_keys = ON;")
-    return conexion
-
-def crear_tabla_notificaciones():
-    """
-    Crea la tabla Notificaciones si no existe.
-    Cada notificación está asociada a un usuario (usuario_id) y, opcionalmente, a una cita (cita_id).
-    Contiene un mensaje, un indicador de lectura y la fecha en que fue creada.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Notificaciones (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER NOT NULL,
-            message TEXT NOT NULL,
-            leido INTEGER DEFAULT 0,
-            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conexion.commit()
-    conexion.close()
-
-def actualizar_esquema():
-    """
-    Verifica si la columna 'cita_id' existe en la tabla Notificaciones.
-    Si no existe, la agrega.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("PRAGMA table_info(Notificaciones)")
-    columns = [row[1] for row in cursor.fetchall()]
-    if "cita_id" not in columns:
-        cursor.execute("ALTER TABLE Notificaciones ADD COLUMN cita_id INTEGER")
-        conexion.commit()
-    conexion.close()
-
-def generar_notificaciones(usuario_id):
-    """
-    Genera una notificación de bienvenida si el usuario aún no tiene ninguna notificación.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("SELECT COUNT(*) FROM Notificaciones WHERE usuario_id = ?", (usuario_id,))
-    count = cursor.fetchone()[0]
-    if count == 0:
-        cursor.execute(
-            "INSERT INTO Notificaciones (usuario_id, message, leido) VALUES (?, ?, ?)",
-            (usuario_id, "Bienvenido a la aplicación de citas médicas.", 0)
-        )
-    conexion.commit()
-    conexion.close()
-
-def obtener_notificaciones(usuario_id):
-    """
-    Retorna una lista de notificaciones para el usuario.
-    Cada notificación es un diccionario con las claves: id, cita_id, message, leido y fecha.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("""
-        SELECT id, cita_id, message, leido, fecha 
-        FROM Notificaciones 
-        WHERE usuario_id = ? 
-        ORDER BY fecha DESC
-    """, (usuario_id,))
-    rows = cursor.fetchall()
-    conexion.close()
-    notifs = []
-    for row in rows:
-        notifs.append({
-            "id": row[0],
-            "cita_id": row[1],
-            "message": row[2],
-            "leido": row[3],
-            "fecha": row[4]
-        })
-    return notifs
-
-def marcar_notificacion_leida(notif_id):
-    """
-    Marca la notificación identificada por notif_id como leída (leido = 1).
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("UPDATE Notificaciones SET leido = 1 WHERE id = ?", (notif_id,))
-    conexion.commit()
-    conexion.close()
-
-def eliminar_notificacion(notif_id):
-    """
-    Elimina la notificación identificada por notif_id de la base de datos.
-    """
-    conexion = conectar_bd()
-    cursor = conexion.cursor()
-    cursor.execute("DELETE FROM Notificaciones WHERE id = ?", (notif_id,))
-    conexion.commit()
-    conexion.close()
-
-def generar_notificaciones_citas(usuario_id):
-    """
-    Revisa las citas agendadas del usuario y, si alguna está programada para aproximadamente 24 horas
-    después del momento actual (con un margen de ±30 minutos), genera una notificación (si aún no existe)
-    indicando que la cita se realizará en 24 horas.
-    """
-    citas = obtener_citas_paciente(usuario_id)
-    now = datetime.now()
-    for cita in citas:
-        # La función obtener_citas_paciente devuelve:
-        # (cita_id, fecha, especialidad, medico, hora, medico_id)
-        cita_id, fecha_str, especialidad, medico, hora_str, medico_id = cita
-        try:
-            cita_dt = datetime.strptime(f"{fecha_str} {hora_str}", "%Y-%m-%d %H:%M")
-        except Exception:
-            continue
-        diff = cita_dt - now
-        if timedelta(hours=23, minutes=30) <= diff <= timedelta(hours=24, minutes=30):
-            conexion = conectar_bd()
-            cursor = conexion.cursor()
-            cursor.execute("SELECT COUNT(*) FROM Notificaciones WHERE cita_id = ? AND usuario_id = ?", (cita_id, usuario_id))
-            exists = cursor.fetchone()[0]
-            if exists == 0:
-                message = f"Tienes una cita agendada para el {fecha_str} a las {hora_str} en 24 horas."
-                cursor.execute(
-                    "INSERT INTO Notificaciones (usuario_id, cita_id, message, leido) VALUES (?, ?, ?, ?)",
-                    (usuario_id, cita_id, message, 0)
-                )
-            conexion.commit()
-            conexion.close()
-
-# Al importar este módulo se asegura de que la tabla de notificaciones exista y se actualice el esquema.
-crear_tabla_notificaciones()
-actualizar_esquema()
+import json
+import threading
+from datetime import datetime, timedelta
+from bd_medica import compactar_bd, obtener_conexion  # Asegúrate de que bd_medica.py esté en el mismo directorio
+import cola_notificaciones
+import eventos_notificaciones
+from tareas_programadas import TareaPeriodica
+
+def generar_notificaciones(usuario_id):
+    """
+    Genera una notificación de bienvenida si el usuario aún no tiene ninguna notificación.
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Notificaciones WHERE usuario_id = ?", (usuario_id,))
+        count = cursor.fetchone()[0]
+        if count == 0:
+            cursor.execute(
+                "INSERT INTO Notificaciones (usuario_id, message, leido) VALUES (?, ?, ?)",
+                (usuario_id, "Bienvenido a la aplicación de citas médicas.", 0)
+            )
+    if count == 0:
+        eventos_notificaciones.publicar({usuario_id: 1})
+
+def contar_no_leidas(usuario_id):
+    """
+    Retorna el número de notificaciones no leídas del usuario. Lee el contador que mantienen los
+    triggers de Notificaciones, por lo que no depende del tamaño del historial.
+    """
+    with obtener_conexion() as conexion:
+        fila = conexion.execute(
+            "SELECT no_leidas FROM NotificacionesNoLeidas WHERE usuario_id = ?", (usuario_id,)
+        ).fetchone()
+    return fila[0] if fila else 0
+
+def verificar_contadores_no_leidas(reparar=True):
+    """
+    Compara los contadores de NotificacionesNoLeidas con el conteo real de Notificaciones.
+    Retorna la lista de diferencias [(usuario_id, contador, real), ...]; con reparar=True, si hay
+    diferencias, reconstruye todos los contadores en la misma transacción.
+    """
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT usuario_id, SUM(contador), SUM(real) FROM (
+                SELECT usuario_id, no_leidas AS contador, 0 AS real FROM NotificacionesNoLeidas
+                UNION ALL
+                SELECT usuario_id, 0, COUNT(*) FROM Notificaciones WHERE leido = 0 GROUP BY usuario_id
+            )
+            GROUP BY usuario_id
+            HAVING SUM(contador) != SUM(real)
+        """)
+        diferencias = cursor.fetchall()
+        if diferencias and reparar:
+            cursor.execute("DELETE FROM NotificacionesNoLeidas")
+            cursor.execute("""
+                INSERT INTO NotificacionesNoLeidas (usuario_id, no_leidas)
+                SELECT usuario_id, COUNT(*) FROM Notificaciones WHERE leido = 0 GROUP BY usuario_id
+            """)
+    if diferencias and reparar:
+        for usuario_id, _, real in diferencias:
+            eventos_notificaciones.publicar_total(usuario_id, real)
+    return diferencias
+
+def obtener_notificaciones(usuario_id, limit=None, before=None):
+    """
+    Retorna una lista de notificaciones para el usuario, de la más reciente a la más antigua.
+    Cada notificación es un diccionario con las claves: id, cita_id, message, leido y fecha.
+    Con 'limit' se retorna una página; la siguiente se pide con before=(fecha, id) de la última notificación recibida.
+    """
+    query = """
+        SELECT id, cita_id, message, leido, fecha
+        FROM Notificaciones
+        WHERE usuario_id = ?
+    """
+    params = [usuario_id]
+    if before:
+        query += " AND (fecha, id) < (?, ?)"
+        params.extend(before)
+    query += " ORDER BY fecha DESC, id DESC"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    notifs = []
+    for row in rows:
+        notifs.append({
+            "id": row[0],
+            "cita_id": row[1],
+            "message": row[2],
+            "leido": row[3],
+            "fecha": row[4]
+        })
+    return notifs
+
+def marcar_notificacion_leida(notif_id):
+    """
+    Marca la notificación identificada por notif_id como leída (leido = 1).
+    """
+    with obtener_conexion() as conexion:
+        fila = conexion.execute(
+            "UPDATE Notificaciones SET leido = 1 WHERE id = ? AND leido = 0 RETURNING usuario_id", (notif_id,)
+        ).fetchone()
+    if fila:
+        eventos_notificaciones.publicar({fila[0]: -1})
+
+def eliminar_notificacion(notif_id):
+    """
+    Elimina la notificación identificada por notif_id de la base de datos.
+    """
+    with obtener_conexion() as conexion:
+        fila = conexion.execute(
+            "DELETE FROM Notificaciones WHERE id = ? RETURNING usuario_id, leido", (notif_id,)
+        ).fetchone()
+    if fila and not fila[1]:
+        eventos_notificaciones.publicar({fila[0]: -1})
+
+# Ventanas de recordatorio: (tipo, minutos antes de la cita, margen en minutos, texto).
+# Una cita recibe el recordatorio de una ventana cuando faltan entre minutos - margen y minutos + margen.
+VENTANAS_RECORDATORIO = [
+    ("recordatorio_24h", 24 * 60, 30, "en 24 horas"),
+    ("recordatorio_1h", 60, 15, "en 1 hora"),
+]
+INTERVALO_RECORDATORIOS = 300  # segundos; debe ser menor que el margen más pequeño
+
+def marcar_todas_leidas(usuario_id):
+    """Marca como leídas todas las notificaciones del usuario. Retorna cuántas cambiaron."""
+    with obtener_conexion() as conexion:
+        cambiadas = conexion.execute(
+            "UPDATE Notificaciones SET leido = 1 WHERE usuario_id = ? AND leido = 0", (usuario_id,)
+        ).rowcount
+    if cambiadas:
+        eventos_notificaciones.publicar({usuario_id: -cambiadas})
+    return cambiadas
+
+def eliminar_notificaciones(ids, usuario_id=None):
+    """
+    Elimina en una sola sentencia las notificaciones cuyos id están en 'ids' (solo las del usuario,
+    si se indica). Retorna cuántas eliminó.
+    """
+    query = "DELETE FROM Notificaciones WHERE id IN (SELECT value FROM json_each(?))"
+    params = [json.dumps(list(ids))]
+    if usuario_id is not None:
+        query += " AND usuario_id = ?"
+        params.append(usuario_id)
+    with obtener_conexion() as conexion:
+        filas = conexion.execute(query + " RETURNING usuario_id, leido", params).fetchall()
+    deltas = {}
+    for dueno, leido in filas:
+        if not leido:
+            deltas[dueno] = deltas.get(dueno, 0) - 1
+    eventos_notificaciones.publicar(deltas)
+    return len(filas)
+
+def programar_recordatorios(ahora=None, ventanas=None, usuario_id=None, canales=None):
+    """
+    Encola, en una sola sentencia por ventana, los recordatorios que faltan para todas las citas
+    pendientes cuya hora cae dentro de la ventana (o solo las del usuario indicado), una vez por cada
+    canal (por defecto cola_notificaciones.CANALES_ACTIVOS). Los trabajadores de la cola los entregan
+    después; cada cita recibe como máximo un recordatorio de cada tipo por canal.
+    Retorna un diccionario {tipo: citas con recordatorio nuevo}.
+    """
+    ahora = ahora or datetime.now()
+    canales = json.dumps(canales or cola_notificaciones.CANALES_ACTIVOS)
+    creados = {}
+    with obtener_conexion() as conexion:
+        cursor = conexion.cursor()
+        for tipo, minutos, margen, texto in ventanas or VENTANAS_RECORDATORIO:
+            inicio = ahora + timedelta(minutes=minutos - margen)
+            fin = ahora + timedelta(minutes=minutos + margen)
+            query = """
+                INSERT INTO ColaEnvios (usuario_id, cita_id, tipo, canal, mensaje)
+                SELECT C.paciente_id, C.id, ?, K.value,
+                       'Tienes una cita agendada para el ' || C.fecha || ' a las ' || C.hora || ' ' || ?
+                FROM Citas C, json_each(?) K
+                WHERE C.estado = 'Pendiente'
+                  AND (C.fecha, C.hora) BETWEEN (?, ?) AND (?, ?)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM ColaEnvios E
+                      WHERE E.cita_id = C.id AND E.tipo = ? AND E.canal = K.value
+                  )
+            """
+            params = [tipo, texto + ".", canales,
+                      inicio.strftime("%Y-%m-%d"), inicio.strftime("%H:%M"),
+                      fin.strftime("%Y-%m-%d"), fin.strftime("%H:%M"), tipo]
+            if usuario_id is not None:
+                query += " AND C.paciente_id = ?"
+                params.append(usuario_id)
+            cursor.execute(query + " RETURNING cita_id", params)
+            creados[tipo] = len({cita_id for (cita_id,) in cursor.fetchall()})
+    total = sum(creados.values())
+    if total:
+        cola_notificaciones.despertar()
+        if usuario_id is None:
+            print(f"🔔 {total} recordatorio(s) de citas encolados.")
+    return creados
+
+def generar_notificaciones_citas(usuario_id):
+    """
+    Genera los recordatorios pendientes de las citas del usuario (ver programar_recordatorios).
+    Los recordatorios de todos los pacientes los genera la tarea de iniciar_recordatorios.
+    """
+    return programar_recordatorios(usuario_id=usuario_id)
+
+_tarea_recordatorios = None
+_tarea_retencion = None
+
+def iniciar_recordatorios(intervalo=INTERVALO_RECORDATORIOS):
+    """
+    Inicia (una sola vez por proceso) la tarea en segundo plano que genera los recordatorios de todas
+    las citas cada 'intervalo' segundos, aunque el paciente no tenga la aplicación abierta.
+    La primera pasada se hace al iniciar.
+    """
+    global _tarea_recordatorios
+    if _tarea_recordatorios is None:
+        _tarea_recordatorios = TareaPeriodica("recordatorios_citas", intervalo, programar_recordatorios)
+        threading.Thread(target=_tarea_recordatorios.ejecutar_ahora, daemon=True).start()
+    return _tarea_recordatorios.iniciar()
+
+# Retención: las notificaciones leídas con más de DIAS_RETENCION_LEIDAS días se mueven a NotificacionesArchivo.
+# Debe ser mayor que la ventana de recordatorio más larga, para no volver a generar un recordatorio archivado.
+DIAS_RETENCION_LEIDAS = 90
+DIAS_CONSERVACION_ARCHIVO = 730  # después se eliminan del archivo
+LOTE_ARCHIVO = 5000
+INTERVALO_RETENCION = 86400  # segundos
+
+def archivar_notificaciones(dias=DIAS_RETENCION_LEIDAS, lote=LOTE_ARCHIVO):
+    """
+    Mueve a NotificacionesArchivo las notificaciones leídas con más de 'dias' días, en transacciones
+    de 'lote' filas para no bloquear a los demás escritores. Retorna el número de notificaciones archivadas.
+    """
+    limite_fecha = f"-{int(dias)} days"
+    total = 0
+    while True:
+        with obtener_conexion() as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("""
+                INSERT INTO NotificacionesArchivo (id, usuario_id, cita_id, tipo, message, leido, fecha)
+                SELECT id, usuario_id, cita_id, tipo, message, leido, fecha
+                FROM Notificaciones
+                WHERE leido = 1 AND fecha < datetime('now', ?)
+                ORDER BY fecha
+                LIMIT ?
+                RETURNING id
+            """, (limite_fecha, lote))
+            archivadas = cursor.fetchall()
+            cursor.executemany("DELETE FROM Notificaciones WHERE id = ?", archivadas)
+        total += len(archivadas)
+        if len(archivadas) < lote:
+            return total
+
+def depurar_archivo(dias=DIAS_CONSERVACION_ARCHIVO):
+    """Elimina del archivo las notificaciones archivadas hace más de 'dias' días. Retorna cuántas eliminó."""
+    with obtener_conexion() as conexion:
+        cursor = conexion.execute(
+            "DELETE FROM NotificacionesArchivo WHERE archivada < datetime('now', ?)", (f"-{int(dias)} days",)
+        )
+        return cursor.rowcount
+
+def mantener_notificaciones(dias=DIAS_RETENCION_LEIDAS, dias_archivo=DIAS_CONSERVACION_ARCHIVO, max_paginas=None):
+    """
+    Archiva las notificaciones leídas antiguas, depura el archivo y los envíos terminados de la cola,
+    y devuelve al sistema las páginas que quedaron libres (PRAGMA incremental_vacuum).
+    """
+    archivadas = archivar_notificaciones(dias)
+    depuradas = depurar_archivo(dias_archivo)
+    envios = cola_notificaciones.depurar_cola()
+    paginas = compactar_bd(max_paginas)
+    if archivadas or depuradas or envios:
+        print(f"🗄️ {archivadas} notificación(es) archivadas, {depuradas} depuradas del archivo, "
+              f"{envios} envío(s) depurados de la cola; {paginas or 0} página(s) liberadas.")
+    return {"archivadas": archivadas, "depuradas": depuradas, "envios_depurados": envios,
+            "paginas_liberadas": paginas}
+
+def iniciar_retencion(intervalo=INTERVALO_RETENCION, dias=DIAS_RETENCION_LEIDAS):
+    """Inicia (una sola vez por proceso) la tarea diaria de archivo y compactación de notificaciones."""
+    global _tarea_retencion
+    if _tarea_retencion is None:
+        _tarea_retencion = TareaPeriodica("retencion_notificaciones", intervalo, mantener_notificaciones, dias)
+    return _tarea_retencion.iniciar()
+
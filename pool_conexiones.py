@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+import time
+import queue
+from contextlib import contextmanager
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones SQLite reutilizables.
+    Cada hilo obtiene su propia conexión mientras la tiene prestada (las llamadas anidadas en el mismo
+    hilo reutilizan la misma conexión y la misma transacción). Al devolverla, la conexión vuelve al
+    pool en lugar de cerrarse, evitando el costo de abrir y configurar una conexión por consulta.
+    """
+
+    def __init__(self, fabrica, tamano=5, espera_max=10.0, verificar_tras=30.0):
+        """
+        - fabrica: función sin argumentos que crea y configura una nueva conexión.
+        - tamano: número máximo de conexiones abiertas al mismo tiempo.
+        - espera_max: segundos que se espera por una conexión libre antes de fallar.
+        - verificar_tras: segundos de inactividad tras los cuales se comprueba la conexión con 'SELECT 1'.
+        """
+        self.fabrica = fabrica
+        self.tamano = tamano
+        self.espera_max = espera_max
+        self.verificar_tras = verificar_tras
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        # Cada cerrar() inicia una generación nueva; las conexiones de una anterior no vuelven al pool.
+        self._generacion = 0
+        self._generacion_de = {}  # conexión -> generación en que se creó
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _crear(self):
+        with self._lock:
+            if self._creadas >= self.tamano:
+                return None
+            self._creadas += 1
+            generacion = self._generacion
+        try:
+            conexion = self.fabrica()
+        except Exception:
+            with self._lock:
+                self._creadas -= 1
+            raise
+        with self._lock:
+            self._generacion_de[conexion] = generacion
+        return conexion
+
+    def _descartar(self, conexion):
+        try:
+            conexion.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._creadas -= 1
+            self._generacion_de.pop(conexion, None)
+
+    def _es_valida(self, conexion, ultimo_uso):
+        """Comprueba la conexión si lleva inactiva más de 'verificar_tras' segundos."""
+        if time.monotonic() - ultimo_uso < self.verificar_tras:
+            return True
+        try:
+            conexion.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _tomar(self):
+        limite = time.monotonic() + self.espera_max
+        while True:
+            try:
+                conexion, ultimo_uso = self._libres.get_nowait()
+            except queue.Empty:
+                conexion = self._crear()
+                if conexion is not None:
+                    return conexion
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise sqlite3.OperationalError("No hay conexiones disponibles en el pool.")
+                try:
+                    conexion, ultimo_uso = self._libres.get(timeout=restante)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("No hay conexiones disponibles en el pool.")
+            if self._es_valida(conexion, ultimo_uso):
+                return conexion
+            self._descartar(conexion)
+
+    def _devolver(self, conexion):
+        with self._lock:
+            vigente = self._generacion_de.get(conexion) == self._generacion
+        if not vigente:
+            # Se prestó antes de cerrar(): se creó con la configuración anterior.
+            self._descartar(conexion)
+            return
+        if conexion.in_transaction:
+            conexion.rollback()
+        self._libres.put((conexion, time.monotonic()))
+
+    @contextmanager
+    def conexion(self):
+        """
+        Presta una conexión al hilo actual.
+        Al salir del bloque más externo se hace commit (o rollback si hubo una excepción)
+        y la conexión se devuelve al pool.
+        """
+        actual = getattr(self._local, "conexion", None)
+        if actual is not None:
+            self._local.profundidad += 1
+            try:
+                yield actual
+            finally:
+                self._local.profundidad -= 1
+            return
+        conexion = self._tomar()
+        self._local.conexion = conexion
+        self._local.profundidad = 1
+        try:
+            yield conexion
+            if conexion.in_transaction:
+                conexion.commit()
+        except BaseException:
+            try:
+                conexion.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            self._local.conexion = None
+            self._local.profundidad = 0
+            try:
+                self._devolver(conexion)
+            except sqlite3.Error:
+                self._descartar(conexion)
+
+    def cerrar(self):
+        """
+        Cierra las conexiones libres del pool; las que están prestadas se cierran al devolverse.
+        El pool sigue sirviendo: las conexiones siguientes se crean de nuevo con la fábrica.
+        """
+        with self._lock:
+            self._generacion += 1
+        while True:
+            try:
+                conexion, _ = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conexion)
@@ -0,0 +1,299 @@
+"""
+Filas de un ft.DataTable de citas indexadas por el id de la cita.
+Cada cita conserva su DataRow mientras siga en la tabla: al recargar solo se crean las filas nuevas, se
+quitan las que ya no están y se cambian los textos de las que cambiaron. Como Flet envía al cliente
+solo las diferencias entre el árbol anterior y el nuevo, una actualización que toca una cita viaja
+como una fila y no como la tabla completa.
+
+Los registros son las tuplas de obtener_todas_citas: (cita_id, fecha, hora, paciente, medico, estado),
+y las filas se mantienen en el mismo orden (fecha, hora, id).
+
+ListaCitas hace lo mismo con filas livianas dentro de un ft.ListView, y VentanaCitas la usa para mostrar
+un listado largo (el historial) por páginas al desplazarse, con un máximo de filas creadas a la vez.
+Las páginas se piden en ejecutor_bd, así que desplazarse nunca espera a la base.
+"""
+from bisect import bisect_left
+
+import flet as ft
+
+import ejecutor_bd
+
+
+def _orden(registro):
+    return (registro[1], registro[2], registro[0])
+
+
+class TablaCitas:
+    """
+    Modelo de filas de 'tabla' indexado por cita_id. Si se indica 'crear_acciones(cita_id)', la última
+    celda de cada fila es el control que retorna (botones de la cita).
+    """
+
+    def __init__(self, tabla, crear_acciones=None):
+        self.tabla = tabla
+        self.filas = tabla.rows
+        self.crear_acciones = crear_acciones
+        self._registros = {}  # cita_id -> registro mostrado
+        self._filas = {}  # cita_id -> DataRow
+
+    def __len__(self):
+        return len(self._registros)
+
+    def __contains__(self, cita_id):
+        return cita_id in self._registros
+
+    def ultima_clave(self):
+        """Cursor (fecha, hora, id) de la última fila, para pedir la página siguiente; None si está vacía."""
+        if not self.filas:
+            return None
+        return _orden(self._registros[self.filas[-1].data])
+
+    def primera_clave(self):
+        """Cursor (fecha, hora, id) de la primera fila; None si está vacía."""
+        if not self.filas:
+            return None
+        return _orden(self._registros[self.filas[0].data])
+
+    def _crear_fila(self, registro):
+        celdas = [ft.DataCell(ft.Text(valor)) for valor in registro[1:]]
+        if self.crear_acciones:
+            celdas.append(ft.DataCell(self.crear_acciones(registro[0])))
+        return ft.DataRow(cells=celdas, data=registro[0])
+
+    def _textos(self, fila):
+        """Controles Text de la fila, en el orden de las columnas del registro (sin el id)."""
+        return [celda.content for celda in fila.cells]
+
+    def _poner(self, registro):
+        """Crea o actualiza la fila del registro y la retorna (sin colocarla en la tabla)."""
+        cita_id = registro[0]
+        anterior = self._registros.get(cita_id)
+        fila = self._filas.get(cita_id)
+        if fila is None:
+            fila = self._filas[cita_id] = self._crear_fila(registro)
+        elif anterior != registro:
+            for texto, viejo, nuevo in zip(self._textos(fila), anterior[1:], registro[1:]):
+                if viejo != nuevo:
+                    texto.value = nuevo
+        self._registros[cita_id] = registro
+        return fila
+
+    def sincronizar(self, registros):
+        """
+        Deja en la tabla exactamente 'registros' (ya ordenados), reutilizando las filas existentes.
+        Retorna (insertadas, quitadas, modificadas).
+        """
+        nuevos = {registro[0] for registro in registros}
+        quitadas = [cita_id for cita_id in self._registros if cita_id not in nuevos]
+        for cita_id in quitadas:
+            del self._registros[cita_id]
+            del self._filas[cita_id]
+        insertadas = sum(1 for registro in registros if registro[0] not in self._registros)
+        modificadas = sum(1 for registro in registros
+                          if registro[0] in self._registros and self._registros[registro[0]] != registro)
+        self.filas[:] = [self._poner(registro) for registro in registros]
+        return insertadas, len(quitadas), modificadas
+
+    def agregar(self, registros):
+        """Añade al final una página más de registros (los que ya estén en la tabla solo se actualizan)."""
+        for registro in registros:
+            nueva = registro[0] not in self._filas
+            fila = self._poner(registro)
+            if nueva:
+                self.filas.append(fila)
+
+    def anteponer(self, registros):
+        """Añade al principio los registros (ordenados) de la página anterior."""
+        nuevas = [self._poner(registro) for registro in registros if registro[0] not in self._filas]
+        self.filas[:0] = nuevas
+
+    def insertar(self, registro):
+        """Coloca un registro en su posición según (fecha, hora, id); si ya estaba, solo se actualiza."""
+        if registro[0] in self._filas:
+            self._poner(registro)
+            return
+        claves = [_orden(self._registros[fila.data]) for fila in self.filas]
+        self.filas.insert(bisect_left(claves, _orden(registro)), self._poner(registro))
+
+    def quitar(self, cita_id):
+        """Quita la fila de la cita y retorna su registro (None si no estaba)."""
+        registro = self._registros.pop(cita_id, None)
+        if registro is not None:
+            self.filas.remove(self._filas.pop(cita_id))
+        return registro
+
+    def recortar(self, cantidad, del_inicio):
+        """Quita 'cantidad' filas del inicio o del final de la tabla."""
+        quitadas = self.filas[:cantidad] if del_inicio else self.filas[len(self.filas) - cantidad:]
+        for fila in quitadas:
+            del self._registros[fila.data]
+            del self._filas[fila.data]
+        if del_inicio:
+            del self.filas[:cantidad]
+        else:
+            del self.filas[len(self.filas) - cantidad:]
+
+    def vaciar(self):
+        self._registros.clear()
+        self._filas.clear()
+        self.filas.clear()
+
+
+# Ancho de cada columna de ListaCitas (fecha, hora, paciente, médico, estado) y alto fijo de las filas:
+# con el alto fijo el ListView no mide cada fila y el desplazamiento se puede corregir al recortar.
+ANCHOS_COLUMNAS = (100, 60, 260, 220, 90)
+ALTO_FILA = 36
+
+
+def encabezado_lista(titulos=("Fecha", "Hora", "Paciente", "Médico", "Estado")):
+    """Fila de títulos con los mismos anchos que las filas de ListaCitas."""
+    return ft.Row([ft.Text(titulo, width=ancho, weight=ft.FontWeight.BOLD)
+                   for titulo, ancho in zip(titulos, ANCHOS_COLUMNAS)], spacing=10)
+
+
+class ListaCitas(TablaCitas):
+    """TablaCitas sobre los controles de un ft.ListView (una Row de textos por cita)."""
+
+    def __init__(self, lista):
+        self.tabla = lista
+        self.filas = lista.controls
+        self.crear_acciones = None
+        self._registros = {}
+        self._filas = {}
+
+    def _crear_fila(self, registro):
+        textos = [ft.Text(valor, width=ancho, no_wrap=True) for valor, ancho in zip(registro[1:], ANCHOS_COLUMNAS)]
+        return ft.Container(content=ft.Row(textos, spacing=10), height=ALTO_FILA, data=registro[0])
+
+    def _textos(self, fila):
+        return fila.content.controls
+
+
+class VentanaCitas:
+    """
+    Listado paginado por cursor dentro de un ListView: pide la página siguiente al llegar al final
+    y la anterior al volver al principio, y no conserva más de 'max_filas' filas creadas.
+    - consultar(despues_de=None, antes_de=None, limite=None): registros ordenados (ver obtener_todas_citas).
+    - contar(): total de registros con los filtros actuales.
+    - al_cambiar(): se llama (desde el hilo del ejecutor) después de aplicar cada página; debe llamar a
+      page.update().
+    - al_fallar(error): se llama si una consulta falla.
+    - grupo: grupo de ejecutor_bd de las consultas (la sesión), para cancelarlas al cerrarla.
+    Las consultas corren en ejecutor_bd con una sola clave por ventana: recargar() reemplaza a la consulta
+    que estuviera en curso, y mientras hay una no se piden otras páginas al desplazarse.
+    recargar(), siguiente() y anterior() retornan la ejecutor_bd.Tarea enviada, o None si no había nada
+    que pedir.
+    """
+
+    # Distancia (en píxeles) a los bordes del ListView a la que se pide la página siguiente o anterior.
+    MARGEN_CARGA = 3 * ALTO_FILA
+
+    def __init__(self, lista, consultar, contar, tamano_pagina=50, max_filas=200, al_cambiar=None,
+                 al_fallar=None, grupo=None):
+        self.lista = ListaCitas(lista)
+        self.consultar = consultar
+        self.contar = contar
+        self.tamano_pagina = tamano_pagina
+        self.max_filas = max(max_filas, 2 * tamano_pagina)
+        self.al_cambiar = al_cambiar
+        self.al_fallar = al_fallar
+        self.grupo = grupo
+        self.total = 0
+        self.hay_anteriores = False
+        self.hay_siguientes = False
+        self._cargando = False
+        self._pixeles = 0  # desplazamiento actual del ListView
+        lista.item_extent = ALTO_FILA
+        lista.on_scroll = self.al_desplazar
+
+    def _enviar(self, funcion, aplicar, **kwargs):
+        self._cargando = True
+
+        def al_terminar(resultado):
+            self._cargando = False
+            aplicar(resultado)
+            if self.al_cambiar:
+                self.al_cambiar()
+
+        def al_fallar(error):
+            self._cargando = False
+            if self.al_fallar:
+                self.al_fallar(error)
+
+        return ejecutor_bd.ejecutar(funcion, al_terminar=al_terminar, al_fallar=al_fallar,
+                                    clave=("ventana_citas", id(self)), grupo=self.grupo, **kwargs)
+
+    def _total_y_primera_pagina(self):
+        return self.contar(), self.consultar(limite=self.tamano_pagina + 1)
+
+    def recargar(self):
+        """Vuelve al principio con los filtros actuales (las filas que no cambian se conservan)."""
+        return self._enviar(self._total_y_primera_pagina, self._aplicar_recarga)
+
+    def _aplicar_recarga(self, resultado):
+        self.total, registros = resultado
+        self.hay_siguientes = len(registros) > self.tamano_pagina
+        self.hay_anteriores = False
+        self.lista.sincronizar(registros[:self.tamano_pagina])
+        self._pixeles = 0
+        self._desplazar(0)
+
+    def siguiente(self):
+        """Pide la página siguiente para agregarla al final."""
+        if not self.hay_siguientes or self._cargando:
+            return None
+        return self._enviar(self.consultar, self._aplicar_siguiente,
+                            despues_de=self.lista.ultima_clave(), limite=self.tamano_pagina + 1)
+
+    def _aplicar_siguiente(self, registros):
+        self.hay_siguientes = len(registros) > self.tamano_pagina
+        self.lista.agregar(registros[:self.tamano_pagina])
+        sobrantes = len(self.lista) - self.max_filas
+        if sobrantes > 0:
+            self.lista.recortar(sobrantes, del_inicio=True)
+            self.hay_anteriores = True
+            self._desplazar(-sobrantes)
+
+    def anterior(self):
+        """Pide la página anterior a la primera fila para agregarla al principio."""
+        if not self.hay_anteriores or self._cargando:
+            return None
+        return self._enviar(self.consultar, self._aplicar_anterior,
+                            antes_de=self.lista.primera_clave(), limite=self.tamano_pagina + 1)
+
+    def _aplicar_anterior(self, registros):
+        self.hay_anteriores = len(registros) > self.tamano_pagina
+        pagina = registros[-self.tamano_pagina:]
+        self.lista.anteponer(pagina)
+        self._desplazar(len(pagina))
+        sobrantes = len(self.lista) - self.max_filas
+        if sobrantes > 0:
+            self.lista.recortar(sobrantes, del_inicio=False)
+            self.hay_siguientes = True
+
+    def _desplazar(self, filas):
+        """Compensa el desplazamiento cuando se quitan o agregan filas encima de las visibles."""
+        self._pixeles = max(0, self._pixeles + filas * ALTO_FILA)
+        if self.lista.tabla.page is not None:
+            self.lista.tabla.scroll_to(offset=self._pixeles, duration=0)
+
+    def insertar(self, registro):
+        """
+        Agrega un registro que acaba de empezar a cumplir los filtros. Solo se muestra si cae dentro de
+        las filas cargadas; si no, aparecerá al llegar a su página.
+        """
+        self.total += 1
+        clave = _orden(registro)
+        if self.hay_anteriores and clave < self.lista.primera_clave():
+            return
+        if self.hay_siguientes and clave > self.lista.ultima_clave():
+            return
+        self.lista.insertar(registro)
+
+    def al_desplazar(self, e):
+        """on_scroll del ListView."""
+        self._pixeles = e.pixels
+        if e.pixels >= e.max_scroll_extent - self.MARGEN_CARGA:
+            self.siguiente()
+        elif e.pixels <= self.MARGEN_CARGA:
+            self.anterior()
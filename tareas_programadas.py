@@ -0,0 +1,47 @@
+import threading
+import traceback
+
+
+class TareaPeriodica:
+    """
+    Ejecuta una función cada 'intervalo' segundos en un hilo en segundo plano (daemon).
+    La tarea se detiene con detener(); los errores de la función se imprimen y no detienen el ciclo.
+    """
+
+    def __init__(self, nombre, intervalo, funcion, *args, **kwargs):
+        self.nombre = nombre
+        self.intervalo = intervalo
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.ultimo_resultado = None
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            self.ejecutar_ahora()
+
+    def ejecutar_ahora(self):
+        """Ejecuta la función inmediatamente en el hilo actual y guarda su resultado."""
+        try:
+            self.ultimo_resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception:
+            print(f"❌ Error en la tarea '{self.nombre}':")
+            traceback.print_exc()
+        return self.ultimo_resultado
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return self
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name=self.nombre, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+
+    @property
+    def activa(self):
+        return self._hilo is not None and self._hilo.is_alive() and not self._detener.is_set()